@@ -0,0 +1,214 @@
+# app/adaptive_caps.py
+import argparse
+import collections
+import logging
+import math
+import threading
+
+from app.config import (
+    MODEL_CRITIC, CAPS_BASELINE, CAPS_EXCHANGE, CAPS_FINALIZE, CAPS_REPAIR, CAPS_OVERRIDES,
+    ADAPTIVE_CAPS_ENABLED, ADAPTIVE_CAPS_WINDOW, ADAPTIVE_CAPS_MIN_SAMPLES, ADAPTIVE_CAPS_PERCENTILE,
+    ADAPTIVE_CAPS_HEADROOM, ADAPTIVE_CAPS_MIN_NUM_PREDICT, ADAPTIVE_CAPS_MIN_TIMEOUT_S, ADAPTIVE_CAPS_MAX_TIMEOUT_S
+)
+from app.transcript_store import get_transcript_store
+
+log = logging.getLogger(__name__)
+
+# The fixed caps each debate phase starts from (and never exceeds in num_predict)
+PHASE_DEFAULTS = {
+    "baseline": CAPS_BASELINE,
+    "exchange": CAPS_EXCHANGE,
+    "final": CAPS_FINALIZE,
+    "repair": CAPS_REPAIR,
+    "critic": CAPS_FINALIZE,   # The verdict
+    "audit": CAPS_REPAIR,      # The hallucination scan
+}
+
+
+def _percentile(values: list, pct: float) -> float:
+    ordered = sorted(values)
+    return ordered[max(0, math.ceil(pct / 100 * len(ordered)) - 1)]
+
+
+class AdaptiveCaps:
+    """
+    Generation caps per (model, phase), learned from that model's recent calls.
+
+    Every debate call is recorded here as it finishes; a model's stored calls seed
+    the window the first time it is asked about, so learning carries over restarts.
+    With enough samples:
+
+    * num_predict is the p95 reply length with headroom, capped at the phase default.
+      A reply that hit its cap was cut short, so it counts as needing headroom more;
+      caps that turn out too tight grow back on their own.
+    * timeout is the time to write num_predict tokens at the model's slow-end (p5)
+      speed plus its p95 load/prompt overhead, with headroom. A call that timed out
+      raises it to at least headroom x the timeout it ran out of.
+
+    CAPS_OVERRIDES in app/config.py are applied last and always win.
+    """
+    def __init__(self, window: int = ADAPTIVE_CAPS_WINDOW, min_samples: int = ADAPTIVE_CAPS_MIN_SAMPLES,
+                 overrides: dict = None, enabled: bool = ADAPTIVE_CAPS_ENABLED, seed_from_store: bool = True):
+        self.window = window
+        self.min_samples = min_samples
+        self.overrides = CAPS_OVERRIDES if overrides is None else overrides
+        self.enabled = enabled
+        self.seed_from_store = seed_from_store
+        self._samples = {}      # (model, phase) -> deque of recent calls
+        self._seeded = set()
+        self._lock = threading.Lock()
+
+    # --- Recording ---
+
+    def _add_locked(self, model: str, phase: str, sample: dict):
+        key = (model, phase)
+        if key not in self._samples:
+            self._samples[key] = collections.deque(maxlen=self.window)
+        self._samples[key].append(sample)
+
+    def _seed_locked(self, model: str):
+        if model in self._seeded or not self.seed_from_store:
+            return
+        self._seeded.add(model)
+        try:
+            rows = get_transcript_store().recent_calls(model, limit=self.window * 4, include_errors=True)
+        except Exception as e:
+            log.error(f"Could not seed caps for {model} from the transcript store: {e}")
+            return
+        # Stored calls don't keep the caps they ran with; the phase defaults are assumed
+        for row in reversed(rows):
+            default = PHASE_DEFAULTS.get(row["phase"])
+            sample = default and self._sample(default, not row["error"], row, row["error"] or "")
+            if sample:
+                self._add_locked(model, row["phase"], sample)
+
+    @staticmethod
+    def _sample(caps: dict, success: bool, metrics: dict, error: str):
+        timed_out = not success and error.startswith("Timeout")
+        if not timed_out and not (success and metrics.get("tokens_out")):
+            return None  # Other failures say nothing about reply length or speed
+        return {
+            "tokens_out": metrics.get("tokens_out") or 0,
+            "tokens_per_s": metrics.get("tokens_per_s") or 0,
+            "overhead_s": max(0.0, (metrics.get("time_total_s") or 0) - (metrics.get("time_gen_s") or 0)),
+            "num_predict": caps.get("num_predict", 0),
+            "timeout": caps.get("timeout", 0),
+            "timed_out": timed_out,
+        }
+
+    def record(self, model: str, phase: str, caps: dict, success: bool, metrics: dict, error: str = ""):
+        """Adds a finished call (as returned by run_ollama) to the model's window for that phase."""
+        sample = self._sample(caps, success, metrics or {}, error or "")
+        if sample is None:
+            return
+        with self._lock:
+            self._seed_locked(model)
+            self._add_locked(model, phase, sample)
+
+    # --- Caps ---
+
+    def _learned_locked(self, model: str, phase: str, default: dict):
+        samples = list(self._samples.get((model, phase), ()))
+        ok = [s for s in samples if not s["timed_out"]]
+        if len(ok) < self.min_samples:
+            return None
+        lengths = [s["tokens_out"] * (ADAPTIVE_CAPS_HEADROOM if s["tokens_out"] >= s["num_predict"] else 1)
+                   for s in ok]
+        num_predict = math.ceil(_percentile(lengths, ADAPTIVE_CAPS_PERCENTILE) * ADAPTIVE_CAPS_HEADROOM)
+        num_predict = min(default["num_predict"], max(ADAPTIVE_CAPS_MIN_NUM_PREDICT, num_predict))
+
+        rates = [s["tokens_per_s"] for s in ok if s["tokens_per_s"] > 0]
+        if not rates:
+            return {"num_predict": num_predict}
+        slow_rate = _percentile(rates, 100 - ADAPTIVE_CAPS_PERCENTILE)
+        overhead = _percentile([s["overhead_s"] for s in ok], ADAPTIVE_CAPS_PERCENTILE)
+        timeout = (overhead + num_predict / slow_rate) * ADAPTIVE_CAPS_HEADROOM
+        timed_out = [s["timeout"] for s in samples if s["timed_out"]]
+        if timed_out:
+            timeout = max(timeout, max(timed_out) * ADAPTIVE_CAPS_HEADROOM)
+        timeout = min(ADAPTIVE_CAPS_MAX_TIMEOUT_S, max(ADAPTIVE_CAPS_MIN_TIMEOUT_S, math.ceil(timeout)))
+        return {"num_predict": num_predict, "timeout": timeout}
+
+    def caps_for(self, model: str, phase: str, default: dict = None) -> dict:
+        """The caps for the model's next call in this phase: default, then learned, then overrides."""
+        default = default or PHASE_DEFAULTS[phase]
+        caps = dict(default)
+        if self.enabled:
+            with self._lock:
+                self._seed_locked(model)
+                caps.update(self._learned_locked(model, phase, default) or {})
+        model_overrides = self.overrides.get(model, {})
+        caps.update(model_overrides.get("*", {}))
+        caps.update(model_overrides.get(phase, {}))
+        return caps
+
+    def stats(self, models: list[str] = None) -> list[dict]:
+        """
+        Per (model, phase): samples, timeouts, default vs current caps, and the average
+        reservation left unused (num_predict minus reply length) under each.
+        """
+        with self._lock:
+            for model in models or []:
+                self._seed_locked(model)
+            keys = sorted(k for k in self._samples if not models or k[0] in models)
+        rows = []
+        for model, phase in keys:
+            default = PHASE_DEFAULTS.get(phase)
+            if not default:
+                continue
+            current = self.caps_for(model, phase)
+            with self._lock:
+                samples = list(self._samples[(model, phase)])
+            ok = [s for s in samples if not s["timed_out"]]
+            rows.append({
+                "model": model, "phase": phase, "samples": len(samples),
+                "timeouts": len(samples) - len(ok), "learned": len(ok) >= self.min_samples,
+                "num_predict_default": default["num_predict"], "num_predict": current["num_predict"],
+                "timeout_default": default["timeout"], "timeout": current["timeout"],
+                "p95_tokens": _percentile([s["tokens_out"] for s in ok], 95) if ok else None,
+                "unused_default": round(sum(max(0, default["num_predict"] - s["tokens_out"]) for s in ok) / len(ok))
+                                  if ok else None,
+                "unused_now": round(sum(max(0, current["num_predict"] - s["tokens_out"]) for s in ok) / len(ok))
+                              if ok else None,
+            })
+        return rows
+
+
+_ADAPTIVE_CAPS = None
+_ADAPTIVE_CAPS_LOCK = threading.Lock()
+
+def get_adaptive_caps() -> AdaptiveCaps:
+    """Returns the caps learner shared by every session and job in this process."""
+    global _ADAPTIVE_CAPS
+    with _ADAPTIVE_CAPS_LOCK:
+        if _ADAPTIVE_CAPS is None:
+            _ADAPTIVE_CAPS = AdaptiveCaps()
+        return _ADAPTIVE_CAPS
+
+def caps_for(model: str, phase: str) -> dict:
+    """Shorthand for get_adaptive_caps().caps_for(model, phase)."""
+    return get_adaptive_caps().caps_for(model, phase)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Show the generation caps learned for each model and phase.")
+    parser.add_argument("--model", nargs="*", help="Models to show (default: every model in the transcript store)")
+    args = parser.parse_args()
+
+    models = args.model or get_transcript_store().list_models() + [MODEL_CRITIC]
+    rows = get_adaptive_caps().stats(models)
+    if not rows:
+        print("No recorded calls yet.")
+        return
+    print(f"{'model':<28} {'phase':<9} {'calls':>5} {'t/o':>4}  {'num_predict':>13}  {'timeout':>9}  "
+          f"{'p95 out':>7}  {'unused tokens':>13}")
+    for r in rows:
+        print(f"{r['model']:<28} {r['phase']:<9} {r['samples']:>5} {r['timeouts']:>4}  "
+              f"{r['num_predict_default']:>5} -> {r['num_predict']:<5}  {r['timeout_default']:>3} -> {r['timeout']:<3}  "
+              f"{r['p95_tokens'] if r['p95_tokens'] is not None else '-':>7}  "
+              f"{r['unused_default'] if r['unused_default'] is not None else '-':>5} -> "
+              f"{r['unused_now'] if r['unused_now'] is not None else '-':<5}"
+              + ("" if r["learned"] else "  (too few calls; defaults)"))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,214 @@
+# app/analytics.py
+import logging
+import threading
+
+import numpy as np
+import pandas as pd
+
+from app.transcript_store import get_transcript_store
+
+log = logging.getLogger(__name__)
+
+SLIDERS = ("tone", "style", "formality", "complexity")
+
+# Only the small, numeric/categorical columns are loaded; argument text and the
+# full transcript JSON stay in SQLite until a single debate is opened.
+_COLUMNS = {
+    "debates": ["id", "ts", "model_pro", "model_con", "winner", "source",
+                *(f"{side}_{slider}" for side in ("pro", "con") for slider in SLIDERS)],
+    "rounds": ["debate_id", "round", "phase", "side", "model", "side_mismatch", "protest"],
+    "calls": ["debate_id", "ts", "phase", "side", "model", "tokens_out", "tokens_per_s",
+              "time_gen_s", "time_total_s", "time_queue_s", "error"],
+}
+_LABELS = {"id", "debate_id", "model", "model_pro", "model_con", "phase", "side", "winner", "source", "error",
+           *(f"{side}_{slider}" for side in ("pro", "con") for slider in SLIDERS)}
+_ROLLUP_SUMS = ["calls", "ok_calls", "errors", "timeouts", "tokens_out", "time_gen_s", "time_total_s", "time_queue_s"]
+
+
+def _to_frame(table: str, rows: list) -> pd.DataFrame:
+    df = pd.DataFrame.from_records(rows, columns=_COLUMNS[table])
+    for column in df.columns:
+        if column in _LABELS:
+            df[column] = df[column].fillna("").astype(str)
+        else:
+            df[column] = pd.to_numeric(df[column])
+    return df
+
+def _rollup_calls(calls: pd.DataFrame) -> pd.DataFrame:
+    """Per (day, model) sums of the call table. Sums can be added across batches."""
+    error = calls["error"].fillna("")
+    frame = pd.DataFrame({
+        "day": pd.to_datetime(calls["ts"], unit="s").dt.floor("D"),
+        "model": calls["model"],
+        "calls": 1,
+        "ok_calls": (error == "").astype(int),
+        "errors": (error != "").astype(int),
+        "timeouts": error.str.startswith("Timeout").astype(int),
+        "tokens_out": calls["tokens_out"].fillna(0),
+        "time_gen_s": calls["time_gen_s"].fillna(0),
+        "time_total_s": calls["time_total_s"].fillna(0),
+        "time_queue_s": calls["time_queue_s"].fillna(0),
+    })
+    return frame.groupby(["day", "model"], observed=True)[_ROLLUP_SUMS].sum()
+
+
+class DebateArchive:
+    """
+    Columnar, in-memory view of the transcript store for the analytics page.
+
+    refresh() only reads debates saved since the last refresh (following the store's
+    change log, so a re-saved debate replaces its old rows), and keeps a daily
+    per-model rollup of the call table up to date, so reruns stay cheap even with
+    tens of thousands of stored debates. Aggregates are cached until new data arrives.
+    """
+    def __init__(self, store=None):
+        self.store = store or get_transcript_store()
+        self._lock = threading.Lock()
+        self._seq = 0   # Position in the store's change log
+        self.frames = {table: _to_frame(table, []) for table in _COLUMNS}
+        self.daily = _rollup_calls(self.frames["calls"])
+        self.version = 0
+        self._cache = {}
+
+    def refresh(self) -> int:
+        """Loads debates saved since the last refresh. Returns the number of new or re-saved debates."""
+        with self._lock:
+            seq, changed, new_rows = self.store.read_changed_debates(_COLUMNS, self._seq)
+            if seq == self._seq:
+                return 0
+            new = {table: _to_frame(table, rows) for table, rows in new_rows.items()}
+
+            # A re-saved debate (a re-run finale, autopilot, a retried worker item) comes back
+            # with all of its current rows, so its old rows are dropped before they are appended.
+            replaced = set(changed) & set(self.frames["debates"]["id"])
+            for table, df in new.items():
+                old = self.frames[table]
+                if replaced:
+                    key = "id" if table == "debates" else "debate_id"
+                    old = old[~old[key].isin(replaced)]
+                self.frames[table] = pd.concat([old, df], ignore_index=True) if not old.empty else df
+            self._seq = seq
+
+            if replaced:
+                self.daily = _rollup_calls(self.frames["calls"])
+            elif not new["calls"].empty:
+                self.daily = self.daily.add(_rollup_calls(new["calls"]), fill_value=0)
+
+            self.version += 1
+            self._cache.clear()
+            log.info(f"Analytics archive: +{len(new['debates'])} debates "
+                     f"({len(self.frames['debates'])} total, {len(replaced)} replaced)")
+            return len(new["debates"])
+
+    def cached(self, name: str, func, *args):
+        """Memoizes func(*args) under name until the next refresh that finds new data."""
+        with self._lock:
+            if name not in self._cache:
+                self._cache[name] = func(*args)
+            return self._cache[name]
+
+    # --- Convenience accessors ---
+
+    @property
+    def debates(self) -> pd.DataFrame:
+        return self.frames["debates"]
+
+    @property
+    def rounds(self) -> pd.DataFrame:
+        return self.frames["rounds"]
+
+    @property
+    def calls(self) -> pd.DataFrame:
+        return self.frames["calls"]
+
+
+# --- Aggregates (all vectorized over the archive frames) ---
+
+def throughput_over_time(daily: pd.DataFrame, freq: str = "D", models: list = None) -> pd.DataFrame:
+    """
+    Generated tokens per second of generation time, one column per model, one row per period.
+    Token-weighted (sum of tokens / sum of time), so long answers count for what they cost.
+    """
+    df = daily.reset_index()
+    if models:
+        df = df[df["model"].isin(models)]
+    if df.empty:
+        return pd.DataFrame()
+    df["period"] = df["day"].dt.to_period(freq).dt.start_time
+    sums = df.groupby(["period", "model"], observed=True)[["tokens_out", "time_gen_s"]].sum()
+    rate = (sums["tokens_out"] / sums["time_gen_s"].replace(0, np.nan)).round(2)
+    return rate.unstack("model")
+
+def call_health(daily: pd.DataFrame, models: list = None) -> pd.DataFrame:
+    """Per model: calls, error rate, timeout rate, and average call time and queue wait."""
+    df = daily.groupby("model", observed=True)[_ROLLUP_SUMS].sum()
+    if models:
+        df = df[df.index.isin(models)]
+    calls = df["calls"].replace(0, np.nan)
+    return pd.DataFrame({
+        "calls": df["calls"].astype(int),
+        "error_rate": (df["errors"] / calls).round(3),
+        "timeout_rate": (df["timeouts"] / calls).round(3),
+        "avg_call_s": (df["time_total_s"] / calls).round(2),
+        "avg_queue_s": (df["time_queue_s"] / calls).round(2),
+    }).sort_values("calls", ascending=False)
+
+def side_rates_by_slider(debates: pd.DataFrame, rounds: pd.DataFrame, slider: str) -> pd.DataFrame:
+    """
+    Side-mismatch and protest rates per value of one persona slider, split by side.
+    Each turn is matched to the slider value of the side that produced it.
+    """
+    if rounds.empty:
+        return pd.DataFrame()
+    sliders = debates[["id", f"pro_{slider}", f"con_{slider}"]]
+    merged = rounds.merge(sliders, left_on="debate_id", right_on="id", how="inner")
+    merged[slider] = np.where(merged["side"] == "PRO", merged[f"pro_{slider}"], merged[f"con_{slider}"])
+    merged = merged[merged[slider] != ""]
+    return merged.groupby([slider, "side"], observed=True).agg(
+        turns=("side_mismatch", "size"),
+        mismatch_rate=("side_mismatch", "mean"),
+        protest_rate=("protest", "mean"),
+    ).round(3).reset_index()
+
+def win_rates(debates: pd.DataFrame) -> pd.DataFrame:
+    """
+    Per model: judged debates, wins and win rate on each side and overall.
+    Self-play debates (same model on both sides) are left out.
+    """
+    judged = debates[(debates["winner"] != "") & (debates["model_pro"] != debates["model_con"])]
+    if judged.empty:
+        return pd.DataFrame()
+    long = pd.concat([
+        pd.DataFrame({"model": judged["model_pro"], "side": "PRO", "won": judged["winner"] == "PRO"}),
+        pd.DataFrame({"model": judged["model_con"], "side": "CON", "won": judged["winner"] == "CON"}),
+    ], ignore_index=True)
+    by_side = long.pivot_table(index="model", columns="side", values="won", aggfunc="mean", observed=True)
+    overall = long.groupby("model", observed=True)["won"].agg(debates="size", wins="sum", win_rate="mean")
+    overall = overall.join(by_side.add_prefix("win_rate_"))
+    return overall.round(3).sort_values(["win_rate", "debates"], ascending=False)
+
+def filter_debates(archive: DebateArchive, since: float = None, models: list = None) -> tuple:
+    """Debate and round frames restricted to a start time and to debates with one of the models."""
+    debates = archive.debates
+    mask = np.ones(len(debates), dtype=bool)
+    if since:
+        mask &= (debates["ts"] >= since).to_numpy()
+    if models:
+        mask &= (debates["model_pro"].isin(models) | debates["model_con"].isin(models)).to_numpy()
+    debates = debates[mask]
+    rounds = archive.rounds
+    if not mask.all():
+        rounds = rounds[rounds["debate_id"].isin(debates["id"])]
+    return debates, rounds
+
+
+_ARCHIVE = None
+_ARCHIVE_LOCK = threading.Lock()
+
+def get_debate_archive() -> DebateArchive:
+    """Returns the process-wide archive, so every session shares the loaded frames."""
+    global _ARCHIVE
+    with _ARCHIVE_LOCK:
+        if _ARCHIVE is None:
+            _ARCHIVE = DebateArchive()
+        return _ARCHIVE
@@ -0,0 +1,243 @@
+# app/batch.py
+import argparse
+import csv
+import hashlib
+import io
+import json
+import logging
+import os
+import time
+from itertools import combinations
+
+import pandas as pd
+
+from app.runner import run_ollama
+from app.scheduler import request_context, PRIORITY_BATCH
+from app.comparator import ComparatorCoordinator
+from app.model_options import get_model_options
+from app.model_registry import get_registry
+from app.config import CAPS_COMPARISON, CAPS_CRITIQUE, MODEL_COMPARATOR, BATCH_RESULTS_DIR
+
+log = logging.getLogger(__name__)
+
+BATCH_TEMPERATURE = 0.6  # Same temperature the single-prompt comparator uses
+
+
+# --- Prompt Suite Loading ---
+
+def _normalize_suite_rows(rows: list[dict]) -> list[dict]:
+    """Validates suite rows and fills in the optional id/mode/persona fields."""
+    suite = []
+    for i, row in enumerate(rows):
+        prompt = (row.get("prompt") or "").strip()
+        if not prompt:
+            log.warning(f"Skipping suite row {i}: no 'prompt' field.")
+            continue
+        suite.append({
+            "id": str(row.get("id") or f"p{i:04d}"),
+            "mode": (row.get("mode") or "general").strip().lower(),
+            "prompt": prompt,
+            "persona": (row.get("persona") or "").strip(),
+        })
+    return suite
+
+def parse_prompt_suite(text: str, fmt: str) -> list[dict]:
+    """
+    Parses a prompt suite from JSONL or CSV text.
+    Each row needs a 'prompt'; 'id', 'mode' (e.g. logic, creativity) and 'persona' are optional.
+    """
+    fmt = fmt.lower().lstrip(".")
+    if fmt == "jsonl":
+        rows = [json.loads(line) for line in text.splitlines() if line.strip()]
+    elif fmt == "csv":
+        rows = list(csv.DictReader(io.StringIO(text)))
+    else:
+        raise ValueError(f"Unsupported prompt suite format: {fmt}")
+    return _normalize_suite_rows(rows)
+
+def load_prompt_suite(path: str) -> list[dict]:
+    """Loads a prompt suite file (.jsonl or .csv) from disk."""
+    with open(path, "r", encoding="utf-8") as f:
+        return parse_prompt_suite(f.read(), os.path.splitext(path)[1])
+
+
+# --- Result Cache (doubles as the checkpoint) ---
+
+def _cache_key(*parts) -> str:
+    return hashlib.sha256(json.dumps(parts, sort_keys=True).encode("utf-8")).hexdigest()
+
+def _model_identity(model_name: str) -> dict:
+    """
+    What a cached output depends on besides the prompt: the installed digest and the
+    saved options run_ollama applies. Re-pulling a model or saving new options misses the cache.
+    """
+    model = get_registry().get_model(model_name, with_details=False) or {}
+    return {"name": model_name, "digest": model.get("digest", ""), "options": get_model_options(model_name)}
+
+class ResultCache:
+    """
+    Append-only JSONL cache of finished generation and critique calls.
+    Every finished call is flushed immediately, so an interrupted batch
+    resumes from where it stopped and repeated runs skip finished work.
+    """
+    def __init__(self, path: str):
+        self.path = path
+        self._entries = {}
+        if os.path.exists(path):
+            with open(path, "r", encoding="utf-8") as f:
+                for line in f:
+                    try:
+                        entry = json.loads(line)
+                        self._entries[entry["key"]] = entry["value"]
+                    except (json.JSONDecodeError, KeyError):
+                        continue  # A torn last line from a killed run
+        log.info(f"Loaded {len(self._entries)} cached batch results from {path}")
+
+    def get(self, key: str):
+        return self._entries.get(key)
+
+    def put(self, key: str, value: dict):
+        self._entries[key] = value
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        with open(self.path, "a", encoding="utf-8") as f:
+            f.write(json.dumps({"key": key, "value": value}) + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+
+
+# --- Batch Evaluator ---
+
+class BatchEvaluator:
+    def __init__(self, results_dir: str = BATCH_RESULTS_DIR, critique: bool = True,
+                 swap_positions: bool = False):
+        self.results_dir = results_dir
+        self.critique = critique
+        self.swap_positions = swap_positions
+        self.cache = ResultCache(os.path.join(results_dir, "cache.jsonl"))
+        self.comparator = ComparatorCoordinator()
+
+    def _generate(self, model_name: str, item: dict) -> tuple[dict, bool]:
+        prompt = f"{item['persona']}\n\n{item['prompt']}" if item["persona"] else item["prompt"]
+        key = _cache_key("generate", _model_identity(model_name), prompt, BATCH_TEMPERATURE, CAPS_COMPARISON)
+        cached = self.cache.get(key)
+        if cached is not None:
+            return cached, True
+
+        success, output, metrics, error = run_ollama(
+            model_name=model_name, prompt=prompt, temperature=BATCH_TEMPERATURE, **CAPS_COMPARISON
+        )
+        result = {"ok": success, "response": output, "metrics": metrics, "error": error}
+        # Failed calls are not cached so a resumed run retries them
+        if success:
+            self.cache.put(key, result)
+        return result, False
+
+    def _critique(self, item: dict, model_a: str, gen_a: dict, model_b: str, gen_b: dict) -> tuple[dict, bool]:
+        key = _cache_key("critique", item["prompt"], model_a, gen_a["response"], model_b, gen_b["response"],
+                         self.swap_positions, _model_identity(MODEL_COMPARATOR), CAPS_CRITIQUE)
+        cached = self.cache.get(key)
+        if cached is not None:
+            return cached, True
+
+        result = self.comparator.run_critique(
+            item["prompt"],
+            model_a, gen_a["response"], gen_a["metrics"],
+            model_b, gen_b["response"], gen_b["metrics"],
+            swap_positions=self.swap_positions
+        )
+        if result.get("raw_critique"):
+            self.cache.put(key, result)
+        return result, False
+
+    @request_context(priority=PRIORITY_BATCH)
+    def run(self, suite: list[dict], models: list[str], run_name: str = None,
+            on_progress=None) -> tuple[pd.DataFrame, pd.DataFrame]:
+        """
+        Runs every prompt x model generation, then critiques every model pair per prompt.
+
+        on_progress, if given, is called as on_progress(done, total, label) after each call.
+        Returns (generations_df, critiques_df); both are also written to the run directory.
+        """
+        run_name = run_name or time.strftime("batch_%Y%m%d_%H%M%S")
+        pairs = list(combinations(models, 2)) if self.critique else []
+        total = len(suite) * (len(models) + len(pairs))
+        done = 0
+        log.info(f"Batch '{run_name}': {len(suite)} prompts x {len(models)} models, {len(pairs)} critique pairs")
+
+        generation_rows, critique_rows = [], []
+        for item in suite:
+            generations = {}
+            for model_name in models:
+                gen, cached = self._generate(model_name, item)
+                generations[model_name] = gen
+                metrics = gen.get("metrics") or {}
+                generation_rows.append({
+                    "run": run_name, "prompt_id": item["id"], "mode": item["mode"], "prompt": item["prompt"],
+                    "model": model_name, "ok": gen["ok"], "error": gen["error"], "cached": cached,
+                    "response": gen["response"],
+                    "tokens_in": metrics.get("tokens_in", 0), "tokens_out": metrics.get("tokens_out", 0),
+                    "tokens_per_s": metrics.get("tokens_per_s", 0), "time_gen_s": metrics.get("time_gen_s", 0),
+                    "time_load_s": metrics.get("time_load_s", 0), "time_total_s": metrics.get("time_total_s", 0),
+                })
+                done += 1
+                if on_progress:
+                    on_progress(done, total, f"{item['id']} / {model_name}")
+
+            for model_a, model_b in pairs:
+                gen_a, gen_b = generations[model_a], generations[model_b]
+                if gen_a["ok"] and gen_b["ok"]:
+                    crit, cached = self._critique(item, model_a, gen_a, model_b, gen_b)
+                    report = crit.get("critique_report", {})
+                else:
+                    crit, cached = {}, False
+                    report = {"verdict": "Skipped: a generation failed."}
+                critique_rows.append({
+                    "run": run_name, "prompt_id": item["id"], "mode": item["mode"],
+                    "model_a": model_a, "model_b": model_b, "cached": cached,
+                    "verdict": report.get("verdict", ""), "scores": report.get("scores", ""),
+                    "position_consistent": (crit.get("position_check") or {}).get("consistent"),
+                    "critic_time_total_s": (crit.get("metrics") or {}).get("time_total_s", 0),
+                })
+                done += 1
+                if on_progress:
+                    on_progress(done, total, f"{item['id']} / critic {model_a} vs {model_b}")
+
+        generations_df = pd.DataFrame(generation_rows)
+        critiques_df = pd.DataFrame(critique_rows)
+        self._write_results(run_name, generations_df, critiques_df)
+        return generations_df, critiques_df
+
+    def _write_results(self, run_name: str, generations_df: pd.DataFrame, critiques_df: pd.DataFrame):
+        run_dir = os.path.join(self.results_dir, run_name)
+        os.makedirs(run_dir, exist_ok=True)
+        for name, df in (("generations", generations_df), ("critiques", critiques_df)):
+            try:
+                df.to_parquet(os.path.join(run_dir, f"{name}.parquet"), index=False)
+            except Exception as e:
+                log.warning(f"Parquet write failed ({e}), falling back to CSV for {name}.")
+                df.to_csv(os.path.join(run_dir, f"{name}.csv"), index=False)
+        log.info(f"Batch results written to {run_dir}")
+
+
+# --- Command Line Entry Point (for unattended runs) ---
+
+def main():
+    parser = argparse.ArgumentParser(description="Run a prompt suite against several Ollama models.")
+    parser.add_argument("suite", help="Path to a .jsonl or .csv prompt suite")
+    parser.add_argument("--models", nargs="+", required=True, help="Models to evaluate")
+    parser.add_argument("--run-name", default=None, help="Name of the results directory")
+    parser.add_argument("--no-critique", action="store_true", help="Skip the pairwise critic calls")
+    parser.add_argument("--swap-positions", action="store_true", help="Also judge every pair in B/A order")
+    args = parser.parse_args()
+
+    suite = load_prompt_suite(args.suite)
+    evaluator = BatchEvaluator(critique=not args.no_critique, swap_positions=args.swap_positions)
+
+    def print_progress(done, total, label):
+        print(f"[{done}/{total}] {label}", flush=True)
+
+    generations_df, critiques_df = evaluator.run(suite, args.models, args.run_name, print_progress)
+    print(generations_df.groupby("model")[["tokens_per_s", "time_total_s"]].mean())
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,81 @@
+# app/benchmark.py
+import logging
+import random
+import time
+import uuid
+
+from app.runner import run_ollama, unload_model, get_server_version
+from app.model_registry import get_registry
+from app.perf_db import record_benchmark_rows
+from app.config import BENCHMARK_PROMPT_LENGTHS, BENCHMARK_DECODE_TOKENS, BENCHMARK_TIMEOUT
+
+log = logging.getLogger(__name__)
+
+_FILLER_WORDS = (
+    "debate argument evidence river mountain policy energy market signal history theory "
+    "garden engine planet circuit language winter harbor library figure method balance "
+    "network contract science window journey pattern measure culture silver morning"
+).split()
+
+def _synthetic_prompt(target_tokens: int, seed: int = None) -> str:
+    """
+    Builds a prompt of roughly target_tokens tokens (~1.3 tokens per filler word).
+    A random nonce up front defeats Ollama's prompt-prefix cache between runs; with
+    a seed the text after it is the same every time.
+    """
+    rng = random.Random(seed)
+    words = [rng.choice(_FILLER_WORDS) for _ in range(max(1, int(target_tokens / 1.3)))]
+    return (f"[{uuid.uuid4().hex}] Summarize the following notes in one sentence.\n\n"
+            + " ".join(words))
+
+def benchmark_model(model_name: str, prompt_lengths: tuple = BENCHMARK_PROMPT_LENGTHS,
+                    on_progress=None) -> list[dict]:
+    """
+    Measures one model on this machine and stores the results in the performance DB:
+      - cold load time (model unloaded first, then a 1-token call)
+      - warm prefill tok/s and decode tok/s at each prompt length
+
+    All calls share one num_ctx large enough for the longest prompt, so the model
+    is not reloaded between lengths. Saved model options (Playground) are not applied,
+    so results stay comparable across machines and saves. Returns the recorded rows.
+    """
+    run_id = uuid.uuid4().hex
+    model = get_registry().get_model(model_name, with_details=False) or {}
+    base = {"run_id": run_id, "model": model_name, "digest": model.get("digest", ""),
+            "server_version": get_server_version()}
+    options = {"num_ctx": max(prompt_lengths) + BENCHMARK_DECODE_TOKENS + 256}
+    steps = len(prompt_lengths) + 1
+    rows = []
+
+    if on_progress:
+        on_progress(0, steps, f"{model_name}: cold load")
+    unload_model(model_name)
+    success, _, metrics, error = run_ollama(
+        model_name=model_name, prompt="ok", temperature=0.0, num_predict=1,
+        timeout=BENCHMARK_TIMEOUT, options=options, use_saved_options=False
+    )
+    rows.append({**base, "ts": time.time(), "kind": "cold", "prompt_tokens": 0,
+                 "tokens_in": metrics.get("tokens_in"), "tokens_out": metrics.get("tokens_out"),
+                 "load_s": metrics.get("time_load_s"), "total_s": metrics.get("time_total_s"),
+                 "ok": int(success), "error": error})
+
+    for i, target_tokens in enumerate(prompt_lengths, start=1):
+        if on_progress:
+            on_progress(i, steps, f"{model_name}: {target_tokens}-token prompt")
+        success, _, metrics, error = run_ollama(
+            model_name=model_name, prompt=_synthetic_prompt(target_tokens), temperature=0.0,
+            num_predict=BENCHMARK_DECODE_TOKENS, timeout=BENCHMARK_TIMEOUT, options=options,
+            use_saved_options=False
+        )
+        rows.append({**base, "ts": time.time(), "kind": "warm", "prompt_tokens": target_tokens,
+                     "tokens_in": metrics.get("tokens_in"), "tokens_out": metrics.get("tokens_out"),
+                     "load_s": metrics.get("time_load_s"), "prefill_tok_s": metrics.get("prefill_tokens_per_s"),
+                     "decode_tok_s": metrics.get("tokens_per_s"), "total_s": metrics.get("time_total_s"),
+                     "ok": int(success), "error": error})
+        if not success:
+            log.warning(f"Benchmark of {model_name} at {target_tokens} tokens failed: {error}")
+
+    record_benchmark_rows(rows)
+    if on_progress:
+        on_progress(steps, steps, f"{model_name}: done")
+    return rows
@@ -0,0 +1,240 @@
+# app/canary.py
+import argparse
+import itertools
+import logging
+import math
+import random
+import statistics
+import time
+import uuid
+
+from app.benchmark import _synthetic_prompt
+from app.config import (
+    PERF_DB_PATH, CANARY_PROMPT_LENGTHS, CANARY_DECODE_TOKENS, CANARY_REPEATS, CANARY_BASELINE_RUNS,
+    CANARY_ALPHA, CANARY_MIN_CHANGE, CANARY_INTERVAL_H, BENCHMARK_TIMEOUT
+)
+from app.model_registry import get_registry
+from app.perf_db import record_benchmark_rows, load_benchmarks
+from app.runner import run_ollama, unload_model, get_server_version
+from app.scheduler import request_context, PRIORITY_BATCH
+
+log = logging.getLogger(__name__)
+
+CANARY_KINDS = ("canary_cold", "canary")
+# metric -> (perf_db kind it is measured on, True if higher is better)
+CANARY_METRICS = {
+    "load_s": ("canary_cold", False),
+    "prefill_tok_s": ("canary", True),
+    "decode_tok_s": ("canary", True),
+}
+METRIC_LABELS = {"load_s": "load time", "prefill_tok_s": "prefill tok/s", "decode_tok_s": "decode tok/s"}
+PROMPT_SEED = 50  # Fixes the prompt text, so every run (and every upgrade) is measured on the same prompts
+MAX_PERMUTATIONS = 2000
+
+
+def run_canary(model_name: str, repeats: int = CANARY_REPEATS, prompt_lengths: tuple = CANARY_PROMPT_LENGTHS,
+               on_progress=None) -> list[dict]:
+    """
+    One canary run: `repeats` times, a cold load probe (model unloaded, then a 1-token
+    call) followed by every prompt of the fixed set. Rows go to the performance DB
+    with the model digest and server version, so a slowdown can be tied to a re-pull
+    or an Ollama upgrade. Calls run at batch priority and without the model's saved
+    Playground options, so every run is measured the same way. Returns the recorded rows.
+    """
+    run_id = uuid.uuid4().hex
+    model = get_registry().get_model(model_name, with_details=False) or {}
+    base = {"run_id": run_id, "model": model_name, "digest": model.get("digest", ""),
+            "server_version": get_server_version()}
+    options = {"num_ctx": max(prompt_lengths) + CANARY_DECODE_TOKENS + 256}
+    steps = repeats * (len(prompt_lengths) + 1)
+    rows = []
+
+    with request_context(priority=PRIORITY_BATCH, session="canary"):
+        for r in range(repeats):
+            if on_progress:
+                on_progress(len(rows), steps, f"{model_name}: cold load ({r + 1}/{repeats})")
+            unload_model(model_name)
+            success, _, metrics, error = run_ollama(
+                model_name=model_name, prompt="ok", temperature=0.0, num_predict=1,
+                timeout=BENCHMARK_TIMEOUT, options=options, use_saved_options=False
+            )
+            rows.append({**base, "ts": time.time(), "kind": "canary_cold", "prompt_tokens": 0,
+                         "tokens_in": metrics.get("tokens_in"), "tokens_out": metrics.get("tokens_out"),
+                         "load_s": metrics.get("time_load_s"), "total_s": metrics.get("time_total_s"),
+                         "ok": int(success), "error": error})
+
+            for target_tokens in prompt_lengths:
+                if on_progress:
+                    on_progress(len(rows), steps, f"{model_name}: {target_tokens}-token prompt ({r + 1}/{repeats})")
+                success, _, metrics, error = run_ollama(
+                    model_name=model_name, prompt=_synthetic_prompt(target_tokens, seed=PROMPT_SEED + target_tokens),
+                    temperature=0.0, num_predict=CANARY_DECODE_TOKENS, timeout=BENCHMARK_TIMEOUT, options=options,
+                    use_saved_options=False
+                )
+                rows.append({**base, "ts": time.time(), "kind": "canary", "prompt_tokens": target_tokens,
+                             "tokens_in": metrics.get("tokens_in"), "tokens_out": metrics.get("tokens_out"),
+                             "load_s": metrics.get("time_load_s"), "prefill_tok_s": metrics.get("prefill_tokens_per_s"),
+                             "decode_tok_s": metrics.get("tokens_per_s"), "total_s": metrics.get("time_total_s"),
+                             "ok": int(success), "error": error})
+                if not success:
+                    log.warning(f"Canary of {model_name} at {target_tokens} tokens failed: {error}")
+
+    record_benchmark_rows(rows)
+    if on_progress:
+        on_progress(steps, steps, f"{model_name}: done")
+    return rows
+
+
+# --- Statistics ---
+
+def permutation_p_value(baseline: list[float], current: list[float], higher_is_better: bool) -> float:
+    """
+    One-sided permutation test on the mean: the chance that `current`, drawn at random
+    from the pooled samples, would look at least this much worse than it does. Exact
+    when there are few enough splits, otherwise MAX_PERMUTATIONS seeded random ones.
+    No distribution is assumed, which suits a handful of timings per run.
+    """
+    pooled, k = baseline + current, len(current)
+    sign = 1 if higher_is_better else -1   # Worse = lower rate, or longer load time
+    observed = sign * statistics.fmean(current)
+    if math.comb(len(pooled), k) <= MAX_PERMUTATIONS:
+        splits = list(itertools.combinations(range(len(pooled)), k))
+        worse = sum(1 for idx in splits if sign * statistics.fmean(pooled[i] for i in idx) <= observed)
+        return worse / len(splits)
+    rng = random.Random(0)
+    worse = sum(1 for _ in range(MAX_PERMUTATIONS)
+                if sign * statistics.fmean(rng.sample(pooled, k)) <= observed)
+    return (worse + 1) / (MAX_PERMUTATIONS + 1)
+
+def _value(row: dict, metric: str):
+    value = row.get(metric)
+    return value if value and not math.isnan(value) else None  # pandas stores missing values as NaN
+
+def compare_samples(baseline_rows: list[dict], current_rows: list[dict]) -> list[dict]:
+    """
+    Per metric: median change from baseline and its significance. Samples are taken
+    relative to the baseline median for the same prompt length, so prompts of
+    different lengths (with very different prefill rates) can be pooled.
+    """
+    results = []
+    for metric, (kind, higher_is_better) in CANARY_METRICS.items():
+        reference = {}
+        for row in baseline_rows:
+            if row["kind"] == kind and _value(row, metric):
+                reference.setdefault(row["prompt_tokens"], []).append(row[metric])
+        reference = {length: statistics.median(values) for length, values in reference.items()}
+
+        def ratios(rows):
+            return [row[metric] / reference[row["prompt_tokens"]] for row in rows
+                    if row["kind"] == kind and _value(row, metric) and reference.get(row["prompt_tokens"])]
+        before, after = ratios(baseline_rows), ratios(current_rows)
+        if len(before) < 2 or not after:
+            continue
+        change = statistics.median(after) - 1
+        p_value = permutation_p_value(before, after, higher_is_better)
+        worse_by = -change if higher_is_better else change
+        results.append({
+            "metric": metric, "change": round(change, 3), "p_value": round(p_value, 4),
+            "baseline": round(statistics.median(r[metric] for r in baseline_rows if r["kind"] == kind and _value(r, metric)), 2),
+            "current": round(statistics.median(r[metric] for r in current_rows if r["kind"] == kind and _value(r, metric)), 2),
+            "n_baseline": len(before), "n_current": len(after),
+            "regressed": p_value < CANARY_ALPHA and worse_by >= CANARY_MIN_CHANGE,
+        })
+    return results
+
+
+# --- Reports ---
+
+def canary_report(model: str = None, baseline_runs: int = CANARY_BASELINE_RUNS, db_path: str = PERF_DB_PATH) -> list[dict]:
+    """
+    One entry per canaried model: its latest run compared with the `baseline_runs` runs
+    before it, plus what changed in between (model digest, server version).
+    """
+    df = load_benchmarks(model=model, db_path=db_path)
+    df = df[df["kind"].isin(CANARY_KINDS)]
+    report = []
+    for model_name, model_df in df.groupby("model"):
+        runs = model_df.groupby("run_id")["ts"].max().sort_values(ascending=False).index.tolist()
+        rows_by_run = {run_id: model_df[model_df["run_id"] == run_id] for run_id in runs}
+        current_df = rows_by_run[runs[0]]
+        current = current_df[current_df["ok"] == 1].to_dict("records")
+        baseline_ids = runs[1:1 + baseline_runs]
+        baseline = [row for run_id in baseline_ids
+                    for row in rows_by_run[run_id][rows_by_run[run_id]["ok"] == 1].to_dict("records")]
+
+        latest = current_df.iloc[-1]
+        entry = {"model": model_name, "ts": float(current_df["ts"].max()), "digest": latest["digest"],
+                 "server_version": latest["server_version"], "runs": len(runs), "baseline_runs": len(baseline_ids),
+                 "failed_calls": int((current_df["ok"] == 0).sum()), "changes": [], "metrics": [], "regressions": []}
+        if baseline_ids:
+            previous = rows_by_run[baseline_ids[0]].iloc[-1]
+            if previous["server_version"] != latest["server_version"]:
+                entry["changes"].append(f"server {previous['server_version'] or '?'} -> {latest['server_version'] or '?'}")
+            if previous["digest"] != latest["digest"]:
+                entry["changes"].append(f"digest {(previous['digest'] or '?')[:19]} -> {(latest['digest'] or '?')[:19]}")
+            entry["metrics"] = compare_samples(baseline, current)
+            entry["regressions"] = [m for m in entry["metrics"] if m["regressed"]]
+        report.append(entry)
+    return sorted(report, key=lambda e: (not e["regressions"], e["model"]))
+
+def describe_regression(entry: dict) -> str:
+    """One line for the dashboard and CLI, e.g. "decode tok/s -27% (p=0.004)"."""
+    parts = [f"{METRIC_LABELS[m['metric']]} {m['change']:+.0%} ({m['baseline']} -> {m['current']}, p={m['p_value']:.3f})"
+             for m in entry["regressions"]]
+    since = f" since {', '.join(entry['changes'])}" if entry["changes"] else ""
+    return "; ".join(parts) + since
+
+def due_models(models: list[str], interval_h: float = CANARY_INTERVAL_H, db_path: str = PERF_DB_PATH) -> list[str]:
+    """Models whose latest canary run is older than interval_h hours (or that never had one)."""
+    df = load_benchmarks(db_path=db_path)
+    last = df[df["kind"].isin(CANARY_KINDS)].groupby("model")["ts"].max().to_dict()
+    return [m for m in models if time.time() - last.get(m, 0) >= interval_h * 3600]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Model throughput canary: detect slowdowns across Ollama upgrades.")
+    sub = parser.add_subparsers(dest="command", required=True)
+    run = sub.add_parser("run", help="Run the canary now (or, with --every, on a schedule)")
+    run.add_argument("--model", nargs="*", help="Models to check (default: every installed model)")
+    run.add_argument("--every", type=float, nargs="?", const=CANARY_INTERVAL_H, metavar="HOURS",
+                     help=f"Keep running, re-checking each model every HOURS (default {CANARY_INTERVAL_H})")
+    status = sub.add_parser("status", help="Compare each model's latest run with its baseline")
+    status.add_argument("--model", help="Only this model")
+    args = parser.parse_args()
+
+    if args.command == "run":
+        while True:
+            # Re-read the model list each pass: tags re-pulled or added with the ollama CLI
+            # must be canaried with their current digest
+            get_registry().invalidate()
+            models = args.model or get_registry().model_names()
+            for model_name in (due_models(models, args.every) if args.every else models):
+                log.info(f"Canary run for {model_name}")
+                run_canary(model_name)
+                entry = next(iter(canary_report(model_name)), None)
+                if entry and entry["regressions"]:
+                    log.warning(f"Throughput regression in {model_name}: {describe_regression(entry)}")
+            if not args.every:
+                break
+            time.sleep(600)  # Then see which models are due again
+        return
+
+    report = canary_report(args.model)
+    if not report:
+        print("No canary runs yet. Run: python -m app.canary run")
+        return
+    for entry in report:
+        when = time.strftime("%Y-%m-%d %H:%M", time.localtime(entry["ts"]))
+        print(f"{entry['model']}  (last run {when}, server {entry['server_version'] or '?'}, "
+              f"{entry['runs']} run(s){', ' + str(entry['failed_calls']) + ' failed call(s)' if entry['failed_calls'] else ''})")
+        if not entry["baseline_runs"]:
+            print("  First run: it is the baseline for the next one.")
+        for m in entry["metrics"]:
+            flag = "REGRESSION" if m["regressed"] else "ok"
+            print(f"  {METRIC_LABELS[m['metric']]:<14} {m['baseline']:>9} -> {m['current']:<9} "
+                  f"{m['change']:+7.1%}  p={m['p_value']:.3f}  {flag}")
+        if entry["changes"]:
+            print(f"  Changed since the previous run: {', '.join(entry['changes'])}")
+
+if __name__ == "__main__":
+    main()
@@ -1,9 +1,11 @@
 # app/comparator.py
+import contextvars
 import json
 import logging
 import re  # <-- NEW IMPORT
+from concurrent.futures import ThreadPoolExecutor
 from app.runner import run_ollama
-from app.comparator_prompts import PROMPT_COMPARISON_CRITIC
+from app.comparator_prompts import PROMPT_COMPARISON_CRITIC, PROMPT_QUALITY_SCORE
 from app.config import (
     MODEL_COMPARATOR,
     CAPS_COMPARISON, CAPS_CRITIQUE
@@ -20,6 +22,28 @@ def _extract_tag(text: str, tag: str) -> str:
     return ""
 # --- END HELPER FUNCTION ---
 
+_SWAP_LABEL = {"A": "B", "B": "A", "TIE": "TIE"}
+
+def _parse_judgement(report: dict) -> tuple:
+    """
+    Pulls the winner ("A", "B", "TIE" or None) and per-response scores out of a
+    parsed critique. An explicit "Winner: ..." line wins; otherwise the higher score.
+    """
+    scores = {}
+    for label, value in re.findall(r'\b([AB])\s*[:=\-]\s*(\d+(?:\.\d+)?)', report.get("scores", "")):
+        scores.setdefault(label, float(value))
+
+    verdict = report.get("verdict", "")
+    # Labels are matched case-sensitively, so the article "a" ("the winner is a close call") isn't read as A
+    match = re.search(r'(?i:winner\W+(?:is\W+)?(?:response\W+|model\W+)?)([AB]|(?i:tie))\b', verdict)
+    if match:
+        return match.group(1).upper(), scores
+    if len(scores) == 2:
+        if scores["A"] == scores["B"]:
+            return "TIE", scores
+        return ("A" if scores["A"] > scores["B"] else "B"), scores
+    return None, scores
+
 class ComparatorCoordinator:
     def __init__(self):
         log.info("ComparatorCoordinator initialized.")
@@ -46,13 +70,10 @@ class ComparatorCoordinator:
 
         return response_a, response_b
 
-    # --- THIS FUNCTION IS UPDATED ---
-    def run_critique(self, user_prompt: str, 
-                     model_a_name: str, response_a: str, metrics_a: dict,
-                     model_b_name: str, response_b: str, metrics_b: dict) -> dict:
-        
-        log.info(f"Running critic to judge {model_a_name} vs {model_b_name}")
-
+    def _run_single_critique(self, user_prompt: str,
+                             model_a_name: str, response_a: str, metrics_a: dict,
+                             model_b_name: str, response_b: str, metrics_b: dict) -> dict:
+        """Runs one critic call with the responses in the given A/B order and parses it."""
         critic_prompt = PROMPT_COMPARISON_CRITIC.format(
             user_prompt=user_prompt,
             model_a=model_a_name, response_a=response_a,
@@ -97,3 +118,73 @@ class ComparatorCoordinator:
             "raw_critique": raw_critique, 
             "metrics": metrics
         }
+
+    def run_critique(self, user_prompt: str, 
+                     model_a_name: str, response_a: str, metrics_a: dict,
+                     model_b_name: str, response_b: str, metrics_b: dict,
+                     swap_positions: bool = False) -> dict:
+        """
+        Judges response A against response B.
+
+        With swap_positions=True the critic also judges the B/A ordering. Both calls
+        are submitted at once, so with OLLAMA_NUM_PARALLEL >= 2 (for both the server and
+        the app's scheduler) the pair costs about one critic call of wall time; at 1 they
+        run one after the other. The result then carries a
+        "position_check" dict with both winners (in the original A/B labels) and a
+        "consistent" flag that is False when the verdict flipped with the order.
+        """
+        log.info(f"Running critic to judge {model_a_name} vs {model_b_name} (swap_positions={swap_positions})")
+        
+        if not swap_positions:
+            return self._run_single_critique(
+                user_prompt, model_a_name, response_a, metrics_a, model_b_name, response_b, metrics_b
+            )
+
+        # Each call runs in a copy of the caller's context, so its request_context() priority
+        # and session (e.g. batch for BatchEvaluator) apply to both critic calls
+        with ThreadPoolExecutor(max_workers=2) as pool:
+            future_ab = pool.submit(contextvars.copy_context().run, self._run_single_critique, user_prompt,
+                                    model_a_name, response_a, metrics_a, model_b_name, response_b, metrics_b)
+            future_ba = pool.submit(contextvars.copy_context().run, self._run_single_critique, user_prompt,
+                                    model_b_name, response_b, metrics_b, model_a_name, response_a, metrics_a)
+            result_ab, result_ba = future_ab.result(), future_ba.result()
+
+        winner_ab, scores_ab = _parse_judgement(result_ab["critique_report"])
+        winner_ba, scores_ba = _parse_judgement(result_ba["critique_report"])
+        # Map the swapped run back onto the original labels
+        winner_ba = _SWAP_LABEL.get(winner_ba, winner_ba)
+        scores_ba = {_SWAP_LABEL[label]: score for label, score in scores_ba.items()}
+
+        consistent = None
+        if winner_ab and winner_ba:
+            consistent = winner_ab == winner_ba
+        if consistent is False:
+            log.warning(f"Position bias: critic picked {winner_ab} as A/B but {winner_ba} as B/A.")
+
+        result_ab["position_check"] = {
+            "winner_ab": winner_ab, "winner_ba": winner_ba,
+            "scores_ab": scores_ab, "scores_ba": scores_ba,
+            "consistent": consistent,
+            "swapped_report": result_ba["critique_report"],
+            "swapped_raw": result_ba["raw_critique"],
+            "swapped_metrics": result_ba["metrics"],
+        }
+        return result_ab
+
+    def score_response(self, user_prompt: str, response: str) -> dict:
+        """
+        Has the critic rate one response on its own (1-10), so variants of a model
+        can be compared on an absolute scale. "score" is None if it couldn't be read.
+        """
+        success, raw_score, metrics, err = run_ollama(
+            model_name=MODEL_COMPARATOR,
+            prompt=PROMPT_QUALITY_SCORE.format(user_prompt=user_prompt, response=response),
+            temperature=0.0,
+            **CAPS_CRITIQUE
+        )
+        if not success:
+            return {"score": None, "reasons": f"Critic model failed to run: {err}", "metrics": metrics}
+
+        match = re.search(r'(\d+(?:\.\d+)?)', _extract_tag(raw_score, "SCORE"))
+        score = min(float(match.group(1)), 10.0) if match else None
+        return {"score": score, "reasons": _extract_tag(raw_score, "REASONS"), "metrics": metrics}
@@ -37,8 +37,38 @@ Compare the two responses. Consider the following criteria:
 4.  **Performance & Efficiency:** Was the response fast and concise? A high "Tokens per Second" is good. A low "Total Tokens" is also good (efficient).
 
 Write a one-paragraph summary explaining your decision, and then state the winner.
-**Do not use JSON.** Respond in a single, human-readable block of text.
+**Do not use JSON.** Respond using exactly these tags:
 
-**VERDICT:**
-(Your analysis here...)
+<VERDICT>
+(Your one-paragraph analysis here, ending with "Winner: Response A" or "Winner: Response B")
+</VERDICT>
+<SCORES>
+A: (1-10)
+B: (1-10)
+</SCORES>
+"""
+
+PROMPT_QUALITY_SCORE = """
+You are a helpful and impartial AI Quality Rater.
+Rate the single AI response below on a 1-10 scale.
+
+**THE USER'S PROMPT:**
+<user_prompt>
+{user_prompt}
+</user_prompt>
+
+**THE RESPONSE:**
+<response>
+{response}
+</response>
+
+Judge only instruction following, completeness, correctness and clarity. Ignore length and speed.
+Respond using exactly these tags:
+
+<REASONS>
+(One or two sentences.)
+</REASONS>
+<SCORE>
+(A single number from 1 to 10)
+</SCORE>
 """
@@ -1,4 +1,14 @@
 # app/config.py
+import os
+
+# --- Ollama Server ---
+# Uses the same OLLAMA_HOST variable as the ollama CLI (e.g. "localhost:11434" or "http://gpu-box:11434")
+_OLLAMA_HOST = os.environ.get("OLLAMA_HOST", "localhost:11434")
+if not _OLLAMA_HOST.startswith("http"):
+    _OLLAMA_HOST = f"http://{_OLLAMA_HOST}"
+if _OLLAMA_HOST.count(":") < 2:
+    _OLLAMA_HOST += ":11434"
+OLLAMA_API_BASE = _OLLAMA_HOST.rstrip("/")
 
 # --- Model Definitions ---
 # MODEL_MIKE and MODEL_JIMMY are no longer needed here.
@@ -25,3 +35,105 @@ MODEL_COMPARATOR = "critic:7b"
 
 CAPS_COMPARISON = {"num_predict": 1000, "timeout": 120} 
 CAPS_CRITIQUE = {"num_predict": 700, "timeout": 90}
+
+# --- BATCH EVALUATION (Comparator regression harness) ---
+BATCH_RESULTS_DIR = "logs/batch"
+
+# --- MODEL REGISTRY ---
+MODEL_LIST_TTL_S = 60  # Re-read /api/tags this often, so models pulled with the ollama CLI show up
+MODEL_LIST_RETRY_S = 10  # After a failed read, keep the last good list this long before trying again
+
+# --- MODEL PULLS ---
+PULL_MAX_CONCURRENT = 2  # Downloads beyond this wait in the pull queue
+
+# --- MEMORY ESTIMATES ---
+DEFAULT_NUM_CTX = 2048  # Ollama's default context window when a request doesn't set num_ctx
+MEMORY_CHECK_TTL_S = 30  # The Debate App re-checks whether its models fit at most this often
+
+# --- HARDWARE BENCHMARKS ---
+PERF_DB_PATH = "logs/perf.db"
+BENCHMARK_PROMPT_LENGTHS = (128, 1024, 4096)  # Target prompt sizes in tokens
+BENCHMARK_DECODE_TOKENS = 128
+BENCHMARK_TIMEOUT = 300
+
+# --- THROUGHPUT CANARY ---
+CANARY_PROMPT_LENGTHS = (256, 2048)  # The fixed prompt set: one prompt per target length in tokens
+CANARY_DECODE_TOKENS = 128
+CANARY_REPEATS = 3          # Cold load probes and passes over the prompt set per run
+CANARY_BASELINE_RUNS = 3    # A run is compared with this many earlier runs of the same model, pooled
+CANARY_ALPHA = 0.05         # Significance level of the one-sided permutation test
+CANARY_MIN_CHANGE = 0.10    # ...and the smallest slowdown worth reporting (fraction of baseline)
+CANARY_INTERVAL_H = 24      # `python -m app.canary run --every` re-checks each model this often
+
+# --- INFERENCE-PARAMETER SWEEPS ---
+MODEL_OPTIONS_FILE = "config/model_options.json"  # Per-model option defaults saved from sweeps
+SWEEP_TIMEOUT = 300
+
+# --- TRANSCRIPT STORE ---
+TRANSCRIPT_DB_PATH = "logs/transcripts.db"
+
+# --- SEGMENTED RUN LOG ---
+LOG_SEGMENTS_DIR = "logs/segments"
+LOG_SEGMENT_MAX_BYTES = 16 * 1024 * 1024  # Rotate after 16 MiB of compressed records...
+LOG_SEGMENT_MAX_AGE_S = 7 * 86400         # ...or after a week, whichever comes first
+LOG_DICT_SIZE = 64 * 1024                 # Trained compression dictionary size
+LOG_DICT_MIN_SAMPLES = 8                  # Fewer records than this are not worth a dictionary
+
+# --- BACKGROUND JOBS ---
+JOB_MAX_WORKERS = 2      # Debate steps running at once; later ones wait in the job queue
+JOB_KEEP_FINISHED = 50   # Finished jobs (and their results) kept for the UI
+
+# --- REQUEST SCHEDULING (admission control in front of Ollama) ---
+SCHEDULER_SLOTS_PER_MODEL = None  # Concurrent calls per model; None follows OLLAMA_NUM_PARALLEL
+SCHEDULER_MAX_LOADED_MODELS = 3   # Models the server keeps loaded at once (Ollama's default)
+SCHEDULER_AGING_S = 30            # A waiting call moves up one priority class per this many seconds
+SCHEDULER_MAX_WAIT_S = 600        # Give up on a call that can't get a slot within this long
+SCHEDULER_SESSION_TTL_S = 300     # Forget an idle session's last admission after this long (10 aging steps)
+
+# --- DEBATE HISTORY RENDERING ---
+HISTORY_FULL_ROUNDS = 3         # Latest rounds rendered in full; older ones are summarized
+HISTORY_SUMMARY_PAGE_SIZE = 10  # Summarized rounds shown per page
+
+# --- USER SETTINGS ---
+SETTINGS_FILE = "config/debate_defaults.json"  # Debate App persona/model profiles
+SETTINGS_WRITE_DELAY_S = 1.0                   # Changes are written after this long without another change
+DEFAULT_PROFILE = "Default"
+
+# --- DISTRIBUTED WORKERS (python -m app.worker) ---
+WORK_QUEUE_DB_PATH = "logs/work_queue.db"
+WORKER_HEARTBEAT_S = 5   # How often a worker renews its lease on the debate it runs
+WORKER_LEASE_S = 60      # A debate whose worker is silent this long is queued again
+WORK_MAX_ATTEMPTS = 3    # ...at most this many times in all
+WORKER_POLL_S = 2        # Idle workers check the queue this often
+
+# --- AUTOPILOT (multi-round debates that stop once they settle) ---
+AUTOPILOT_MAX_ROUNDS = 5             # Exchange rounds run at most before finalizing
+AUTOPILOT_SIMILARITY = 0.7           # A side has settled when its reasoning is this similar to its last turn...
+AUTOPILOT_SIMILARITY_NO_CHANGE = 0.4 # ...or this similar and it proposes no new change ("<CHANGE>None")
+AUTOPILOT_SETTLED_ROUNDS = 1         # Stop after this many rounds in a row where both sides settled
+
+# --- TIME BUDGETS (app/planner.py) ---
+PLANNER_DEFAULT_BUDGET_S = 300       # "Timed Debate" default: whole debate, critic included
+PLANNER_MIN_NUM_PREDICT = 120        # Never cut a reply shorter than this (the XML answer would be truncated)
+PLANNER_TIMEOUT_HEADROOM = 2.0       # Timeout = this x the call's planned time...
+PLANNER_MIN_TIMEOUT_S = 15           # ...but never less than this
+PLANNER_HISTORY_CALLS = 100          # Recent stored calls per model used to measure its speed
+PLANNER_DEFAULT_TOKENS_PER_S = 15.0  # Assumed for models with no stored calls or benchmarks
+PLANNER_DEFAULT_OVERHEAD_S = 2.0     # Assumed load + prompt time per call for such models
+
+# --- ADAPTIVE CAPS (app/adaptive_caps.py) ---
+# Debate caps per model and phase, learned from recorded calls in place of the fixed CAPS_* above:
+# num_predict = p95 reply length x headroom (never above the phase's CAPS_* value), and
+# timeout = time to write that many tokens at the model's slow-end speed x headroom.
+ADAPTIVE_CAPS_ENABLED = True
+ADAPTIVE_CAPS_WINDOW = 100         # Recent calls per model and phase that count
+ADAPTIVE_CAPS_MIN_SAMPLES = 10     # Fewer successful calls than this: the CAPS_* default is used
+ADAPTIVE_CAPS_PERCENTILE = 95
+ADAPTIVE_CAPS_HEADROOM = 1.25
+ADAPTIVE_CAPS_MIN_NUM_PREDICT = 120
+ADAPTIVE_CAPS_MIN_TIMEOUT_S = 20
+ADAPTIVE_CAPS_MAX_TIMEOUT_S = 300
+# Fixed caps that win over learned ones, per model and phase ("*" = every phase). Phases:
+# baseline, exchange, final, repair, critic (verdict) and audit (hallucination scan). E.g.
+# {"llama3:70b": {"*": {"timeout": 240}}, "gemma:2b": {"exchange": {"num_predict": 300}}}
+CAPS_OVERRIDES = {}
@@ -0,0 +1,60 @@
+# app/convergence.py
+import re
+from typing import Optional
+
+from app.config import AUTOPILOT_SIMILARITY, AUTOPILOT_SIMILARITY_NO_CHANGE
+from app.transcript import Round, TurnOutput
+
+# Words that carry no argument; left out so "the"/"and" don't make every turn look alike
+_STOPWORDS = frozenset("""
+a an and are as at be but by can for from has have if in into is it its it's of on or so that the their
+them then there these they this to was we were will with would you your i my our not no more than
+""".split())
+_NO_CHANGE = re.compile(r"^[\s\-*•]*(none|n/?a|no change|nothing new)[\s.!]*$", re.IGNORECASE)
+
+
+def _terms(text: str) -> set[str]:
+    return {w for w in re.findall(r"[a-z0-9']+", text.lower()) if len(w) > 2 and w not in _STOPWORDS}
+
+def reasoning_similarity(a: str, b: str) -> float:
+    """
+    Lexical overlap (Jaccard of content words) of two arguments, 0..1.
+    Cheap enough to run after every round; two empty texts count as unrelated.
+    """
+    terms_a, terms_b = _terms(a), _terms(b)
+    if not terms_a or not terms_b:
+        return 0.0
+    return len(terms_a & terms_b) / len(terms_a | terms_b)
+
+def proposes_change(change: str) -> Optional[bool]:
+    """
+    True if a turn's <CHANGE> tag names something new, False if it explicitly says
+    "None" (or n/a, no change). None if the tag is missing or empty: <CHANGE> isn't
+    repaired, so a dropped tag says nothing either way.
+    """
+    if not re.sub(r"[\s\-*•.!]", "", change or ""):
+        return None
+    return not _NO_CHANGE.match(change)
+
+def turn_settled(previous: TurnOutput, current: TurnOutput,
+                 threshold: float = AUTOPILOT_SIMILARITY,
+                 no_change_threshold: float = AUTOPILOT_SIMILARITY_NO_CHANGE) -> tuple[bool, float]:
+    """(settled, similarity) for one side: has its argument stopped moving since its last turn?"""
+    if previous.error or current.error:
+        return False, 0.0
+    similarity = reasoning_similarity(previous.reasoning, current.reasoning)
+    if similarity >= threshold:
+        return True, similarity
+    # The looser threshold needs an explicit "no change"; an unknown one only settles at threshold
+    return (proposes_change(current.change) is False and similarity >= no_change_threshold), similarity
+
+def round_convergence(previous: Round, current: Round, **thresholds) -> dict:
+    """How much each side moved between two rounds, and whether both have settled."""
+    pro_settled, pro_similarity = turn_settled(previous.mike_output, current.mike_output, **thresholds)
+    con_settled, con_similarity = turn_settled(previous.jimmy_output, current.jimmy_output, **thresholds)
+    return {
+        "round": current.round,
+        "pro_similarity": round(pro_similarity, 3), "pro_change": proposes_change(current.mike_output.change),
+        "con_similarity": round(con_similarity, 3), "con_change": proposes_change(current.jimmy_output.change),
+        "settled": pro_settled and con_settled,
+    }
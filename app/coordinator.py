@@ -10,9 +10,15 @@ from app.prompts import (
 )
 from app.config import (
     MODEL_CRITIC, TEMP_CRITIC,
-    CAPS_WARMUP, CAPS_BASELINE, CAPS_EXCHANGE, CAPS_FINALIZE, CAPS_REPAIR
+    CAPS_WARMUP, AUTOPILOT_MAX_ROUNDS, AUTOPILOT_SETTLED_ROUNDS
 )
+from app.adaptive_caps import get_adaptive_caps, caps_for
+from app.convergence import round_convergence
+from app.planner import DebatePlanner
 from app.critic import run_all_critic_audits
+from app.transcript import Transcript, TurnOutput, FinalOutput, Round, Finals
+from app.transcript_store import get_transcript_store
+from app.log_store import get_log_store
 
 log = logging.getLogger(__name__)
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
@@ -63,7 +69,8 @@ class DebateCoordinator:
     def _run_model_with_repair(self, model_name: str, temperature: float, side: str,
                                prompt: str, caps: dict, 
                                required_tag: str,
-                               repair_context: dict) -> tuple[bool, str, dict, str]:
+                               repair_context: dict,
+                               phase: str = None) -> tuple[bool, str, dict, str]:
         
         success, raw_output, metrics, error = run_ollama(
             model_name=model_name,
@@ -71,10 +78,15 @@ class DebateCoordinator:
             temperature=temperature,
             **caps
         )
+        if phase:  # Teaches app/adaptive_caps.py this model's reply lengths and speed
+            get_adaptive_caps().record(model_name, phase, caps, success, metrics, error)
         
         if not success:
             return False, "", metrics, error 
 
+        # The turn keeps the first call's metrics; repair calls are listed under "repairs"
+        # and stored as their own 'repair' calls
+        repairs = []
         required_tags_to_check = []
         if required_tag == "REASONING":
             required_tags_to_check = ["REASONING", "SIDE_CONFIRM"]
@@ -92,23 +104,25 @@ class DebateCoordinator:
                     max_lines=7 if tag == "FINAL" else 5
                 )
                 
+                repair_caps = caps_for(model_name, "repair")
                 repair_success, repair_output, repair_metrics, repair_error = run_ollama(
                     model_name=model_name,
                     prompt=repair_prompt,
                     temperature=temperature,
-                    **CAPS_REPAIR
+                    **repair_caps
                 )
+                get_adaptive_caps().record(model_name, "repair", repair_caps, repair_success,
+                                           repair_metrics, repair_error)
+                repairs.append({**repair_metrics, "error": repair_error or None})
                 
                 if repair_success:
                     log.info(f"Repair successful for <{tag}>.")
                     raw_output += f"\n\n\n{repair_output}"
-                    repair_metrics["time_load_s"] += metrics.get("time_load_s", 0)
-                    metrics = repair_metrics
                 else:
                     log.error(f"Repair failed for {model_name}: {repair_error}")
-                    return True, raw_output, metrics, f"Original run OK, but repair for <{tag}> failed."
+                    return True, raw_output, {**metrics, "repairs": repairs}, f"Original run OK, but repair for <{tag}> failed."
 
-        return True, raw_output, metrics, ""
+        return True, raw_output, {**metrics, "repairs": repairs} if repairs else metrics, ""
 
     def warm_up_models(self, model_pro: str, model_con: str) -> dict:
         log.info(f"Warming up models: {model_pro}, {model_con}, {self.critic_model['name']}")
@@ -133,8 +147,9 @@ class DebateCoordinator:
 
     def generate_baselines(self, topic: str, force_adversarial: bool,
                              model_pro: str, temp_pro: float, persona_pro: str, style_pro: dict,
-                             model_con: str, temp_con: float, persona_con: str, style_con: dict
-                             ) -> tuple[dict, dict, dict, dict]:
+                             model_con: str, temp_con: float, persona_con: str, style_con: dict,
+                             caps_pro: dict = None, caps_con: dict = None
+                             ) -> tuple[TurnOutput, dict, TurnOutput, dict]:
         
         log.info(f"Generating baselines for PRO: {model_pro} and CON: {model_con}")
         
@@ -147,7 +162,7 @@ class DebateCoordinator:
         )
         success_mike, raw_mike, metrics_mike, err_mike = self._run_model_with_repair(
             model_pro, temp_pro, "PRO", prompt_mike, 
-            CAPS_BASELINE, "REASONING", {"topic": topic}
+            caps_pro or caps_for(model_pro, "baseline"), "REASONING", {"topic": topic}, "baseline"
         )
         
         prompt_jimmy = PROMPT_BASELINE.format(
@@ -156,36 +171,37 @@ class DebateCoordinator:
         )
         success_jimmy, raw_jimmy, metrics_jimmy, err_jimmy = self._run_model_with_repair(
             model_con, temp_con, "CON", prompt_jimmy, 
-            CAPS_BASELINE, "REASONING", {"topic": topic}
+            caps_con or caps_for(model_con, "baseline"), "REASONING", {"topic": topic}, "baseline"
         )
 
-        mike_output = parse_neutral_output(raw_mike, "PRO")
-        jimmy_output = parse_neutral_output(raw_jimmy, "CON")
+        mike_output = TurnOutput.from_dict(parse_neutral_output(raw_mike, "PRO"))
+        jimmy_output = TurnOutput.from_dict(parse_neutral_output(raw_jimmy, "CON"))
 
-        if not success_mike: mike_output["error"] = err_mike
-        if not success_jimmy: jimmy_output["error"] = err_jimmy
+        if not success_mike: mike_output.error = err_mike
+        if not success_jimmy: jimmy_output.error = err_jimmy
 
         return mike_output, metrics_mike, jimmy_output, metrics_jimmy
 
-    def exchange_step(self, topic: str, last_mike_output: dict, last_jimmy_output: dict, 
+    def exchange_step(self, topic: str, last_mike_output: TurnOutput, last_jimmy_output: TurnOutput, 
                         force_adversarial: bool,
                         model_pro: str, temp_pro: float, persona_pro: str, style_pro: dict,
-                        model_con: str, temp_con: float, persona_con: str, style_con: dict
-                        ) -> tuple[dict, dict, dict, dict, dict, dict]:
+                        model_con: str, temp_con: float, persona_con: str, style_con: dict,
+                        caps_pro: dict = None, caps_con: dict = None
+                        ) -> tuple[dict, TurnOutput, dict, dict, TurnOutput, dict]:
         
         log.info("Generating exchange step...")
         
         inst_pro = self._build_persona_instructions(persona_pro, style_pro, force_adversarial, "PRO")
         inst_con = self._build_persona_instructions(persona_con, style_con, force_adversarial, "CON")
 
-        capsule_mike = {"topic": topic, "my_side": "PRO", "my_last_reflection": last_mike_output.get("reflection", "N/A"), "opponent_last_reasoning": last_jimmy_output.get("reasoning", "N/A")}
+        capsule_mike = {"topic": topic, "my_side": "PRO", "my_last_reflection": last_mike_output.reflection or "N/A", "opponent_last_reasoning": last_jimmy_output.reasoning or "N/A"}
         prompt_mike = PROMPT_EXCHANGE.format(
             topic=topic, side="PRO", 
             capsule_json=json.dumps(capsule_mike, indent=2), 
             persona_instructions=inst_pro
         )
         
-        capsule_jimmy = {"topic": topic, "my_side": "CON", "my_last_reflection": last_jimmy_output.get("reflection", "N/A"), "opponent_last_reasoning": last_mike_output.get("reasoning", "N/A")}
+        capsule_jimmy = {"topic": topic, "my_side": "CON", "my_last_reflection": last_jimmy_output.reflection or "N/A", "opponent_last_reasoning": last_mike_output.reasoning or "N/A"}
         prompt_jimmy = PROMPT_EXCHANGE.format(
             topic=topic, side="CON", 
             capsule_json=json.dumps(capsule_jimmy, indent=2), 
@@ -194,36 +210,37 @@ class DebateCoordinator:
 
         success_mike, raw_mike, metrics_mike, err_mike = self._run_model_with_repair(
             model_pro, temp_pro, "PRO", prompt_mike, 
-            CAPS_EXCHANGE, "REASONING", {"topic": topic}
+            caps_pro or caps_for(model_pro, "exchange"), "REASONING", {"topic": topic}, "exchange"
         )
         
         success_jimmy, raw_jimmy, metrics_jimmy, err_jimmy = self._run_model_with_repair(
             model_con, temp_con, "CON", prompt_jimmy, 
-            CAPS_EXCHANGE, "REASONING", {"topic": topic}
+            caps_con or caps_for(model_con, "exchange"), "REASONING", {"topic": topic}, "exchange"
         )
 
-        mike_output = parse_neutral_output(raw_mike, "PRO")
-        jimmy_output = parse_neutral_output(raw_jimmy, "CON")
+        mike_output = TurnOutput.from_dict(parse_neutral_output(raw_mike, "PRO"))
+        jimmy_output = TurnOutput.from_dict(parse_neutral_output(raw_jimmy, "CON"))
         
-        if not success_mike: mike_output["error"] = err_mike
-        if not success_jimmy: jimmy_output["error"] = err_jimmy
+        if not success_mike: mike_output.error = err_mike
+        if not success_jimmy: jimmy_output.error = err_jimmy
 
         return capsule_mike, mike_output, metrics_mike, capsule_jimmy, jimmy_output, metrics_jimmy
 
-    def finalize_debate(self, topic: str, debate_history: list, 
+    def finalize_debate(self, topic: str, debate_history: list[Round], 
                           persona_pro: str, model_pro: str, temp_pro: float, style_pro: dict,
-                          persona_con: str, model_con: str, temp_con: float, style_con: dict
-                          ) -> tuple[dict, dict, dict, dict]:
+                          persona_con: str, model_con: str, temp_con: float, style_con: dict,
+                          caps_pro: dict = None, caps_con: dict = None
+                          ) -> tuple[FinalOutput, dict, FinalOutput, dict]:
         
         log.info("Generating final statements...")
         
         inst_pro = self._build_persona_instructions(persona_pro, style_pro, force_adversarial=True, side="PRO")
         inst_con = self._build_persona_instructions(persona_con, style_con, force_adversarial=True, side="CON")
         
-        summary = [f"PRO (Baseline): {debate_history[0]['mike_output']['reasoning']}", f"CON (Baseline): {debate_history[0]['jimmy_output']['reasoning']}"]
+        summary = [f"PRO (Baseline): {debate_history[0].mike_output.reasoning}", f"CON (Baseline): {debate_history[0].jimmy_output.reasoning}"]
         for i, round_data in enumerate(debate_history[1:], start=1):
-            summary.append(f"PRO (Round {i}): {round_data['mike_output']['reasoning']}")
-            summary.append(f"CON (Round {i}): {round_data['jimmy_output']['reasoning']}")
+            summary.append(f"PRO (Round {i}): {round_data.mike_output.reasoning}")
+            summary.append(f"CON (Round {i}): {round_data.jimmy_output.reasoning}")
         summary_json = json.dumps(summary, indent=2)
 
         prompt_mike = PROMPT_FINALIZE.format(
@@ -233,7 +250,7 @@ class DebateCoordinator:
         )
         success_mike, raw_mike, metrics_mike, err_mike = self._run_model_with_repair(
             model_pro, temp_pro, "PRO", prompt_mike, 
-            CAPS_FINALIZE, "FINAL", {"topic": topic}
+            caps_pro or caps_for(model_pro, "final"), "FINAL", {"topic": topic}, "final"
         )
 
         prompt_jimmy = PROMPT_FINALIZE.format(
@@ -244,30 +261,34 @@ class DebateCoordinator:
         
         success_jimmy, raw_jimmy, metrics_jimmy, err_jimmy = self._run_model_with_repair(
             model_con, temp_con, "CON", prompt_jimmy, 
-            CAPS_FINALIZE, "FINAL", {"topic": topic}
+            caps_con or caps_for(model_con, "final"), "FINAL", {"topic": topic}, "final"
         )
         
-        mike_final = parse_final_output(raw_mike, "PRO")
-        jimmy_final = parse_final_output(raw_jimmy, "CON")
+        mike_final = FinalOutput.from_dict(parse_final_output(raw_mike, "PRO"))
+        jimmy_final = FinalOutput.from_dict(parse_final_output(raw_jimmy, "CON"))
 
-        if not success_mike: mike_final["error"] = err_mike
-        if not success_jimmy: jimmy_final["error"] = err_jimmy
+        if not success_mike: mike_final.error = err_mike
+        if not success_jimmy: jimmy_final.error = err_jimmy
         
         return mike_final, metrics_mike, jimmy_final, metrics_jimmy
 
-    def run_critic(self, transcript: dict) -> dict:
+    def run_critic(self, transcript: Transcript, critic_caps: dict = None) -> dict:
+        """Scores the finished debate, attaches the report to the transcript and stores it."""
+        report = self.score_debate(transcript, critic_caps)
+        self.save_transcript(transcript)
+        return report
+
+    def score_debate(self, transcript: Transcript, critic_caps: dict = None) -> dict:
+        """
+        Runs the critic audits and attaches the report to the transcript without storing it.
+        critic_caps optionally overrides the caps of the "verdict" and "audit" calls.
+        """
+        critic_caps = critic_caps or {}
         log.info("Calculating drift scores and running critic audits...")
-        pro_mismatches, con_mismatches = 0, 0
-        
-        for round_data in transcript.get("history", []):
-            if round_data.get("mike_output", {}).get("side_mismatch", False): pro_mismatches += 1
-            if round_data.get("jimmy_output", {}).get("side_mismatch", False): con_mismatches += 1
-        if transcript.get("finals", {}).get("mike", {}).get("side_mismatch", False): pro_mismatches += 1
-        if transcript.get("finals", {}).get("jimmy", {}).get("side_mismatch", False): con_mismatches += 1
-            
+        pro_mismatches, con_mismatches = transcript.side_mismatch_counts()
         log.info(f"Pre-calculated drift: PRO={pro_mismatches}, CON={con_mismatches}")
 
-        config = transcript.get("debate_config", {})
+        config = transcript.debate_config
         model_pro_name = config.get("model_pro", "PRO")
         model_con_name = config.get("model_con", "CON")
 
@@ -277,10 +298,188 @@ class DebateCoordinator:
                 pro_mismatches=pro_mismatches, 
                 con_mismatches=con_mismatches,
                 model_pro_name=model_pro_name,
-                model_con_name=model_con_name
+                model_con_name=model_con_name,
+                verdict_caps=critic_caps.get("verdict"),
+                audit_caps=critic_caps.get("audit")
             )
             log.info("Critic audit complete.")
-            return report
         except Exception as e:
             log.error(f"Critic run failed: {e}")
-            return {"error": str(e), "details": "Critic execution failed."}
+            report = {"error": str(e), "details": "Critic execution failed."}
+
+        transcript.set_critic_report(report)
+        return report
+
+    def save_transcript(self, transcript: Transcript):
+        """
+        Stores the finished debate in the transcript store and appends the full
+        record to the run log. A storage failure never costs the user the report.
+        """
+        try:
+            get_transcript_store().save_debate(transcript)
+        except Exception as e:
+            log.error(f"Failed to store transcript {transcript.debate_id}: {e}")
+        try:
+            get_log_store().append_json(transcript.to_json(), transcript.debate_id, transcript.ts)
+        except Exception as e:
+            log.error(f"Failed to log transcript {transcript.debate_id}: {e}")
+
+    # --- Whole debate steps (run as background jobs, see app/jobs.py) ---
+
+    @staticmethod
+    def _side_args(config: dict) -> tuple:
+        """The per-side arguments of generate_baselines/exchange_step, read from a debate config."""
+        return (
+            config["model_pro"], config["temp_pro"], config["persona_pro"], config["style_pro"],
+            config["model_con"], config["temp_con"], config["persona_con"], config["style_con"],
+        )
+
+    def run_baseline_round(self, transcript: Transcript, warm_up: bool = False, progress=None,
+                           caps_pro: dict = None, caps_con: dict = None):
+        """
+        Generates round 0 into an empty transcript, warming the models up first if asked.
+        progress is an optional callable taking a status message. Raises if warm-up fails.
+        caps_pro/caps_con override the phase's default generation caps (see app/planner.py).
+        """
+        progress = progress or (lambda message: None)
+        config = transcript.debate_config
+        if warm_up:
+            progress("Warming up models (one-time)...")
+            results = self.warm_up_models(config["model_pro"], config["model_con"])
+            failed = {role: res for role, res in results.items() if "FAIL" in res}
+            if failed:
+                raise RuntimeError("; ".join(f"Failed to warm up {role}: {res}" for role, res in failed.items()))
+
+        progress("Generating baselines...")
+        mike_base, metrics_mike, jimmy_base, metrics_jimmy = self.generate_baselines(
+            transcript.topic, config["force_adversarial"], *self._side_args(config),
+            caps_pro=caps_pro, caps_con=caps_con
+        )
+        transcript.add_round(Round(
+            round=0,
+            mike_capsule={"topic": transcript.topic, "my_side": "PRO"},
+            mike_output=mike_base, mike_metrics=metrics_mike,
+            jimmy_capsule={"topic": transcript.topic, "my_side": "CON"},
+            jimmy_output=jimmy_base, jimmy_metrics=metrics_jimmy
+        ))
+        progress("Baselines generated!")
+
+    def run_exchange_round(self, transcript: Transcript, progress=None,
+                           caps_pro: dict = None, caps_con: dict = None):
+        """Appends one exchange round answering the transcript's last round."""
+        progress = progress or (lambda message: None)
+        config = transcript.debate_config
+        last_round = transcript.history[-1]
+        progress(f"Running exchange round {len(transcript.history)}...")
+        capsule_mike, mike_output, metrics_mike, capsule_jimmy, jimmy_output, metrics_jimmy = self.exchange_step(
+            transcript.topic, last_round.mike_output, last_round.jimmy_output,
+            config["force_adversarial"], *self._side_args(config),
+            caps_pro=caps_pro, caps_con=caps_con
+        )
+        transcript.add_round(Round(
+            round=len(transcript.history),
+            mike_capsule=capsule_mike,
+            mike_output=mike_output, mike_metrics=metrics_mike,
+            jimmy_capsule=capsule_jimmy,
+            jimmy_output=jimmy_output, jimmy_metrics=metrics_jimmy
+        ))
+        progress(f"Round {len(transcript.history) - 1} complete!")
+
+    def run_finale(self, transcript: Transcript, progress=None) -> dict:
+        """Generates the closing statements, then scores and stores the debate. Returns the critic report."""
+        progress = progress or (lambda message: None)
+        self.run_finals(transcript, progress=progress)
+        progress("Running critic audits...")
+        report = self.run_critic(transcript)
+        progress("Debate finalized and scored!")
+        return report
+
+    def run_finals(self, transcript: Transcript, progress=None, caps_pro: dict = None, caps_con: dict = None):
+        """Generates both closing statements into the transcript."""
+        progress = progress or (lambda message: None)
+        config = transcript.debate_config
+        model_pro, temp_pro, persona_pro, style_pro, model_con, temp_con, persona_con, style_con = self._side_args(config)
+        transcript.set_finals(None)
+
+        progress("Generating final statements...")
+        mike_final, metrics_mike, jimmy_final, metrics_jimmy = self.finalize_debate(
+            transcript.topic, transcript.history,
+            persona_pro, model_pro, temp_pro, style_pro,
+            persona_con, model_con, temp_con, style_con,
+            caps_pro=caps_pro, caps_con=caps_con
+        )
+        transcript.set_finals(Finals(
+            mike=mike_final, mike_metrics=metrics_mike,
+            jimmy=jimmy_final, jimmy_metrics=metrics_jimmy
+        ))
+
+    def run_autopilot(self, transcript: Transcript, max_rounds: int = AUTOPILOT_MAX_ROUNDS,
+                      settled_rounds: int = AUTOPILOT_SETTLED_ROUNDS, finalize: bool = True,
+                      progress=None) -> dict:
+        """
+        Runs up to max_rounds exchange rounds on a debate that has its baselines, stopping
+        early once both sides' arguments stop moving for settled_rounds rounds in a row
+        (see app/convergence.py), then finalizes and scores it.
+
+        Returns a summary (rounds run and saved, why it stopped, per-round similarity),
+        also recorded in the debate config as "autopilot" so exports and the store keep it.
+        """
+        progress = progress or (lambda message: None)
+        if not transcript.history:
+            raise ValueError("Autopilot needs the baselines first")
+        rounds, streak, reason = [], 0, "max_rounds"
+        for i in range(1, max_rounds + 1):
+            progress(f"Autopilot: round {i} of up to {max_rounds}...")
+            self.run_exchange_round(transcript)
+            convergence = round_convergence(transcript.history[-2], transcript.history[-1])
+            rounds.append(convergence)
+            log.info(f"Autopilot round {convergence['round']}: similarity PRO {convergence['pro_similarity']:.2f}, "
+                     f"CON {convergence['con_similarity']:.2f}, settled={convergence['settled']}")
+            streak = streak + 1 if convergence["settled"] else 0
+            if streak >= settled_rounds and i < max_rounds:
+                reason = "converged"
+                break
+
+        summary = {
+            "max_rounds": max_rounds, "rounds_run": len(rounds), "rounds_saved": max_rounds - len(rounds),
+            "stopped": reason, "rounds": rounds,
+        }
+        log.info(f"Autopilot ran {summary['rounds_run']}/{max_rounds} rounds ({reason}), "
+                 f"saving {summary['rounds_saved']}")
+        transcript.set_config({**transcript.debate_config, "autopilot": dict(summary)})
+        if finalize:
+            summary["report"] = self.run_finale(transcript, progress=progress)
+        progress(f"Autopilot done: {summary['rounds_run']} round(s) run, {summary['rounds_saved']} saved")
+        return summary
+
+    def run_timed(self, transcript: Transcript, budget_s: float, rounds: int, warm_up: bool = False,
+                  progress=None) -> dict:
+        """
+        Runs a whole debate (baselines, up to `rounds` exchange rounds, finals and critic) into an
+        empty transcript within budget_s seconds, with app/planner.py choosing the caps of every
+        phase and skipping rounds when it falls behind. The plan-vs-actual report is returned
+        and recorded in the debate config as "time_plan" before the debate is stored.
+        """
+        progress = progress or (lambda message: None)
+        planner = DebatePlanner(budget_s, transcript.debate_config, rounds, self.critic_model["name"])
+        log.info(f"Timed debate: {planner.planned_s:.0f}s expected at default caps, budget {budget_s:.0f}s")
+        while (step := planner.next_step()) is not None:
+            phase, caps = step
+            progress(f"{planner.current_label} ({planner.remaining_s:.0f}s of {budget_s:.0f}s left)...")
+            if phase == "baseline":
+                self.run_baseline_round(transcript, warm_up=warm_up, caps_pro=caps["PRO"], caps_con=caps["CON"])
+            elif phase == "exchange":
+                self.run_exchange_round(transcript, caps_pro=caps["PRO"], caps_con=caps["CON"])
+            elif phase == "final":
+                self.run_finals(transcript, caps_pro=caps["PRO"], caps_con=caps["CON"])
+            else:
+                self.score_debate(transcript, critic_caps=caps)
+            planner.finish_step()
+
+        report = planner.report()
+        log.info(f"Timed debate finished in {report['actual_s']:.0f}s of {budget_s:.0f}s "
+                 f"(planned {report['planned_s']:.0f}s, {report['rounds_skipped']} round(s) skipped)")
+        transcript.set_config({**transcript.debate_config, "time_plan": report})
+        self.save_transcript(transcript)
+        progress(f"Done in {report['actual_s']:.0f}s of {budget_s:.0f}s")
+        return report
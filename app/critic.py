@@ -1,16 +1,19 @@
 # app/critic.py
 import json
 import logging
+import re
 from app.runner import run_ollama
-from app.config import MODEL_CRITIC, TEMP_CRITIC, CAPS_REPAIR, CAPS_FINALIZE
+from app.config import MODEL_CRITIC, TEMP_CRITIC
+from app.adaptive_caps import get_adaptive_caps, caps_for
 from app.parsing import robust_extract_tag 
+from app.transcript import Transcript
 
 log = logging.getLogger(__name__)
 
 # --- Critic Prompts ---
 PROMPT_HALLUCINATION_AUDIT = """
 You are an audit critic. Analyze the following debate transcript for fabricated information.
-Scan all <REASONING> and <FINAL> blocks.
+Scan every argument in the rounds and finals.
 
 [TRANSCRIPT]
 {transcript_json}
@@ -50,17 +53,19 @@ Do not use XML tags or JSON. Respond in a single, human-readable block of text.
 
 # --- Critic Execution Functions ---
 
-def _run_critic_json_audit(prompt: str) -> dict:
-    """Helper function to run a critic prompt that MUST return JSON."""
+def _run_critic_json_audit(prompt: str, caps: dict = None) -> tuple[dict, dict]:
+    """Helper function to run a critic prompt that MUST return JSON. Returns (report, call metrics)."""
+    caps = caps or caps_for(MODEL_CRITIC, "audit")
     success, raw_output, metrics, error = run_ollama(
         model_name=MODEL_CRITIC,
         prompt=prompt,
         temperature=TEMP_CRITIC,
-        **CAPS_REPAIR 
+        **caps
     )
+    get_adaptive_caps().record(MODEL_CRITIC, "audit", caps, success, metrics, error)
     
     if not success:
-        return {"error": "Failed to run critic model", "details": error}
+        return {"error": "Failed to run critic model", "details": error}, metrics
 
     try:
         if "```json" in raw_output:
@@ -69,28 +74,31 @@ def _run_critic_json_audit(prompt: str) -> dict:
             raw_output = raw_output.replace("```", "")
             
         report = json.loads(raw_output)
-        return report
+        return report, metrics
     except json.JSONDecodeError:
         log.warning(f"Critic failed to produce valid JSON. Raw: {raw_output}")
-        return {"error": "Critic returned non-JSON output", "raw": raw_output}
+        return {"error": "Critic returned non-JSON output", "raw": raw_output}, metrics
 
 # --- THIS FUNCTION IS UPDATED ---
-def _run_critic_verdict_audit(transcript: dict, model_pro_name: str, model_con_name: str) -> dict:
+def _run_critic_verdict_audit(transcript: Transcript, model_pro_name: str, model_con_name: str,
+                              caps: dict = None) -> dict:
     """Helper function to run the free-text 'verdict' prompt."""
     prompt = PROMPT_VERDICT.format(
-        topic=transcript.get("topic", "No Topic"),
-        mike_final=transcript.get("finals", {}).get("mike", {}).get("final", "No argument"),
-        jimmy_final=transcript.get("finals", {}).get("jimmy", {}).get("final", "No argument"),
+        topic=transcript.topic or "No Topic",
+        mike_final=(transcript.finals and transcript.finals.mike.final) or "No argument",
+        jimmy_final=(transcript.finals and transcript.finals.jimmy.final) or "No argument",
         model_pro_name=model_pro_name,
         model_con_name=model_con_name
     )
     
+    caps = caps or caps_for(MODEL_CRITIC, "critic")
     success, raw_output, metrics, err = run_ollama(
         model_name=MODEL_CRITIC,
         prompt=prompt,
         temperature=TEMP_CRITIC,
-        **CAPS_FINALIZE 
+        **caps
     )
+    get_adaptive_caps().record(MODEL_CRITIC, "critic", caps, success, metrics, err)
     
     if not success:
         return {"verdict": f"Critic failed to render a verdict: {err}", "metrics": metrics}
@@ -101,19 +109,22 @@ def _run_critic_verdict_audit(transcript: dict, model_pro_name: str, model_con_n
     return {"verdict": raw_output, "metrics": metrics}
 
 # --- THIS FUNCTION IS UPDATED ---
-def run_all_critic_audits(transcript: dict, pro_mismatches: int, con_mismatches: int, 
-                            model_pro_name: str, model_con_name: str) -> dict:
+def run_all_critic_audits(transcript: Transcript, pro_mismatches: int, con_mismatches: int, 
+                            model_pro_name: str, model_con_name: str,
+                            verdict_caps: dict = None, audit_caps: dict = None) -> dict:
     """
     Runs the full suite of critic audits on a completed debate transcript.
+    The hallucination audit only sees the arguments, not raw outputs or metrics.
+    verdict_caps/audit_caps override the default generation caps of the two critic calls.
     """
-    transcript_json = json.dumps(transcript, indent=2)
+    transcript_json = json.dumps(transcript.arguments_only(), indent=2, ensure_ascii=False)
     
     log.info("Running critic: Verdict...")
-    verdict_report = _run_critic_verdict_audit(transcript, model_pro_name, model_con_name)
+    verdict_report = _run_critic_verdict_audit(transcript, model_pro_name, model_con_name, verdict_caps)
 
     log.info("Running critic: Hallucination Audit...")
     hallucination_prompt = PROMPT_HALLUCINATION_AUDIT.format(transcript_json=transcript_json)
-    hallucination_report = _run_critic_json_audit(hallucination_prompt)
+    hallucination_report, audit_metrics = _run_critic_json_audit(hallucination_prompt, audit_caps)
     
     final_report = {
         "verdict": verdict_report.get("verdict", "Critic failed."),
@@ -122,7 +133,8 @@ def run_all_critic_audits(transcript: dict, pro_mismatches: int, con_mismatches:
             "total_pro_mismatches": pro_mismatches,
             "total_con_mismatches": con_mismatches
         },
-        "hallucination_audit": hallucination_report
+        "hallucination_audit": hallucination_report,
+        "audit_metrics": audit_metrics,
     }
     
     return final_report
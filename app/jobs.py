@@ -0,0 +1,181 @@
+# app/jobs.py
+import contextvars
+import logging
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+from app.config import JOB_MAX_WORKERS, JOB_KEEP_FINISHED
+
+log = logging.getLogger(__name__)
+
+ACTIVE_STATES = ("queued", "running")
+
+
+class Job:
+    """
+    Handle to one piece of background work. The worker thread reports progress
+    through progress(); pages read status, events and result without blocking.
+    """
+    def __init__(self, kind: str, label: str, owner: str = None, ref: str = None):
+        self.id = uuid.uuid4().hex[:12]
+        self.kind = kind            # e.g. "baselines", "exchange", "finalize"
+        self.label = label
+        self.owner = owner          # Session that submitted the job, None for shared jobs
+        self.ref = ref              # What the job works on, e.g. a debate id
+        self.state = "queued"       # queued -> running -> done | error | cancelled
+        self.status = "Waiting for a free worker..."
+        self.events = []            # (timestamp, message), oldest first
+        self.result = None
+        self.error = ""
+        self.created_at = time.time()
+        self.started_at = None
+        self.finished_at = None
+        self._lock = threading.Lock()
+        self._listeners = []
+
+    # --- Updates (worker thread) ---
+
+    def progress(self, message: str):
+        """Records a progress message and forwards it to subscribers."""
+        with self._lock:
+            self.status = message
+            self.events.append((time.time(), message))
+            listeners = list(self._listeners)
+        for listener in listeners:
+            try:
+                listener(self, message)
+            except Exception as e:
+                log.error(f"Job {self.id} listener failed: {e}")
+
+    # --- Read-only views (UI thread) ---
+
+    @property
+    def is_active(self) -> bool:
+        return self.state in ACTIVE_STATES
+
+    @property
+    def elapsed_s(self) -> float:
+        if not self.started_at:
+            return 0.0
+        return (self.finished_at or time.time()) - self.started_at
+
+    def subscribe(self, listener):
+        """Calls listener(job, message) on every later progress message, from the worker thread."""
+        with self._lock:
+            self._listeners.append(listener)
+
+    def events_since(self, index: int) -> list:
+        """Progress events after the first index ones, for incremental polling."""
+        with self._lock:
+            return self.events[index:]
+
+
+class JobManager:
+    """
+    Process-wide worker pool for long model pipelines.
+
+    Up to JOB_MAX_WORKERS jobs run at once; the rest wait in the queue. Jobs live
+    in this process, not in a Streamlit session, so they keep running (and keep
+    their results) across reruns, page switches and closed tabs.
+    """
+    def __init__(self, max_workers: int = JOB_MAX_WORKERS, keep_finished: int = JOB_KEEP_FINISHED):
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="job")
+        self._jobs = {}
+        self._keep_finished = keep_finished
+        self._lock = threading.Lock()
+
+    def submit(self, kind: str, label: str, func, *args, owner: str = None, ref: str = None, **kwargs) -> Job:
+        """
+        Queues func(*args, progress=job.progress, **kwargs). Its return value becomes
+        job.result; an exception marks the job as failed with the message as job.error.
+        The job runs in a copy of the caller's context, so e.g. the scheduler's
+        request_context() set around submit() applies to its model calls.
+
+        Only one job works on a ref at a time: if one is still queued or running,
+        it is returned instead and func is not queued.
+        """
+        job = Job(kind, label, owner=owner, ref=ref)
+        with self._lock:
+            existing = ref is not None and next(
+                (other for other in self._jobs.values() if other.ref == ref and other.is_active), None)
+            if existing:
+                log.info(f"Not queueing {kind} for {ref}: job {existing.id} ({existing.kind}) is still active")
+                return existing
+            self._jobs[job.id] = job
+            self._prune_locked()
+        context = contextvars.copy_context()
+        self._executor.submit(context.run, self._run, job, func, args, kwargs)
+        log.info(f"Queued job {job.id} ({kind}): {label}")
+        return job
+
+    def get(self, job_id: str) -> Job:
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def jobs(self, owner: str = None) -> list[Job]:
+        """All known jobs, oldest first, optionally only those of one session."""
+        with self._lock:
+            jobs = [job for job in self._jobs.values() if owner is None or job.owner == owner]
+        return sorted(jobs, key=lambda job: job.created_at)
+
+    def active_jobs(self, owner: str = None) -> list[Job]:
+        return [job for job in self.jobs(owner) if job.is_active]
+
+    def active_job_for(self, ref: str) -> Job:
+        """The queued or running job working on ref, if any."""
+        return next((job for job in self.active_jobs() if job.ref == ref), None)
+
+    def cancel(self, job_id: str) -> bool:
+        """Cancels a job that hasn't started yet. A running model call can't be interrupted."""
+        job = self.get(job_id)
+        if not job:
+            return False
+        # Compare-and-set under the job lock: _run claims a queued job under the same lock
+        with job._lock:
+            if job.state != "queued":
+                return False
+            job.state = "cancelled"
+            job.status = "Cancelled"
+            job.finished_at = time.time()
+        return True
+
+    def clear_finished(self, owner: str = None):
+        with self._lock:
+            self._jobs = {job_id: job for job_id, job in self._jobs.items()
+                          if job.is_active or (owner is not None and job.owner != owner)}
+
+    def _prune_locked(self):
+        finished = sorted((job for job in self._jobs.values() if not job.is_active), key=lambda job: job.created_at)
+        for job in finished[:max(0, len(finished) - self._keep_finished)]:
+            del self._jobs[job.id]
+
+    def _run(self, job: Job, func, args, kwargs):
+        with job._lock:
+            if job.state != "queued":  # Cancelled while waiting for a worker
+                return
+            job.state = "running"
+            job.started_at = time.time()
+        try:
+            job.result = func(*args, progress=job.progress, **kwargs)
+            job.state = "done"
+            log.info(f"Job {job.id} ({job.kind}) finished in {job.elapsed_s:.1f}s")
+        except Exception as e:
+            job.error = str(e) or type(e).__name__
+            job.state = "error"
+            log.error(f"Job {job.id} ({job.kind}) failed: {job.error}")
+        job.finished_at = time.time()
+        job.progress("Done" if job.state == "done" else f"Failed: {job.error}")
+
+
+_JOB_MANAGER = None
+_JOB_MANAGER_LOCK = threading.Lock()
+
+def get_job_manager() -> JobManager:
+    """Returns the single job manager shared by every page and session in this process."""
+    global _JOB_MANAGER
+    with _JOB_MANAGER_LOCK:
+        if _JOB_MANAGER is None:
+            _JOB_MANAGER = JobManager()
+        return _JOB_MANAGER
@@ -0,0 +1,378 @@
+# app/log_store.py
+import argparse
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+import zlib
+from contextlib import contextmanager
+
+from app.config import (
+    LOG_SEGMENTS_DIR, LOG_SEGMENT_MAX_BYTES, LOG_SEGMENT_MAX_AGE_S,
+    LOG_DICT_SIZE, LOG_DICT_MIN_SAMPLES
+)
+
+try:
+    import zstandard
+except ImportError:  # Optional: falls back to zlib with a preset dictionary
+    zstandard = None
+
+try:
+    import fcntl
+except ImportError:  # Windows: appends are serialized within one process only
+    fcntl = None
+
+log = logging.getLogger(__name__)
+
+CODEC = "zstd" if zstandard else "zlib"
+_ZLIB_WINDOW = 32 * 1024  # zlib only looks back 32 KiB, so a longer preset dictionary is wasted
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS segments (
+    segment   INTEGER PRIMARY KEY,
+    created   REAL NOT NULL,
+    codec     TEXT NOT NULL,
+    dict_id   INTEGER NOT NULL,          -- 0 = no dictionary
+    closed    INTEGER NOT NULL DEFAULT 0
+);
+CREATE TABLE IF NOT EXISTS records (
+    session_id TEXT,
+    ts         REAL NOT NULL,
+    segment    INTEGER NOT NULL,
+    offset     INTEGER NOT NULL,
+    length     INTEGER NOT NULL,         -- Compressed frame size
+    raw_length INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_records_session ON records (session_id);
+CREATE INDEX IF NOT EXISTS idx_records_ts ON records (ts);
+CREATE TABLE IF NOT EXISTS dictionaries (
+    dict_id INTEGER PRIMARY KEY,
+    codec   TEXT NOT NULL,
+    created REAL NOT NULL,
+    data    BLOB NOT NULL
+);
+"""
+
+
+class _Codec:
+    """Compresses single records as independent frames, optionally with a shared dictionary."""
+    def __init__(self, codec: str, dictionary: bytes = b""):
+        self.codec = codec
+        self.dictionary = dictionary
+        if codec == "zstd":
+            if not zstandard:
+                raise RuntimeError("This log segment is zstd-compressed but 'zstandard' is not installed.")
+            zdict = zstandard.ZstdCompressionDict(dictionary) if dictionary else None
+            self._compressor = zstandard.ZstdCompressor(level=9, dict_data=zdict)
+            self._decompressor = zstandard.ZstdDecompressor(dict_data=zdict)
+
+    def compress(self, data: bytes) -> bytes:
+        if self.codec == "zstd":
+            return self._compressor.compress(data)
+        compressor = zlib.compressobj(9, zdict=self.dictionary) if self.dictionary else zlib.compressobj(9)
+        return compressor.compress(data) + compressor.flush()
+
+    def decompress(self, frame: bytes) -> bytes:
+        if self.codec == "zstd":
+            return self._decompressor.decompress(frame)
+        decompressor = zlib.decompressobj(zdict=self.dictionary) if self.dictionary else zlib.decompressobj()
+        return decompressor.decompress(frame) + decompressor.flush()
+
+
+def train_dictionary(samples: list[bytes], codec: str = None, size: int = LOG_DICT_SIZE) -> bytes:
+    """
+    Builds a compression dictionary from sample records (b"" if there are too few).
+    zstd trains a real dictionary; the zlib fallback uses the most recent samples
+    as its preset dictionary, which captures the repeated keys and prompt text.
+    """
+    if len(samples) < LOG_DICT_MIN_SAMPLES:
+        return b""
+    if (codec or CODEC) == "zstd":
+        try:
+            return zstandard.train_dictionary(size, samples).as_bytes()
+        except zstandard.ZstdError as e:
+            log.warning(f"Dictionary training failed, continuing without one: {e}")
+            return b""
+    # zlib matches nearby bytes best, so the most recent samples go at the end
+    return b"".join(samples)[-min(size, _ZLIB_WINDOW):]
+
+
+class LogStore:
+    """
+    Append-only run log split into segment files of individually compressed records.
+
+    Segments rotate by size or age. A sidecar SQLite index maps session_id and
+    timestamp to (segment, offset, length), so one record is read back with a
+    single seek and one frame decompression. When a segment rotates, a new
+    dictionary is trained on its records and used for the next segment.
+    """
+    def __init__(self, directory: str = LOG_SEGMENTS_DIR, max_segment_bytes: int = LOG_SEGMENT_MAX_BYTES,
+                 max_segment_age_s: float = LOG_SEGMENT_MAX_AGE_S):
+        self.directory = directory
+        self.max_segment_bytes = max_segment_bytes
+        self.max_segment_age_s = max_segment_age_s
+        self._lock = threading.Lock()
+        self._codecs = {}
+        os.makedirs(directory, exist_ok=True)
+        self._index = sqlite3.connect(os.path.join(directory, "index.db"), check_same_thread=False, timeout=30)
+        self._index.execute("PRAGMA journal_mode=WAL")
+        self._index.executescript(_SCHEMA)
+        self._lock_path = os.path.join(directory, ".append.lock")
+
+    @contextmanager
+    def _writer_lock(self):
+        """
+        Serializes writers across threads and, where flock exists, across processes
+        (e.g. several app.worker processes): record offsets come from the file position.
+        """
+        with self._lock:
+            if fcntl is None:
+                yield
+                return
+            with open(self._lock_path, "a") as lock_file:
+                fcntl.flock(lock_file, fcntl.LOCK_EX)
+                try:
+                    yield
+                finally:
+                    fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    # --- Segments & Codecs ---
+
+    def _segment_path(self, segment: int) -> str:
+        return os.path.join(self.directory, f"segment-{segment:06d}.log")
+
+    def _codec_for(self, codec: str, dict_id: int) -> _Codec:
+        key = (codec, dict_id)
+        if key not in self._codecs:
+            dictionary = b""
+            if dict_id:
+                dictionary = self._index.execute(
+                    "SELECT data FROM dictionaries WHERE dict_id = ?", (dict_id,)).fetchone()[0]
+            self._codecs[key] = _Codec(codec, dictionary)
+        return self._codecs[key]
+
+    def _open_segment(self) -> tuple:
+        """The current (segment, codec, dict_id), rotating first if it is too big or too old."""
+        row = self._index.execute(
+            "SELECT segment, created, codec, dict_id FROM segments WHERE closed = 0 ORDER BY segment DESC LIMIT 1"
+        ).fetchone()
+        if row:
+            segment, created, codec, dict_id = row
+            size = os.path.getsize(self._segment_path(segment)) if os.path.exists(self._segment_path(segment)) else 0
+            if size < self.max_segment_bytes and time.time() - created < self.max_segment_age_s:
+                return segment, codec, dict_id
+            self._rotate_locked(segment)
+        return self._new_segment_locked()
+
+    def _new_segment_locked(self) -> tuple:
+        dict_id = self._index.execute(
+            "SELECT COALESCE(MAX(dict_id), 0) FROM dictionaries WHERE codec = ?", (CODEC,)).fetchone()[0]
+        with self._index:
+            cursor = self._index.execute(
+                "INSERT INTO segments (created, codec, dict_id) VALUES (?, ?, ?)", (time.time(), CODEC, dict_id))
+        return cursor.lastrowid, CODEC, dict_id
+
+    def _rotate_locked(self, segment: int):
+        """Closes a segment and trains the next segment's dictionary on its records."""
+        samples = [json.dumps(r, ensure_ascii=False).encode("utf-8") for r in self._read_segment(segment)]
+        with self._index:
+            self._index.execute("UPDATE segments SET closed = 1 WHERE segment = ?", (segment,))
+        self._add_dictionary(samples)
+        log.info(f"Rotated log segment {segment} ({len(samples)} records)")
+
+    def _add_dictionary(self, samples: list[bytes]) -> int:
+        dictionary = train_dictionary(samples)
+        if not dictionary:
+            return 0
+        with self._index:
+            cursor = self._index.execute(
+                "INSERT INTO dictionaries (codec, created, data) VALUES (?, ?, ?)", (CODEC, time.time(), dictionary))
+        return cursor.lastrowid
+
+    def rotate(self):
+        """Closes the current segment now; the next append starts a new one."""
+        with self._writer_lock():
+            row = self._index.execute("SELECT segment FROM segments WHERE closed = 0").fetchone()
+            if row:
+                self._rotate_locked(row[0])
+
+    # --- Writes ---
+
+    def append(self, record: dict, session_id: str = None, ts: float = None) -> tuple:
+        """Appends one record. Returns its (segment, offset)."""
+        return self.append_many([record], [session_id], [ts])[0]
+
+    def append_json(self, record_json: str, session_id: str, ts: float) -> tuple:
+        """Appends a record that is already serialized (e.g. a Transcript's cached JSON)."""
+        return self._append_raw([(record_json.encode("utf-8"), session_id, ts)])[0]
+
+    def append_many(self, records: list[dict], session_ids: list = None, timestamps: list = None) -> list[tuple]:
+        """Appends records with a single index transaction. session_id/ts default to the record's own fields."""
+        session_ids = session_ids or [None] * len(records)
+        timestamps = timestamps or [None] * len(records)
+        return self._append_raw([
+            (json.dumps(record, ensure_ascii=False).encode("utf-8"),
+             session_id or record.get("session_id") or record.get("debate_id"),
+             ts or record.get("ts") or time.time())
+            for record, session_id, ts in zip(records, session_ids, timestamps)
+        ])
+
+    def _append_raw(self, items: list[tuple]) -> list[tuple]:
+        locations, rows = [], []
+        with self._writer_lock():
+            segment, codec_name, dict_id = self._open_segment()
+            codec = self._codec_for(codec_name, dict_id)
+            with open(self._segment_path(segment), "ab") as f:
+                for raw, session_id, ts in items:
+                    frame = codec.compress(raw)
+                    offset = f.tell()
+                    f.write(frame)
+                    rows.append((session_id, ts, segment, offset, len(frame), len(raw)))
+                    locations.append((segment, offset))
+                f.flush()
+                os.fsync(f.fileno())
+            with self._index:
+                self._index.executemany("INSERT INTO records VALUES (?, ?, ?, ?, ?, ?)", rows)
+        return locations
+
+    # --- Reads ---
+
+    def _read_frame(self, segment: int, offset: int, length: int) -> dict:
+        codec_name, dict_id = self._index.execute(
+            "SELECT codec, dict_id FROM segments WHERE segment = ?", (segment,)).fetchone()
+        with open(self._segment_path(segment), "rb") as f:
+            f.seek(offset)
+            frame = f.read(length)
+        return json.loads(self._codec_for(codec_name, dict_id).decompress(frame))
+
+    def _read_segment(self, segment: int) -> list[dict]:
+        rows = self._index.execute(
+            "SELECT offset, length FROM records WHERE segment = ? ORDER BY offset", (segment,)).fetchall()
+        return [self._read_frame(segment, offset, length) for offset, length in rows]
+
+    def get(self, session_id: str) -> list[dict]:
+        """Every record logged for one session, oldest first."""
+        with self._lock:
+            rows = self._index.execute(
+                "SELECT segment, offset, length FROM records WHERE session_id = ? ORDER BY ts", (session_id,)
+            ).fetchall()
+            return [self._read_frame(*row) for row in rows]
+
+    def find(self, since: float = None, until: float = None, limit: int = 100) -> list[dict]:
+        """Records in a time range, newest first."""
+        with self._lock:
+            rows = self._index.execute(
+                "SELECT segment, offset, length FROM records WHERE ts >= ? AND ts < ? ORDER BY ts DESC LIMIT ?",
+                (since or 0, until or float("inf"), limit)
+            ).fetchall()
+            return [self._read_frame(*row) for row in rows]
+
+    def stats(self) -> dict:
+        with self._lock:
+            self._index.execute("PRAGMA wal_checkpoint(TRUNCATE)")  # Measure the settled index size
+            row = self._index.execute(
+                "SELECT COUNT(*), COALESCE(SUM(length), 0), COALESCE(SUM(raw_length), 0) FROM records").fetchone()
+            segments = self._index.execute("SELECT COUNT(*) FROM segments").fetchone()[0]
+        index_bytes = sum(os.path.getsize(os.path.join(self.directory, name))
+                          for name in os.listdir(self.directory) if name.startswith("index.db"))
+        return {"codec": CODEC, "segments": segments, "records": row[0], "compressed_bytes": row[1],
+                "raw_bytes": row[2], "index_bytes": index_bytes}
+
+
+# --- Migration from the single JSONL file ---
+
+def read_jsonl(path: str) -> list[dict]:
+    records = []
+    with open(path, "r", encoding="utf-8") as f:
+        for line_num, line in enumerate(f, start=1):
+            if line.strip():
+                try:
+                    records.append(json.loads(line))
+                except json.JSONDecodeError:
+                    log.warning(f"Skipping malformed line {line_num} in {path}")
+    return records
+
+def migrate_jsonl(path: str = "logs/battle.json", store: "LogStore" = None) -> dict:
+    """
+    Copies a JSONL log into the segmented store, trains the first dictionary on
+    it, and reports disk usage and single-record lookup time against the plain file.
+    The original file is left in place.
+    """
+    store = store or get_log_store()
+    records = read_jsonl(path)
+    if not records:
+        return {"error": f"No records found in {path}"}
+
+    store.rotate()  # The migrated records start a new segment that uses a dictionary trained on them
+    samples = [json.dumps(r, ensure_ascii=False).encode("utf-8") for r in records]
+    with store._lock:
+        store._add_dictionary(samples)
+    store.append_many(records)
+    return {"records": len(records), **benchmark_lookup(path, store, records)}
+
+def benchmark_lookup(path: str, store: "LogStore", records: list[dict]) -> dict:
+    """Disk usage and mean time to fetch one session's records: plain JSONL scan vs. indexed store."""
+    session_ids = [r.get("session_id") for r in records if r.get("session_id")] or [None]
+
+    start = time.perf_counter()
+    for session_id in session_ids:
+        [r for r in read_jsonl(path) if r.get("session_id") == session_id]
+    plain_s = (time.perf_counter() - start) / len(session_ids)
+
+    start = time.perf_counter()
+    for session_id in session_ids:
+        store.get(session_id)
+    store_s = (time.perf_counter() - start) / len(session_ids)
+
+    stats = store.stats()
+    return {
+        "plain_bytes": os.path.getsize(path),
+        "store_bytes": stats["compressed_bytes"] + stats["index_bytes"],
+        "compressed_bytes": stats["compressed_bytes"],
+        "codec": stats["codec"],
+        "plain_lookup_ms": round(plain_s * 1000, 3),
+        "store_lookup_ms": round(store_s * 1000, 3),
+    }
+
+
+_STORE = None
+_STORE_LOCK = threading.Lock()
+
+def get_log_store() -> LogStore:
+    """Returns the single segmented log shared by the whole process."""
+    global _STORE
+    with _STORE_LOCK:
+        if _STORE is None:
+            _STORE = LogStore()
+        return _STORE
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Segmented, compressed run logs.")
+    sub = parser.add_subparsers(dest="command", required=True)
+    migrate = sub.add_parser("migrate", help="Copy a JSONL log (default logs/battle.json) into the segmented store")
+    migrate.add_argument("path", nargs="?", default="logs/battle.json")
+    sub.add_parser("stats", help="Show segment and compression statistics")
+    get = sub.add_parser("get", help="Print the records of one session")
+    get.add_argument("session_id")
+    args = parser.parse_args()
+
+    store = get_log_store()
+    if args.command == "migrate":
+        report = migrate_jsonl(args.path, store)
+        if "error" in report:
+            print(report["error"])
+            return
+        print(f"Migrated {report['records']} records ({report['codec']})")
+        print(f"  disk:   {report['plain_bytes']:>10,} B plain  ->  {report['store_bytes']:>10,} B "
+              f"segments + index ({report['compressed_bytes']:,} B compressed)")
+        print(f"  lookup: {report['plain_lookup_ms']:>10} ms plain  ->  {report['store_lookup_ms']:>10} ms indexed")
+    elif args.command == "stats":
+        print(json.dumps(store.stats(), indent=2))
+    else:
+        print(json.dumps(store.get(args.session_id), indent=2, ensure_ascii=False))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,205 @@
+# app/memory_fit.py
+import ctypes
+import logging
+import os
+import re
+import subprocess
+
+from app.config import DEFAULT_NUM_CTX
+from app.model_registry import get_registry
+
+log = logging.getLogger(__name__)
+
+# Approximate bits per weight of the common GGUF quantizations (block scales included)
+QUANT_BITS_PER_WEIGHT = {
+    "Q2_K": 3.35, "Q3_K_S": 3.5, "Q3_K_M": 3.91, "Q3_K_L": 4.27,
+    "IQ4_XS": 4.25, "Q4_0": 4.5, "Q4_1": 5.0, "Q4_K_S": 4.58, "Q4_K_M": 4.85,
+    "Q5_0": 5.5, "Q5_1": 6.0, "Q5_K_S": 5.54, "Q5_K_M": 5.69,
+    "Q6_K": 6.56, "Q8_0": 8.5, "F16": 16.0, "BF16": 16.0, "F32": 32.0,
+}
+DEFAULT_LIBRARY_QUANT = "Q4_K_M"  # What an untagged `ollama pull <family>:<size>` usually gets
+
+RUNTIME_OVERHEAD_BYTES = 512 * 1024**2  # Compute graph, scratch buffers, runner process
+KV_BYTES_PER_ELEMENT = 2                # Ollama keeps the KV cache in f16 by default
+
+# Used when a model has no /api/show details yet: a llama3-8B class layout
+# (32 layers x 8 KV heads x 128 dims) scaled by the square root of its size
+_REFERENCE_KV_BYTES_PER_TOKEN = 2 * 32 * 8 * 128 * KV_BYTES_PER_ELEMENT
+_REFERENCE_PARAMS = 8e9
+
+
+def parse_size_from_name(model_name: str) -> float:
+    """Pulls a parameter count out of tags like "llama3.1:70b" or "qwen2:0.5b"; 0 if absent."""
+    match = re.search(r'(?<![\d.])(\d+(?:\.\d+)?)([bm])(?![a-z])', model_name.lower())
+    if not match:
+        return 0.0
+    return float(match.group(1)) * (1e9 if match.group(2) == "b" else 1e6)
+
+def parse_quant_from_name(model_name: str) -> str:
+    """Pulls a quantization out of tags like "llama3:8b-instruct-q8_0"; "" if absent."""
+    match = re.search(r'(iq\d_\w+|q\d_k_[sml]|q\d_k|q\d_\d|bf16|fp16|f16|f32)', model_name.lower())
+    if not match:
+        return ""
+    return match.group(1).upper().replace("FP16", "F16")
+
+
+# --- Estimation ---
+
+def estimate_model_memory(parameter_count: float, quantization: str, num_ctx: int = DEFAULT_NUM_CTX,
+                          arch: dict = None) -> dict:
+    """
+    Predicts the memory a model needs once loaded with the given context length.
+
+    arch may carry the /api/show fields from the registry (block_count, embedding_length,
+    head_count, head_count_kv) for an exact KV-cache size; without them it is scaled
+    from a reference layout. All values are in bytes.
+    """
+    arch = arch or {}
+    bits = QUANT_BITS_PER_WEIGHT.get((quantization or DEFAULT_LIBRARY_QUANT).upper(),
+                                     QUANT_BITS_PER_WEIGHT[DEFAULT_LIBRARY_QUANT])
+    weights = parameter_count * bits / 8
+
+    layers, embed = arch.get("block_count"), arch.get("embedding_length")
+    heads, kv_heads = arch.get("head_count"), arch.get("head_count_kv") or arch.get("head_count")
+    if layers and embed and heads and kv_heads:
+        kv_per_token = 2 * layers * kv_heads * (embed // heads) * KV_BYTES_PER_ELEMENT
+    else:
+        kv_per_token = _REFERENCE_KV_BYTES_PER_TOKEN * (max(parameter_count, 1) / _REFERENCE_PARAMS) ** 0.5
+    kv_cache = kv_per_token * num_ctx
+
+    return {
+        "weights_bytes": int(weights),
+        "kv_cache_bytes": int(kv_cache),
+        "overhead_bytes": RUNTIME_OVERHEAD_BYTES,
+        "total_bytes": int(weights + kv_cache + RUNTIME_OVERHEAD_BYTES),
+    }
+
+def estimate_installed_model(model_name: str, num_ctx: int = DEFAULT_NUM_CTX) -> dict:
+    """Estimates an installed model from registry metadata. Returns None if it is not installed."""
+    model = get_registry().get_model(model_name)
+    if model is None:
+        return None
+    return estimate_model_memory(model["parameter_count"], model["quantization"], num_ctx, arch=model)
+
+def estimate_library_model(model_name: str, num_ctx: int = DEFAULT_NUM_CTX, parameter_count: float = 0) -> dict:
+    """
+    Estimates a model that has not been pulled yet, from its tag name alone.
+    Returns None if the size can't be told from the name and no parameter_count is given.
+    """
+    parameter_count = parameter_count or parse_size_from_name(model_name)
+    if not parameter_count:
+        return None
+    return estimate_model_memory(parameter_count, parse_quant_from_name(model_name) or DEFAULT_LIBRARY_QUANT, num_ctx)
+
+
+# --- Host Memory ---
+
+def get_host_memory() -> dict:
+    """Total and available system RAM in bytes, or {} when the platform can't tell us."""
+    try:
+        if os.path.exists("/proc/meminfo"):
+            info = {}
+            with open("/proc/meminfo") as f:
+                for line in f:
+                    key, value = line.split(":", 1)
+                    info[key] = int(value.split()[0]) * 1024
+            return {"total_bytes": info["MemTotal"],
+                    "available_bytes": info.get("MemAvailable", info.get("MemFree", 0))}
+        if os.name == "nt":
+            class MEMORYSTATUSEX(ctypes.Structure):
+                _fields_ = [("dwLength", ctypes.c_ulong), ("dwMemoryLoad", ctypes.c_ulong),
+                            ("ullTotalPhys", ctypes.c_ulonglong), ("ullAvailPhys", ctypes.c_ulonglong),
+                            ("ullTotalPageFile", ctypes.c_ulonglong), ("ullAvailPageFile", ctypes.c_ulonglong),
+                            ("ullTotalVirtual", ctypes.c_ulonglong), ("ullAvailVirtual", ctypes.c_ulonglong),
+                            ("ullAvailExtendedVirtual", ctypes.c_ulonglong)]
+            status = MEMORYSTATUSEX()
+            status.dwLength = ctypes.sizeof(MEMORYSTATUSEX)
+            ctypes.windll.kernel32.GlobalMemoryStatusEx(ctypes.byref(status))
+            return {"total_bytes": status.ullTotalPhys, "available_bytes": status.ullAvailPhys}
+        page_size = os.sysconf("SC_PAGE_SIZE")
+        return {"total_bytes": os.sysconf("SC_PHYS_PAGES") * page_size,
+                "available_bytes": os.sysconf("SC_AVPHYS_PAGES") * page_size}
+    except Exception as e:
+        log.warning(f"Could not read host memory: {e}")
+        return {}
+
+def get_gpu_memory() -> dict:
+    """Total and free VRAM in bytes summed over NVIDIA GPUs, or {} without nvidia-smi."""
+    try:
+        result = subprocess.run(
+            ["nvidia-smi", "--query-gpu=memory.total,memory.free", "--format=csv,noheader,nounits"],
+            capture_output=True, text=True, check=True, timeout=5, encoding='utf-8'
+        )
+    except Exception:
+        return {}
+    total = free = 0
+    for line in result.stdout.strip().splitlines():
+        gpu_total, gpu_free = (int(v) * 1024**2 for v in line.split(","))
+        total, free = total + gpu_total, free + gpu_free
+    return {"total_bytes": total, "available_bytes": free}
+
+
+# --- Fit Checks ---
+
+def memory_snapshot() -> dict:
+    """Free host RAM, free VRAM and loaded models, read once so several checks can share it."""
+    return {"host": get_host_memory(), "gpu": get_gpu_memory(), "loaded": get_registry().loaded_models()}
+
+def check_fit(required_bytes: int, keep_models: list[str] = (), snapshot: dict = None) -> dict:
+    """
+    Compares a memory requirement with what is free right now.
+
+    Returns a dict with "status":
+      - "fits": fits in free memory, nothing gets unloaded
+      - "evicts": only fits if Ollama unloads the models in "evicted_models"
+      - "too_large": does not fit even with every other model unloaded
+      - "unknown": free memory could not be read
+    Models in keep_models are needed at the same time and never count as evictable.
+    Pass a memory_snapshot() when checking many candidates in one go.
+    """
+    snapshot = snapshot or memory_snapshot()
+    host, gpu, loaded = snapshot["host"], snapshot["gpu"], snapshot["loaded"]
+    if not host:
+        return {"status": "unknown", "required_bytes": required_bytes,
+                "message": "Could not read free memory on this machine."}
+
+    available = host["available_bytes"] + gpu.get("available_bytes", 0)
+    evictable = {name: info["size_bytes"] for name, info in loaded.items() if name not in keep_models}
+
+    result = {"required_bytes": required_bytes, "available_bytes": available,
+              "loaded_bytes": sum(info["size_bytes"] for info in loaded.values()), "evicted_models": []}
+    if required_bytes <= available:
+        result.update(status="fits", message=f"Needs ~{required_bytes / 1e9:.1f} GB of {available / 1e9:.1f} GB free.")
+        return result
+
+    # Ollama unloads idle models to make room; largest first frees space fastest
+    freed = 0
+    for name, size in sorted(evictable.items(), key=lambda item: -item[1]):
+        result["evicted_models"].append(name)
+        freed += size
+        if required_bytes <= available + freed:
+            result.update(status="evicts", message=(
+                f"Needs ~{required_bytes / 1e9:.1f} GB but only {available / 1e9:.1f} GB is free; "
+                f"loading it will unload {', '.join(result['evicted_models'])}."))
+            return result
+
+    result.update(status="too_large", message=(
+        f"Needs ~{required_bytes / 1e9:.1f} GB but at most {(available + freed) / 1e9:.1f} GB "
+        f"can be freed on this machine."))
+    return result
+
+def check_models_fit(model_names: list[str], num_ctx: int = DEFAULT_NUM_CTX) -> dict:
+    """
+    Checks whether a set of installed models (e.g. PRO, CON and critic) can all stay
+    resident at once. Models that are already loaded need no extra memory.
+    """
+    snapshot = memory_snapshot()
+    loaded = snapshot["loaded"]
+    required = 0
+    for name in dict.fromkeys(model_names):  # The same model on both sides loads once
+        if name in loaded:
+            continue
+        estimate = estimate_installed_model(name, num_ctx)
+        if estimate:
+            required += estimate["total_bytes"]
+    return check_fit(required, keep_models=model_names, snapshot=snapshot)
@@ -0,0 +1,53 @@
+# app/model_options.py
+import json
+import logging
+import os
+import threading
+
+from app.config import MODEL_OPTIONS_FILE
+
+log = logging.getLogger(__name__)
+
+# Only throughput-related options are stored per model. num_predict is a per-call
+# cap that every caller sets itself, so it is never saved as a default.
+TUNABLE_OPTIONS = ("num_ctx", "num_batch", "num_thread")
+
+_lock = threading.Lock()
+_cache = None
+
+def _load_locked() -> dict:
+    global _cache
+    if _cache is None:
+        _cache = {}
+        if os.path.exists(MODEL_OPTIONS_FILE):
+            try:
+                with open(MODEL_OPTIONS_FILE, 'r') as f:
+                    _cache = json.load(f)
+            except Exception as e:
+                log.error(f"Error loading model options file: {e}")
+    return _cache
+
+def get_model_options(model_name: str) -> dict:
+    """The saved Ollama options for a model, or {} if none were saved."""
+    with _lock:
+        return dict(_load_locked().get(model_name, {}))
+
+def get_all_model_options() -> dict:
+    with _lock:
+        return {name: dict(opts) for name, opts in _load_locked().items()}
+
+def save_model_options(model_name: str, options: dict):
+    """Saves tuned options (e.g. a sweep's winner) as the model's default for every page."""
+    options = {k: v for k, v in options.items() if k in TUNABLE_OPTIONS and v is not None}
+    with _lock:
+        all_options = _load_locked()
+        if options:
+            all_options[model_name] = options
+        else:
+            all_options.pop(model_name, None)
+        os.makedirs(os.path.dirname(MODEL_OPTIONS_FILE), exist_ok=True)
+        tmp_path = MODEL_OPTIONS_FILE + ".tmp"
+        with open(tmp_path, 'w') as f:
+            json.dump(all_options, f, indent=2)
+        os.replace(tmp_path, MODEL_OPTIONS_FILE)
+    log.info(f"Saved default options for {model_name}: {options}")
@@ -0,0 +1,204 @@
+# app/model_registry.py
+import logging
+import re
+import threading
+import time
+
+from app.config import MODEL_LIST_TTL_S, MODEL_LIST_RETRY_S
+from app.runner import ollama_api
+
+log = logging.getLogger(__name__)
+
+def _parse_parameter_size(text: str) -> float:
+    """Turns Ollama's "8.0B" / "137M" parameter_size strings into a raw parameter count."""
+    match = re.match(r'\s*([\d.]+)\s*([KMBT]?)', text or "", re.IGNORECASE)
+    if not match:
+        return 0.0
+    scale = {"": 1, "K": 1e3, "M": 1e6, "B": 1e9, "T": 1e12}[match.group(2).upper()]
+    return float(match.group(1)) * scale
+
+def _format_bytes(num_bytes: int) -> str:
+    """Matches the human-readable sizes `ollama list` used to print (e.g. "4.7 GB")."""
+    for unit in ("B", "KB", "MB", "GB"):
+        if num_bytes < 1000:
+            return f"{num_bytes:.1f} {unit}" if unit != "B" else f"{num_bytes} B"
+        num_bytes /= 1000
+    return f"{num_bytes:.1f} TB"
+
+
+class ModelRegistry:
+    """
+    Process-wide view of the models installed on the Ollama server.
+
+    The model list comes from /api/tags. It is re-read after invalidate(), which the
+    app calls on pull or delete. It is also re-read every MODEL_LIST_TTL_S, because
+    models pulled or removed with the ollama CLI never go through invalidate().
+    When a read fails, the last good list stays in use (with error set) and the
+    read is retried at most every MODEL_LIST_RETRY_S.
+
+    Per-model architecture details come from /api/show and are cached by digest,
+    so re-pulling a tag refreshes them. Loaded state comes from /api/ps, which is
+    cheap and always read live.
+    """
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._fetch_lock = threading.Lock()  # One /api/tags read at a time, made outside _lock
+        self._models = None      # name -> model dict, None until the first successful fetch
+        self._loaded_at = 0.0
+        self._retry_at = 0.0     # No new read before this after a failure
+        self._generation = 0     # Bumped by invalidate(), so a read started before it counts as stale
+        self._details = {}       # digest -> /api/show summary
+        self.error = ""
+
+    # --- Cache Control ---
+
+    def invalidate(self):
+        """Marks the cached model list stale; the next query re-reads it. Call after any pull or delete."""
+        with self._lock:
+            self._loaded_at = 0.0
+            self._retry_at = 0.0
+            self._generation += 1
+        log.info("Model registry invalidated.")
+
+    def _is_fresh_locked(self) -> bool:
+        now = time.monotonic()
+        if self._models is not None and now - self._loaded_at < MODEL_LIST_TTL_S:
+            return True
+        return bool(self.error) and now < self._retry_at
+
+    def _ensure_loaded(self):
+        with self._lock:
+            if self._is_fresh_locked():
+                return
+            have_list = self._models is not None
+        # /api/tags can hang until its timeout while Ollama is down, so it is read
+        # outside _lock. With a list to fall back on, don't queue behind another read.
+        if not self._fetch_lock.acquire(blocking=not have_list):
+            return
+        try:
+            with self._lock:
+                if self._is_fresh_locked():  # Another thread read it while we waited
+                    return
+                generation = self._generation
+            success, response, error = ollama_api("tags")
+            with self._lock:
+                if not success:
+                    log.error(f"Failed to read model list: {error}")
+                    self.error = error
+                    self._retry_at = time.monotonic() + MODEL_LIST_RETRY_S
+                    return
+                self.error = ""
+                self._models = {}
+                self._loaded_at = time.monotonic() if generation == self._generation else 0.0
+                for entry in response.get("models", []):
+                    details = entry.get("details") or {}
+                    size = entry.get("size", 0)
+                    self._models[entry["name"]] = {
+                        "name": entry["name"],
+                        "digest": entry.get("digest", ""),
+                        "size_bytes": size,
+                        "size": _format_bytes(size),
+                        "modified_at": entry.get("modified_at", ""),
+                        "family": details.get("family", ""),
+                        "parameter_size": details.get("parameter_size", ""),
+                        "parameter_count": _parse_parameter_size(details.get("parameter_size", "")),
+                        "quantization": details.get("quantization_level", ""),
+                    }
+                log.info(f"Model registry loaded {len(self._models)} models.")
+        finally:
+            self._fetch_lock.release()
+
+    # --- Queries ---
+
+    def list_models(self) -> list[dict]:
+        """All installed models, sorted by name."""
+        self._ensure_loaded()
+        with self._lock:
+            models = self._models or {}
+            return [dict(models[name]) for name in sorted(models)]
+
+    def model_names(self) -> list[str]:
+        self._ensure_loaded()
+        with self._lock:
+            return sorted(self._models or {})
+
+    def get_model(self, name: str, with_details: bool = True) -> dict:
+        """
+        Returns one model's metadata, or None if it is not installed.
+        with_details adds the /api/show fields (context_length, block_count, ...).
+        """
+        self._ensure_loaded()
+        with self._lock:
+            model = (self._models or {}).get(name)
+            if model is None:
+                return None
+            model = dict(model)
+        if with_details:
+            model.update(self.get_details(name, model["digest"]))
+        return model
+
+    def get_details(self, name: str, digest: str = "") -> dict:
+        """Architecture details from /api/show, cached per digest."""
+        with self._lock:
+            if digest and digest in self._details:
+                return self._details[digest]
+
+        success, response, error = ollama_api("show", {"model": name})
+        if not success:
+            log.warning(f"/api/show failed for {name}: {error}")
+            return {}
+
+        model_info = response.get("model_info") or {}
+        details = response.get("details") or {}
+
+        def _info(suffix: str):
+            for key, value in model_info.items():
+                if key.endswith(suffix):
+                    return value
+            return 0
+
+        summary = {
+            "context_length": _info(".context_length"),
+            "block_count": _info(".block_count"),
+            "embedding_length": _info(".embedding_length"),
+            "head_count": _info(".attention.head_count"),
+            "head_count_kv": _info(".attention.head_count_kv"),
+            "parameter_count": model_info.get("general.parameter_count")
+                               or _parse_parameter_size(details.get("parameter_size", "")),
+            "quantization": details.get("quantization_level", ""),
+        }
+        if digest:
+            with self._lock:
+                self._details[digest] = summary
+        return summary
+
+    def loaded_models(self) -> dict:
+        """Models currently resident on the server (/api/ps), keyed by name."""
+        success, response, error = ollama_api("ps")
+        if not success:
+            log.warning(f"/api/ps failed: {error}")
+            return {}
+        return {
+            entry["name"]: {
+                "size_bytes": entry.get("size", 0),
+                "size_vram_bytes": entry.get("size_vram", 0),
+                "expires_at": entry.get("expires_at", ""),
+                "context_length": entry.get("context_length", 0),
+            }
+            for entry in response.get("models", [])
+        }
+
+    # --- Mutations ---
+
+    def delete_model(self, name: str) -> tuple[bool, str]:
+        """Deletes a model on the server and invalidates the registry."""
+        success, _, error = ollama_api("delete", {"model": name}, method="DELETE")
+        self.invalidate()
+        return success, error
+
+
+_REGISTRY = ModelRegistry()
+
+def get_registry() -> ModelRegistry:
+    """Returns the single registry shared by every page in this process."""
+    return _REGISTRY
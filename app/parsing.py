@@ -1,6 +1,5 @@
 # app/parsing.py
 import re
-import pandas as pd
 
 def _clip_text(text: str, max_lines: int = 5) -> str:
     """Clips text to a max number of lines to enforce brevity."""
@@ -12,10 +11,15 @@ def robust_extract_tag(raw_text: str, tag: str) -> str:
     A more robust, non-greedy parser that finds the *first*
     complete tag and ignores duplicates or malformed XML.
     """
-    # The '?' makes the '.*' non-greedy, so it stops at the *first* closing tag
-    match = re.search(f'<{tag}>(.*?)</{tag}>', raw_text, re.DOTALL | re.IGNORECASE)
-    if match:
-        return match.group(1).strip()
+    # Same result as re.search('<tag>(.*?)</tag>'), but found with two linear scans: the lazy
+    # pattern rescans to the end of the text from every unclosed <tag>, which took ~0.1s on
+    # outputs that repeat an opening tag (python -m benchmarks.hot_paths)
+    start = re.search(f'<{tag}>', raw_text, re.IGNORECASE)
+    if not start:
+        return ""
+    end = re.compile(f'</{tag}>', re.IGNORECASE).search(raw_text, start.end())
+    if end:
+        return raw_text[start.end():end.start()].strip()
     return ""
 
 def parse_neutral_output(raw_text: str, assigned_side: str) -> dict:
@@ -65,3 +69,23 @@ def parse_final_output(raw_text: str, assigned_side: str) -> dict:
     data["side_mismatch"] = side_mismatch
     data["raw_output"] = raw_text
     return data
+
+def infer_debate_winner(verdict: str, model_pro: str, model_con: str) -> str:
+    """
+    Reads the winning side ("PRO", "CON") out of a free-text critic verdict.
+    Looks at the sentences that mention a winner first, then at the whole verdict;
+    returns "" when both or neither side is named.
+    """
+    if not verdict:
+        return ""
+    if model_pro == model_con:
+        model_pro = model_con = ""  # Same model on both sides: only PRO/CON can tell them apart
+    sentences = re.split(r'(?<=[.!?])\s+', verdict)
+    winner_sentences = [s for s in sentences if re.search(r'\bwin(ner|s|ning)?\b|\bvictor', s, re.IGNORECASE)]
+
+    for text in (" ".join(winner_sentences), verdict):
+        pro_named = bool(re.search(r'\bPRO\b', text)) or (model_pro and model_pro.lower() in text.lower())
+        con_named = bool(re.search(r'\bCON\b', text)) or (model_con and model_con.lower() in text.lower())
+        if pro_named != con_named:
+            return "PRO" if pro_named else "CON"
+    return ""
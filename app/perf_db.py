@@ -0,0 +1,105 @@
+# app/perf_db.py
+import logging
+import os
+import sqlite3
+import threading
+import time
+
+import pandas as pd
+
+from app.config import PERF_DB_PATH
+
+log = logging.getLogger(__name__)
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS benchmarks (
+    id              INTEGER PRIMARY KEY AUTOINCREMENT,
+    run_id          TEXT NOT NULL,
+    ts              REAL NOT NULL,
+    model           TEXT NOT NULL,
+    digest          TEXT,
+    server_version  TEXT,
+    kind            TEXT NOT NULL,      -- 'cold' load probe or 'warm' prompt-length run ('canary_*' from app/canary.py)
+    prompt_tokens   INTEGER,           -- Target prompt length of the run
+    tokens_in       INTEGER,
+    tokens_out      INTEGER,
+    load_s          REAL,
+    prefill_tok_s   REAL,
+    decode_tok_s    REAL,
+    total_s         REAL,
+    ok              INTEGER NOT NULL,
+    error           TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_benchmarks_model_ts ON benchmarks (model, ts);
+CREATE INDEX IF NOT EXISTS idx_benchmarks_run ON benchmarks (run_id);
+"""
+
+_COLUMNS = ("run_id", "ts", "model", "digest", "server_version", "kind", "prompt_tokens",
+            "tokens_in", "tokens_out", "load_s", "prefill_tok_s", "decode_tok_s", "total_s", "ok", "error")
+
+_lock = threading.Lock()
+_initialized = set()
+
+def _connect(db_path: str = PERF_DB_PATH) -> sqlite3.Connection:
+    os.makedirs(os.path.dirname(db_path) or ".", exist_ok=True)
+    conn = sqlite3.connect(db_path, timeout=30)
+    if db_path not in _initialized:
+        with _lock:
+            conn.executescript(_SCHEMA)
+            _initialized.add(db_path)
+    return conn
+
+def record_benchmark_rows(rows: list[dict], db_path: str = PERF_DB_PATH):
+    """Inserts benchmark measurements; missing columns are stored as NULL."""
+    if not rows:
+        return
+    conn = _connect(db_path)
+    try:
+        with conn:
+            conn.executemany(
+                f"INSERT INTO benchmarks ({', '.join(_COLUMNS)}) VALUES ({', '.join('?' * len(_COLUMNS))})",
+                [tuple(row.get(col, time.time() if col == "ts" else None) for col in _COLUMNS) for row in rows]
+            )
+    finally:
+        conn.close()
+    log.info(f"Recorded {len(rows)} benchmark rows.")
+
+def load_benchmarks(model: str = None, kind: str = None, db_path: str = PERF_DB_PATH) -> pd.DataFrame:
+    """All stored benchmark rows, optionally for one model and/or kind, oldest first."""
+    query, params = "SELECT * FROM benchmarks WHERE 1=1", []
+    if model:
+        query += " AND model = ?"
+        params.append(model)
+    if kind:
+        query += " AND kind = ?"
+        params.append(kind)
+    conn = _connect(db_path)
+    try:
+        return pd.read_sql_query(query + " ORDER BY ts", conn, params=params)
+    finally:
+        conn.close()
+
+def latest_benchmark_summary(db_path: str = PERF_DB_PATH) -> pd.DataFrame:
+    """
+    One row per model from its most recent benchmark run: cold load time plus
+    prefill and decode tok/s at every measured prompt length.
+    """
+    df = load_benchmarks(db_path=db_path)
+    df = df[df["kind"].isin(["cold", "warm"])]  # Canary runs (app/canary.py) share the table
+    if df.empty:
+        return pd.DataFrame(columns=["model"])
+
+    latest_runs = df.sort_values("ts").groupby("model")["run_id"].last()
+    df = df[df["run_id"].isin(latest_runs.values) & (df["ok"] == 1)]
+
+    cold = df[df["kind"] == "cold"].set_index("model")["load_s"].rename("cold_load_s")
+    warm = df[df["kind"] == "warm"]
+    prefill = warm.pivot_table(index="model", columns="prompt_tokens", values="prefill_tok_s")
+    prefill.columns = [f"prefill_tok_s@{int(n)}" for n in prefill.columns]
+    decode = warm.pivot_table(index="model", columns="prompt_tokens", values="decode_tok_s")
+    decode.columns = [f"decode_tok_s@{int(n)}" for n in decode.columns]
+    benchmarked_at = df.groupby("model")["ts"].max().rename("benchmarked_at")
+
+    summary = pd.concat([cold, prefill, decode, benchmarked_at], axis=1).reset_index()
+    summary["benchmarked_at"] = pd.to_datetime(summary["benchmarked_at"], unit="s").dt.strftime("%Y-%m-%d %H:%M")
+    return summary.rename(columns={"index": "model"})
@@ -0,0 +1,182 @@
+# app/planner.py
+import logging
+import math
+import statistics
+import time
+
+from app.config import (
+    MODEL_CRITIC, PLANNER_MIN_NUM_PREDICT, PLANNER_TIMEOUT_HEADROOM, PLANNER_MIN_TIMEOUT_S, PLANNER_HISTORY_CALLS,
+    PLANNER_DEFAULT_TOKENS_PER_S, PLANNER_DEFAULT_OVERHEAD_S
+)
+from app.transcript_store import get_transcript_store
+from app.perf_db import latest_benchmark_summary
+from app.adaptive_caps import caps_for
+
+log = logging.getLogger(__name__)
+
+# The model calls each phase makes: (role, call phase as in app/adaptive_caps.py and the calls table).
+# Roles are the caps keys the coordinator takes: PRO/CON for the debaters, verdict/audit for the critic.
+PHASE_CALLS = {
+    "baseline": [("PRO", "baseline"), ("CON", "baseline")],
+    "exchange": [("PRO", "exchange"), ("CON", "exchange")],
+    "final": [("PRO", "final"), ("CON", "final")],
+    "critic": [("verdict", "critic"), ("audit", "audit")],
+}
+
+
+def model_speed(model: str, history_calls: int = PLANNER_HISTORY_CALLS) -> dict:
+    """
+    How fast a model answers: decode tok/s, fixed per-call overhead (load + prompt) and
+    the typical reply length per phase. Measured from its latest stored debate calls,
+    else its latest hardware benchmark, else PLANNER_DEFAULT_*.
+    """
+    speed = {"model": model, "tokens_per_s": PLANNER_DEFAULT_TOKENS_PER_S,
+             "overhead_s": PLANNER_DEFAULT_OVERHEAD_S, "typical_tokens": {}, "source": "default"}
+    try:
+        calls = get_transcript_store().recent_calls(model, limit=history_calls)
+    except Exception as e:
+        log.error(f"Could not read call history for {model}: {e}")
+        calls = []
+    rates = [c["tokens_per_s"] for c in calls if c["tokens_per_s"]]
+    if rates:
+        speed["tokens_per_s"] = statistics.median(rates)
+        speed["overhead_s"] = statistics.median(
+            max(0.0, (c["time_total_s"] or 0) - (c["time_gen_s"] or 0)) for c in calls)
+        for phase in {c["phase"] for c in calls}:
+            speed["typical_tokens"][phase] = statistics.median(c["tokens_out"] for c in calls if c["phase"] == phase)
+        speed["source"] = f"{len(calls)} recent calls"
+        return speed
+
+    try:
+        summary = latest_benchmark_summary()
+        row = summary[summary["model"] == model]
+        decode_columns = sorted((c for c in summary.columns if c.startswith("decode_tok_s@")),
+                                key=lambda c: int(c.split("@")[1]))
+        if not row.empty and decode_columns and row.iloc[0][decode_columns[0]] > 0:
+            speed["tokens_per_s"] = float(row.iloc[0][decode_columns[0]])
+            speed["source"] = "benchmark"
+    except Exception as e:
+        log.error(f"Could not read benchmarks for {model}: {e}")
+    return speed
+
+
+class DebatePlanner:
+    """
+    Fits a whole debate (baselines, exchange rounds, finals and critic) into a wall-clock
+    budget. Before each phase it compares the time left with the expected cost of
+    everything still to run, using each model's measured speed:
+
+    * on schedule: the phase runs with its usual caps (learned, see app/adaptive_caps.py);
+    * behind: num_predict is cut in proportion (never below PLANNER_MIN_NUM_PREDICT) and
+      timeouts shrink to PLANNER_TIMEOUT_HEADROOM x the planned call time;
+    * so far behind that even minimal replies don't fit: remaining exchange rounds are skipped.
+
+    The finals and critic always run, so a debate that overruns still ends scored.
+    Drive it with next_step()/finish_step(); report() gives planned against actual time.
+    """
+    def __init__(self, budget_s: float, debate_config: dict, rounds: int,
+                 critic_model: str = MODEL_CRITIC, speeds: dict = None):
+        self.budget_s = budget_s
+        self.rounds = rounds
+        self.models = {"PRO": debate_config["model_pro"], "CON": debate_config["model_con"],
+                       "verdict": critic_model, "audit": critic_model}
+        self.speeds = speeds or {m: model_speed(m) for m in set(self.models.values())}
+        # The caps each call would get without a budget
+        self.defaults = {(role, phase): caps_for(self.models[role], phase)
+                         for calls in PHASE_CALLS.values() for role, phase in calls}
+        self.schedule = ["baseline"] + ["exchange"] * rounds + ["final", "critic"]
+        self.skipped_rounds = 0
+        self.phases = []      # One entry per finished phase: planned vs actual
+        self._current = None
+        self._start = time.monotonic()
+        self.planned_s = self._cost(self.schedule)
+
+    # --- Estimates ---
+
+    def _call_s(self, role: str, phase: str, num_predict: int) -> float:
+        """Expected duration of one call: overhead + the reply it will likely write at this cap."""
+        speed = self.speeds[self.models[role]]
+        tokens = min(num_predict, speed["typical_tokens"].get(phase, num_predict))
+        return speed["overhead_s"] + tokens / max(speed["tokens_per_s"], 0.1)
+
+    def _cost(self, schedule: list, num_predict: int = None) -> float:
+        """Expected duration of a list of phases, at the default caps or at a fixed num_predict."""
+        return sum(self._call_s(role, phase, min(num_predict or self.defaults[role, phase]["num_predict"],
+                                                 self.defaults[role, phase]["num_predict"]))
+                   for step in schedule for role, phase in PHASE_CALLS[step])
+
+    @property
+    def elapsed_s(self) -> float:
+        return time.monotonic() - self._start
+
+    @property
+    def remaining_s(self) -> float:
+        return self.budget_s - self.elapsed_s
+
+    @property
+    def current_label(self) -> str:
+        """Display name of the phase handed out by the last next_step() ("Baselines", "Round 2", ...)."""
+        return self._current["label"] if self._current else ""
+
+    # --- Driving ---
+
+    def next_step(self):
+        """(phase, caps by role) for the next phase to run, or None when the debate is done."""
+        if not self.schedule:
+            return None
+        remaining = self.remaining_s
+        # Skip rounds that can't fit even with the shortest replies (last ones first)
+        while "exchange" in self.schedule and self._cost(self.schedule, PLANNER_MIN_NUM_PREDICT) > remaining:
+            self.schedule.remove("exchange")
+            self.skipped_rounds += 1
+            log.info(f"Behind schedule ({remaining:.0f}s left): skipping an exchange round")
+
+        phase = self.schedule[0]
+        calls = PHASE_CALLS[phase]
+        full = self._cost(self.schedule)
+        overhead = sum(self.speeds[self.models[role]]["overhead_s"]
+                       for step in self.schedule for role, _ in PHASE_CALLS[step])
+        # Share of the expected generation time that still fits (1 = on schedule)
+        scale = 1.0 if full <= remaining else max(0.0, (remaining - overhead) / max(full - overhead, 1e-6))
+
+        caps, planned_s = {}, 0.0
+        for role, call_phase in calls:
+            default = self.defaults[role, call_phase]
+            if scale >= 1.0:
+                cap = dict(default)
+            else:
+                speed = self.speeds[self.models[role]]
+                expected_tokens = min(default["num_predict"], speed["typical_tokens"].get(call_phase, default["num_predict"]))
+                num_predict = min(default["num_predict"], max(PLANNER_MIN_NUM_PREDICT, int(expected_tokens * scale)))
+                timeout = min(default["timeout"], max(PLANNER_MIN_TIMEOUT_S,
+                              math.ceil(self._call_s(role, call_phase, num_predict) * PLANNER_TIMEOUT_HEADROOM)))
+                cap = {"num_predict": num_predict, "timeout": timeout}
+            caps[role] = cap
+            planned_s += self._call_s(role, call_phase, cap["num_predict"])
+
+        done_rounds = sum(1 for p in self.phases if p["phase"] == "exchange")
+        label = {"baseline": "Baselines", "final": "Finals", "critic": "Critic"}.get(phase, f"Round {done_rounds + 1}")
+        self._current = {"phase": phase, "label": label, "planned_s": round(planned_s, 1),
+                         "scale": round(min(scale, 1.0), 2), "caps": caps, "_started": time.monotonic()}
+        return phase, caps
+
+    def finish_step(self):
+        """Records the actual duration of the phase handed out by the last next_step()."""
+        current = self._current
+        current["actual_s"] = round(time.monotonic() - current.pop("_started"), 1)
+        self.phases.append(current)
+        self.schedule.pop(0)
+        self._current = None
+
+    def report(self) -> dict:
+        """Planned against actual time for the whole debate and each phase."""
+        actual = self.elapsed_s
+        return {
+            "budget_s": self.budget_s, "planned_s": round(self.planned_s, 1), "actual_s": round(actual, 1),
+            "within_budget": actual <= self.budget_s,
+            "rounds_requested": self.rounds, "rounds_run": self.rounds - self.skipped_rounds,
+            "rounds_skipped": self.skipped_rounds,
+            "phases": self.phases,
+            "speeds": {m: {"tokens_per_s": round(s["tokens_per_s"], 1), "overhead_s": round(s["overhead_s"], 2),
+                           "source": s["source"]} for m, s in self.speeds.items()},
+        }
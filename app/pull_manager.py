@@ -0,0 +1,191 @@
+# app/pull_manager.py
+import json
+import logging
+import subprocess
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+from app.config import OLLAMA_API_BASE, PULL_MAX_CONCURRENT
+from app.model_registry import get_registry
+
+log = logging.getLogger(__name__)
+
+THROUGHPUT_WINDOW_S = 10  # Throughput is averaged over this many seconds of samples
+
+ACTIVE_STATES = ("queued", "running")
+
+
+class PullJob:
+    """Progress of a single model pull, updated by a worker thread and read by the UI."""
+    def __init__(self, model_name: str):
+        self.model_name = model_name
+        self.state = "queued"      # queued -> running -> success | error | cancelled
+        self.status = "Waiting for a free download slot..."
+        self.error = ""
+        self.layers = {}           # digest -> {"total": bytes, "completed": bytes}
+        self.created_at = time.time()
+        self.finished_at = None
+        self._samples = deque()    # (timestamp, completed_bytes)
+        self._process = None
+        self._lock = threading.Lock()
+
+    # --- Updates (worker thread) ---
+
+    def _apply_event(self, event: dict):
+        with self._lock:
+            if self.state != "cancelled":
+                self.status = event.get("status", self.status)
+            digest = event.get("digest")
+            if digest and event.get("total"):
+                self.layers[digest] = {"total": event["total"], "completed": event.get("completed", 0)}
+                now = time.time()
+                self._samples.append((now, self._completed_locked()))
+                while self._samples and now - self._samples[0][0] > THROUGHPUT_WINDOW_S:
+                    self._samples.popleft()
+
+    def _completed_locked(self) -> int:
+        return sum(layer["completed"] for layer in self.layers.values())
+
+    # --- Read-only views (UI thread) ---
+
+    @property
+    def is_active(self) -> bool:
+        return self.state in ACTIVE_STATES
+
+    def snapshot(self) -> dict:
+        """A consistent copy of the job's progress for rendering."""
+        with self._lock:
+            total = sum(layer["total"] for layer in self.layers.values())
+            completed = self._completed_locked()
+            throughput = 0.0
+            if len(self._samples) >= 2:
+                (t0, b0), (t1, b1) = self._samples[0], self._samples[-1]
+                if t1 > t0:
+                    throughput = (b1 - b0) / (t1 - t0)
+            eta_s = (total - completed) / throughput if throughput > 0 else None
+            return {
+                "model": self.model_name,
+                "state": self.state,
+                "status": self.status,
+                "error": self.error,
+                "total_bytes": total,
+                "completed_bytes": completed,
+                "fraction": completed / total if total else (1.0 if self.state == "success" else 0.0),
+                "bytes_per_s": throughput,
+                "eta_s": eta_s,
+                "layers": {digest: dict(layer) for digest, layer in self.layers.items()},
+            }
+
+
+class PullManager:
+    """
+    Process-wide queue of model pulls driven by the streaming /api/pull endpoint.
+
+    Up to PULL_MAX_CONCURRENT pulls run at once; the rest wait in the queue.
+    Jobs live in this process, not in a Streamlit session, so they keep running
+    while the user navigates to other pages.
+    """
+    def __init__(self, max_concurrent: int = PULL_MAX_CONCURRENT):
+        self._executor = ThreadPoolExecutor(max_workers=max_concurrent, thread_name_prefix="ollama-pull")
+        self._jobs = {}
+        self._lock = threading.Lock()
+
+    def submit(self, model_name: str) -> PullJob:
+        """Queues a pull. Returns the existing job if this model is already being pulled."""
+        with self._lock:
+            existing = self._jobs.get(model_name)
+            if existing and existing.is_active:
+                return existing
+            job = PullJob(model_name)
+            self._jobs[model_name] = job
+        self._executor.submit(self._run, job)
+        log.info(f"Queued pull for {model_name}")
+        return job
+
+    def jobs(self) -> list[PullJob]:
+        with self._lock:
+            return sorted(self._jobs.values(), key=lambda job: job.created_at)
+
+    def active_jobs(self) -> list[PullJob]:
+        return [job for job in self.jobs() if job.is_active]
+
+    def cancel(self, model_name: str):
+        with self._lock:
+            job = self._jobs.get(model_name)
+        if not job:
+            return
+        # Under the job lock, so _run either sees the cancel before starting curl or has
+        # already published its process here to be terminated
+        with job._lock:
+            if not job.is_active:
+                return
+            job.state = "cancelled"
+            job.status = "Cancelled"
+            if job._process:
+                job._process.terminate()
+
+    def clear_finished(self):
+        with self._lock:
+            self._jobs = {name: job for name, job in self._jobs.items() if job.is_active}
+
+    def _run(self, job: PullJob):
+        with job._lock:
+            if job.state != "queued":
+                return
+            job.state = "running"
+            job.status = "Starting..."
+        curl_cmd = [
+            "curl", "-s", "-N", f"{OLLAMA_API_BASE}/api/pull",
+            "-d", json.dumps({"model": job.model_name, "stream": True})
+        ]
+        last_status = ""
+        try:
+            process = subprocess.Popen(
+                curl_cmd, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, text=True, encoding='utf-8'
+            )
+            with job._lock:
+                job._process = process
+                if job.state == "cancelled":  # Cancelled while curl was starting
+                    process.terminate()
+            for line in process.stdout:
+                if not line.strip():
+                    continue
+                try:
+                    event = json.loads(line)
+                except json.JSONDecodeError:
+                    continue
+                if "error" in event:
+                    job.error = event["error"]
+                    break
+                last_status = event.get("status", last_status)
+                job._apply_event(event)
+            process.stdout.close()
+            process.wait()
+        except Exception as e:
+            job.error = f"Python Exception: {str(e)}"
+
+        with job._lock:
+            job.finished_at = time.time()
+            # A pull that reached "success" installed the model, even if a cancel arrived too late to stop it
+            if last_status == "success" and not job.error:
+                job.state = "success"
+                job.status = "success"
+            elif job.state != "cancelled":
+                job.state = "error"
+                job.error = job.error or f"Pull ended unexpectedly (last status: {job.status})."
+        if job.state == "success":
+            log.info(f"Pull for {job.model_name} complete.")
+            get_registry().invalidate()
+        elif job.state == "cancelled":
+            log.info(f"Pull for {job.model_name} cancelled.")
+        else:
+            log.error(f"Pull for {job.model_name} failed: {job.error}")
+
+
+_PULL_MANAGER = PullManager()
+
+def get_pull_manager() -> PullManager:
+    """Returns the single pull manager shared by every page in this process."""
+    return _PULL_MANAGER
@@ -0,0 +1,133 @@
+# app/quant_explorer.py
+import logging
+from collections import defaultdict
+
+import pandas as pd
+
+from app.runner import run_ollama, unload_model
+from app.scheduler import request_context, PRIORITY_BATCH
+from app.comparator import ComparatorCoordinator
+from app.model_registry import get_registry
+from app.memory_fit import QUANT_BITS_PER_WEIGHT, parse_quant_from_name
+from app.config import CAPS_COMPARISON
+
+log = logging.getLogger(__name__)
+
+QUALITY_TOLERANCE = 0.5  # Score points a cheaper variant may lose and still be recommended
+
+def _quant_of(model: dict) -> str:
+    return (model.get("quantization") or parse_quant_from_name(model["name"]) or "?").upper()
+
+def group_variants(models: list[dict]) -> dict:
+    """
+    Groups installed tags that are the same model at different quantizations.
+    Tags are grouped by repository name and parameter size, e.g. "llama3:8b" and
+    "llama3:8b-instruct-q8_0" both land in "llama3 (8.0B)". Only groups with
+    two or more quantizations are returned.
+    """
+    groups = defaultdict(list)
+    for model in models:
+        repo = model["name"].split(":")[0]
+        groups[f"{repo} ({model.get('parameter_size') or '?'})"].append(model)
+
+    result = {}
+    for key, variants in groups.items():
+        if len({_quant_of(m) for m in variants}) >= 2:
+            result[key] = sorted(variants, key=lambda m: QUANT_BITS_PER_WEIGHT.get(_quant_of(m), 0))
+    return result
+
+@request_context(priority=PRIORITY_BATCH)
+def evaluate_variants(variant_names: list[str], suite: list[dict], judge: bool = True,
+                      on_progress=None) -> pd.DataFrame:
+    """
+    Runs every prompt of the suite on every variant and returns one row per (variant, prompt).
+
+    Each variant is unloaded first, so its first call measures the cold load time,
+    and its resident size is read from /api/ps right after. With judge=True the
+    critic scores every response on its own 1-10 scale.
+    """
+    registry = get_registry()
+    comparator = ComparatorCoordinator()
+    total = len(variant_names) * len(suite) * (2 if judge else 1)
+    done = 0
+    rows = []
+
+    for name in variant_names:
+        model = registry.get_model(name, with_details=False) or {"name": name}
+        unload_model(name)
+        resident_bytes = None
+
+        for i, item in enumerate(suite):
+            success, response, metrics, error = run_ollama(
+                model_name=name, prompt=item["prompt"], temperature=0.0, **CAPS_COMPARISON
+            )
+            if resident_bytes is None:
+                resident_bytes = registry.loaded_models().get(name, {}).get("size_bytes")
+            done += 1
+            if on_progress:
+                on_progress(done, total, f"{name}: {item['id']}")
+
+            score = None
+            if judge and success:
+                score = comparator.score_response(item["prompt"], response)["score"]
+            if judge:
+                done += 1
+                if on_progress:
+                    on_progress(done, total, f"critic scoring {name}: {item['id']}")
+
+            rows.append({
+                "variant": name, "quant": _quant_of(model), "prompt_id": item["id"], "mode": item["mode"],
+                "ok": success, "error": error,
+                "load_s": metrics.get("time_load_s") if i == 0 else None,
+                "prefill_tok_s": metrics.get("prefill_tokens_per_s"),
+                "decode_tok_s": metrics.get("tokens_per_s"),
+                "disk_gb": round(model.get("size_bytes", 0) / 1e9, 2),
+                "memory_gb": round(resident_bytes / 1e9, 2) if resident_bytes else None,
+                "quality": score,
+            })
+        # Keep the next variant's load measurement and memory reading clean
+        unload_model(name)
+
+    return pd.DataFrame(rows)
+
+def summarize_variants(results: pd.DataFrame) -> pd.DataFrame:
+    """One row per variant with speed, memory and quality, plus its place on the frontier."""
+    ok = results[results["ok"]]
+    if ok.empty:
+        return pd.DataFrame()
+    summary = ok.groupby(["variant", "quant"]).agg(
+        load_s=("load_s", "max"),
+        prefill_tok_s=("prefill_tok_s", "mean"),
+        decode_tok_s=("decode_tok_s", "mean"),
+        disk_gb=("disk_gb", "first"),
+        memory_gb=("memory_gb", "first"),
+        quality=("quality", "mean"),
+    ).reset_index()
+    summary["bits_per_weight"] = summary["quant"].map(QUANT_BITS_PER_WEIGHT)
+    summary["on_frontier"] = _pareto_frontier(summary)
+    return summary.round(2).sort_values("bits_per_weight")
+
+def _pareto_frontier(summary: pd.DataFrame) -> pd.Series:
+    """A variant is on the frontier if no other variant is at least as fast AND at least as good."""
+    quality = summary["quality"].fillna(0).to_numpy()
+    speed = summary["decode_tok_s"].fillna(0).to_numpy()
+    on_frontier = []
+    for i in range(len(summary)):
+        dominated = ((speed >= speed[i]) & (quality >= quality[i]) &
+                     ((speed > speed[i]) | (quality > quality[i]))).any()
+        on_frontier.append(not dominated)
+    return pd.Series(on_frontier, index=summary.index)
+
+def recommend_variant(summary: pd.DataFrame) -> dict:
+    """
+    The fastest frontier variant whose quality is within QUALITY_TOLERANCE of the best.
+    Without quality scores, simply the fastest variant.
+    """
+    if summary.empty:
+        return {}
+    if summary["quality"].notna().any():
+        best_quality = summary["quality"].max()
+        candidates = summary[summary["on_frontier"] & (summary["quality"] >= best_quality - QUALITY_TOLERANCE)]
+    else:
+        candidates = summary
+    return candidates.sort_values("decode_tok_s", ascending=False).iloc[0].to_dict()
@@ -4,6 +4,9 @@ import json
 import os
 import logging
 import time
+from app.config import OLLAMA_API_BASE, SCHEDULER_MAX_WAIT_S
+from app.model_options import get_model_options
+from app.scheduler import get_scheduler
 
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
 log = logging.getLogger(__name__)
@@ -16,21 +19,29 @@ def run_ollama(model_name: str,
                prompt: str, 
                temperature: float = 0.5, 
                num_predict: int = 300, 
-               timeout: int = 60) -> tuple[bool, str, dict, str]:
+               timeout: int = 60,
+               options: dict = None,
+               use_saved_options: bool = True) -> tuple[bool, str, dict, str]:
     """
     Runs an Ollama model generation call via the REST API (curl)
     for robust timeout and parameter control.
+    Extra Ollama options (num_ctx, num_batch, num_thread, ...) can be passed in `options`;
+    they take precedence over the model's saved defaults from app.model_options.
+    Measurements (sweeps, benchmarks) pass use_saved_options=False so that unset
+    options run at the server default, whatever was saved in the Playground.
 
     Returns:
         A tuple (success: bool, output: str, metrics: dict, error: str)
     """
-    api_url = "http://localhost:11434/api/generate"
+    api_url = f"{OLLAMA_API_BASE}/api/generate"
     
     payload = {
         "model": model_name,
         "prompt": prompt,
         "stream": False,
         "options": {
+            **(get_model_options(model_name) if use_saved_options else {}),
+            **(options or {}),
             "temperature": temperature,
             "num_predict": num_predict
         }
@@ -40,6 +51,17 @@ def run_ollama(model_name: str,
         "curl", "-s", api_url, "-d", json.dumps(payload)
     ]
 
+    # Wait for a free server slot; the wait is reported separately from the call's own timing
+    with get_scheduler().slot(model_name) as ticket:
+        if ticket is None:
+            return False, "", {}, f"Queue Timeout: no free slot for {model_name} within {SCHEDULER_MAX_WAIT_S}s."
+        success, response_text, metrics, error = _post_generate(curl_cmd, model_name, num_predict, timeout)
+    if success:
+        metrics["time_queue_s"] = round(ticket.wait_s, 2)
+    return success, response_text, metrics, error
+
+def _post_generate(curl_cmd: list, model_name: str, num_predict: int, timeout: int) -> tuple[bool, str, dict, str]:
+    """Sends one /api/generate request and parses the reply into run_ollama's return values."""
     try:
         log.info(f"Running model {model_name} with num_predict={num_predict}, timeout={timeout}s")
         
@@ -86,6 +108,141 @@ def run_ollama(model_name: str,
         log.error(f"Generic exception in run_ollama: {e}")
         return False, "", {}, f"Python Exception: {str(e)}"
 
+def ollama_api(endpoint: str, payload: dict = None, method: str = None,
+               timeout: int = 30) -> tuple[bool, dict, str]:
+    """
+    Calls one of the JSON endpoints of the Ollama REST API (e.g. "tags", "show", "ps").
+    Sends a POST when a payload is given, otherwise a GET, unless method overrides it.
+
+    Returns:
+        A tuple (success: bool, response: dict, error: str)
+    """
+    curl_cmd = ["curl", "-s", f"{OLLAMA_API_BASE}/api/{endpoint}"]
+    if method:
+        curl_cmd += ["-X", method]
+    if payload is not None:
+        curl_cmd += ["-d", json.dumps(payload)]
+
+    try:
+        result = subprocess.run(
+            curl_cmd, capture_output=True, text=True, timeout=timeout, check=True, encoding='utf-8'
+        )
+    except subprocess.TimeoutExpired:
+        return False, {}, f"Timeout: /api/{endpoint} exceeded {timeout} seconds."
+    except subprocess.CalledProcessError as e:
+        return False, {}, f"Could not reach Ollama at {OLLAMA_API_BASE} (curl exit {e.returncode})."
+    except Exception as e:
+        return False, {}, f"Python Exception: {str(e)}"
+
+    # Some endpoints (e.g. DELETE /api/delete) answer with an empty body on success
+    if not result.stdout.strip():
+        return True, {}, ""
+    try:
+        response_json = json.loads(result.stdout)
+    except json.JSONDecodeError:
+        return False, {}, f"Ollama JSON Decode Error: {result.stdout[:200]}"
+    if isinstance(response_json, dict) and "error" in response_json:
+        return False, response_json, f"Ollama API Error: {response_json['error']}"
+    return True, response_json, ""
+
+class ChatStream:
+    """
+    One streamed /api/chat call. Iterate over it to receive the reply text as it is
+    generated (it can be handed straight to st.write_stream); once exhausted,
+    success, output, metrics and error are filled in like run_ollama's return values.
+    metrics also carries "ttft_s", the client-side time to the first token (queue wait
+    excluded), and "time_queue_s", the time spent waiting for a server slot.
+    The slot is held until the stream ends or the iterator is closed.
+    """
+    def __init__(self, model_name: str, messages: list, temperature: float = 0.5,
+                 num_predict: int = 300, timeout: int = 60, options: dict = None,
+                 keep_alive: str = "10m"):
+        self.model_name = model_name
+        self.payload = {
+            "model": model_name,
+            "messages": messages,
+            "stream": True,
+            "keep_alive": keep_alive,
+            "options": {**get_model_options(model_name), **(options or {}),
+                        "temperature": temperature, "num_predict": num_predict}
+        }
+        self.timeout = timeout
+        self.success = False
+        self.output = ""
+        self.metrics = {}
+        self.error = ""
+
+    def __iter__(self):
+        curl_cmd = [
+            "curl", "-s", "-N", "--max-time", str(self.timeout),
+            f"{OLLAMA_API_BASE}/api/chat", "-d", json.dumps(self.payload)
+        ]
+        with get_scheduler().slot(self.model_name) as ticket:
+            if ticket is None:
+                self.error = f"Queue Timeout: no free slot for {self.model_name} within {SCHEDULER_MAX_WAIT_S}s."
+                self.metrics = {}
+                return
+            yield from self._stream(curl_cmd)
+        self.metrics["time_queue_s"] = round(ticket.wait_s, 2)
+
+    def _stream(self, curl_cmd: list):
+        log.info(f"Streaming chat with {self.model_name} ({len(self.payload['messages'])} messages)")
+        start = time.perf_counter()
+        ttft_s = None
+        chunks = []
+        process = None
+        try:
+            process = subprocess.Popen(curl_cmd, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL,
+                                       text=True, encoding='utf-8')
+            for line in process.stdout:
+                if not line.strip():
+                    continue
+                try:
+                    event = json.loads(line)
+                except json.JSONDecodeError:
+                    continue
+                if "error" in event:
+                    self.error = f"Ollama API Error: {event['error']}"
+                    break
+                text = event.get("message", {}).get("content", "")
+                if text:
+                    if ttft_s is None:
+                        ttft_s = time.perf_counter() - start
+                    chunks.append(text)
+                    yield text
+                if event.get("done"):
+                    self.metrics = parse_ollama_metrics(event)
+                    self.success = True
+            process.stdout.close()
+            process.wait()
+            if process.returncode == 28:
+                self.error = f"Timeout: Model call exceeded {self.timeout} seconds."
+        except Exception as e:
+            log.error(f"Generic exception in ChatStream: {e}")
+            self.error = f"Python Exception: {str(e)}"
+        finally:
+            # Closed early (e.g. a Streamlit rerun mid-reply): stop curl so the server stops generating
+            if process and process.poll() is None:
+                process.terminate()
+                process.wait()
+
+        if self.error:
+            self.success = False
+        elif not self.success:
+            self.error = "Stream ended before the model finished."
+        self.output = "".join(chunks)
+        self.metrics["ttft_s"] = round(ttft_s, 2) if ttft_s is not None else 0
+
+def unload_model(model_name: str) -> tuple[bool, str]:
+    """Asks the server to drop a model from memory right away (keep_alive=0)."""
+    success, _, error = ollama_api("generate", {"model": model_name, "keep_alive": 0})
+    return success, error
+
+def get_server_version() -> str:
+    """The Ollama server version, or "" if the server can't be reached."""
+    success, response, _ = ollama_api("version", timeout=5)
+    return response.get("version", "") if success else ""
+
 def parse_ollama_metrics(response_json: dict) -> dict:
     """Helper to extract and calculate key performance metrics from Ollama response."""
     try:
@@ -93,6 +250,7 @@ def parse_ollama_metrics(response_json: dict) -> dict:
         total_s = response_json.get("total_duration", 0) / 1e9
         load_s = response_json.get("load_duration", 0) / 1e9
         gen_s = response_json.get("eval_duration", 0) / 1e9
+        prefill_s = response_json.get("prompt_eval_duration", 0) / 1e9
         
         tokens_in = response_json.get("prompt_eval_count", 0)
         tokens_out = response_json.get("eval_count", 0)
@@ -101,6 +259,9 @@ def parse_ollama_metrics(response_json: dict) -> dict:
         tok_per_s = 0
         if gen_s > 0:
             tok_per_s = tokens_out / gen_s
+        prefill_tok_per_s = 0
+        if prefill_s > 0:
+            prefill_tok_per_s = tokens_in / prefill_s
 
         return {
             "time_total_s": round(total_s, 2),
@@ -108,7 +269,9 @@ def parse_ollama_metrics(response_json: dict) -> dict:
             "time_gen_s": round(gen_s, 2),
             "tokens_in": tokens_in,
             "tokens_out": tokens_out,
-            "tokens_per_s": round(tok_per_s, 2)
+            "tokens_per_s": round(tok_per_s, 2),
+            "time_prefill_s": round(prefill_s, 2),
+            "prefill_tokens_per_s": round(prefill_tok_per_s, 2)
         }
     except Exception as e:
         log.error(f"Failed to parse metrics: {e}")
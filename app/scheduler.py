@@ -0,0 +1,204 @@
+# app/scheduler.py
+import contextvars
+import itertools
+import logging
+import os
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+
+from app.config import (
+    SCHEDULER_SLOTS_PER_MODEL, SCHEDULER_MAX_LOADED_MODELS, SCHEDULER_AGING_S, SCHEDULER_MAX_WAIT_S,
+    SCHEDULER_SESSION_TTL_S
+)
+
+log = logging.getLogger(__name__)
+
+# Priority classes, most urgent first
+PRIORITY_INTERACTIVE = 0  # Playground: someone is watching the reply stream in
+PRIORITY_DEBATE = 1       # Debate App and other single-shot page actions (the default)
+PRIORITY_BATCH = 2        # Batch evaluations, quantization runs, parameter sweeps
+PRIORITY_NAMES = {PRIORITY_INTERACTIVE: "interactive", PRIORITY_DEBATE: "debate", PRIORITY_BATCH: "batch"}
+
+# Who is asking, and how urgently. Set by the pages (and batch entry points) with
+# request_context(); read by run_ollama/ChatStream when they ask for a slot.
+_PRIORITY = contextvars.ContextVar("ollama_priority", default=PRIORITY_DEBATE)
+_SESSION = contextvars.ContextVar("ollama_session", default="")
+
+WAIT_SAMPLES = 500  # Recent queue waits kept for the stats
+
+
+@contextmanager
+def request_context(priority: int = None, session: str = None):
+    """
+    Tags the model calls made inside the block (also usable as a function decorator)
+    with a priority class and the session they belong to. Unset values are inherited.
+    """
+    tokens = []
+    if priority is not None:
+        tokens.append((_PRIORITY, _PRIORITY.set(priority)))
+    if session is not None:
+        tokens.append((_SESSION, _SESSION.set(session)))
+    try:
+        yield
+    finally:
+        for var, token in reversed(tokens):
+            var.reset(token)
+
+
+class Ticket:
+    """One model call's place in the admission queue."""
+    __slots__ = ("model", "priority", "session", "seq", "enqueued_at", "granted", "wait_s")
+
+    def __init__(self, model: str, priority: int, session: str, seq: int):
+        self.model = model
+        self.priority = priority
+        self.session = session
+        self.seq = seq
+        self.enqueued_at = time.monotonic()
+        self.granted = False
+        self.wait_s = 0.0
+
+
+class AdmissionScheduler:
+    """
+    Admission control between every coordinator in this process and the Ollama server.
+
+    Each model gets as many concurrent requests as the server has parallel slots
+    (OLLAMA_NUM_PARALLEL), and the total is capped at that times the number of models
+    the server keeps loaded. Waiting calls are admitted by priority class, then
+    round-robin across sessions (the session served longest ago goes first), then in
+    arrival order. A waiting call moves up one class every SCHEDULER_AGING_S seconds
+    so batch work is delayed, never starved.
+    """
+    def __init__(self, slots_per_model: int = None, max_loaded_models: int = SCHEDULER_MAX_LOADED_MODELS,
+                 aging_s: float = SCHEDULER_AGING_S, max_wait_s: float = SCHEDULER_MAX_WAIT_S,
+                 session_ttl_s: float = SCHEDULER_SESSION_TTL_S):
+        self.slots_per_model = slots_per_model or SCHEDULER_SLOTS_PER_MODEL or \
+            int(os.environ.get("OLLAMA_NUM_PARALLEL", "1"))
+        self.max_active = self.slots_per_model * max_loaded_models
+        self.aging_s = aging_s
+        self.max_wait_s = max_wait_s
+        self.session_ttl_s = session_ttl_s
+        self._cond = threading.Condition()
+        self._seq = itertools.count()
+        self._waiting = []
+        self._active = {}          # model -> calls in flight
+        self._total_active = 0
+        self._last_served = {}     # session -> monotonic time of its last admission, idle ones pruned
+        self._pruned_at = time.monotonic()
+        self._waits = deque(maxlen=WAIT_SAMPLES)  # (priority, wait_s)
+        self._timeouts = 0
+
+    def acquire(self, model: str, priority: int = None, session: str = None, max_wait_s: float = None) -> Ticket:
+        """
+        Blocks until the call may go to the server. Returns its ticket (wait_s is the
+        time spent queued), or None if no slot came free within max_wait_s.
+        """
+        priority = _PRIORITY.get() if priority is None else priority
+        session = _SESSION.get() if session is None else session
+        max_wait_s = self.max_wait_s if max_wait_s is None else max_wait_s
+        with self._cond:
+            ticket = Ticket(model, priority, session, next(self._seq))
+            self._waiting.append(ticket)
+            self._dispatch_locked()
+            deadline = ticket.enqueued_at + max_wait_s
+            while not ticket.granted:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    self._waiting.remove(ticket)
+                    self._timeouts += 1
+                    log.warning(f"No free slot for {model} ({PRIORITY_NAMES.get(priority)}) within {max_wait_s}s")
+                    return None
+                self._cond.wait(remaining)
+        if ticket.wait_s >= 1:
+            log.info(f"Call to {model} ({PRIORITY_NAMES.get(priority)}) waited {ticket.wait_s:.1f}s for a slot")
+        return ticket
+
+    def release(self, ticket: Ticket):
+        with self._cond:
+            self._active[ticket.model] -= 1
+            self._total_active -= 1
+            self._dispatch_locked()
+
+    @contextmanager
+    def slot(self, model: str, **kwargs):
+        """with scheduler.slot(model) as ticket: ... (ticket is None after a queue timeout)."""
+        ticket = self.acquire(model, **kwargs)
+        try:
+            yield ticket
+        finally:
+            if ticket is not None:
+                self.release(ticket)
+
+    def _rank(self, ticket: Ticket, now: float) -> tuple:
+        aged = int((now - ticket.enqueued_at) / self.aging_s) if self.aging_s else 0
+        return (max(PRIORITY_INTERACTIVE, ticket.priority - aged),
+                self._last_served.get(ticket.session, 0.0), ticket.seq)
+
+    def _dispatch_locked(self):
+        """Admits waiting calls, best rank first, while the server has free slots for them."""
+        if not self._waiting or self._total_active >= self.max_active:
+            return
+        now = time.monotonic()
+        admitted = False
+        for ticket in sorted(self._waiting, key=lambda t: self._rank(t, now)):
+            if self._total_active >= self.max_active:
+                break
+            if self._active.get(ticket.model, 0) >= self.slots_per_model:
+                continue
+            self._waiting.remove(ticket)
+            self._active[ticket.model] = self._active.get(ticket.model, 0) + 1
+            self._total_active += 1
+            self._last_served[ticket.session] = now
+            ticket.wait_s = now - ticket.enqueued_at
+            ticket.granted = True
+            self._waits.append((ticket.priority, ticket.wait_s))
+            admitted = True
+        if admitted:
+            self._cond.notify_all()
+        if now - self._pruned_at >= self.session_ttl_s:
+            self._prune_sessions_locked(now)
+
+    def _prune_sessions_locked(self, now: float):
+        """
+        Drops sessions that have nothing waiting and weren't served for session_ttl_s,
+        so every browser session and worker id isn't kept for the life of the process.
+        A forgotten session ranks as served longest ago, which it was anyway.
+        """
+        waiting = {ticket.session for ticket in self._waiting}
+        self._last_served = {session: served for session, served in self._last_served.items()
+                             if session in waiting or now - served < self.session_ttl_s}
+        self._pruned_at = now
+
+    def stats(self) -> dict:
+        """Calls in flight and waiting per model, and recent queue waits per priority class."""
+        with self._cond:
+            waiting = {}
+            for ticket in self._waiting:
+                waiting[ticket.model] = waiting.get(ticket.model, 0) + 1
+            waits = {}
+            for priority, wait_s in self._waits:
+                waits.setdefault(PRIORITY_NAMES.get(priority, str(priority)), []).append(wait_s)
+            return {
+                "slots_per_model": self.slots_per_model,
+                "max_active": self.max_active,
+                "active": {model: n for model, n in self._active.items() if n},
+                "waiting": waiting,
+                "avg_wait_s": {name: round(sum(w) / len(w), 2) for name, w in waits.items()},
+                "max_wait_s": {name: round(max(w), 2) for name, w in waits.items()},
+                "queue_timeouts": self._timeouts,
+            }
+
+
+_SCHEDULER = None
+_SCHEDULER_LOCK = threading.Lock()
+
+def get_scheduler() -> AdmissionScheduler:
+    """Returns the scheduler shared by every session, page and job in this process."""
+    global _SCHEDULER
+    with _SCHEDULER_LOCK:
+        if _SCHEDULER is None:
+            _SCHEDULER = AdmissionScheduler()
+        return _SCHEDULER
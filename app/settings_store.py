@@ -0,0 +1,156 @@
+# app/settings_store.py
+import atexit
+import copy
+import json
+import logging
+import os
+import tempfile
+import threading
+
+from app.config import SETTINGS_FILE, SETTINGS_WRITE_DELAY_S, DEFAULT_PROFILE
+
+log = logging.getLogger(__name__)
+
+
+class SettingsStore:
+    """
+    Named settings profiles, held in memory and written through to one JSON file.
+
+    Reads never touch the disk after the first load. Updates are merged in memory
+    and written after SETTINGS_WRITE_DELAY_S of quiet, so dragging a slider costs one
+    write instead of dozens. Each write goes to a temporary file that then replaces
+    the real one, so a crash or a second process writing at once never leaves a
+    half-written file.
+
+    File layout: {"active_profile": name, "profiles": {name: {setting: value}}}.
+    A flat file from before profiles existed is read as the default profile.
+    """
+    def __init__(self, path: str = SETTINGS_FILE, write_delay_s: float = SETTINGS_WRITE_DELAY_S):
+        self.path = path
+        self.write_delay_s = write_delay_s
+        self._lock = threading.RLock()
+        self._timer = None
+        self._dirty = False
+        self._active, self._profiles = self._load()
+        atexit.register(self.flush)
+
+    def _load(self) -> tuple[str, dict]:
+        data = {}
+        if os.path.exists(self.path):
+            try:
+                with open(self.path, 'r') as f:
+                    data = json.load(f)
+            except Exception as e:
+                log.error(f"Error loading settings file {self.path}: {e}")
+        if "profiles" not in data:
+            return DEFAULT_PROFILE, {DEFAULT_PROFILE: data}
+        profiles = data["profiles"] or {DEFAULT_PROFILE: {}}
+        active = data.get("active_profile")
+        return (active if active in profiles else next(iter(profiles))), profiles
+
+    # --- Reads (memory only) ---
+
+    @property
+    def active_profile(self) -> str:
+        with self._lock:
+            return self._active
+
+    def profile_names(self) -> list[str]:
+        with self._lock:
+            return list(self._profiles)
+
+    def get(self, profile: str = None) -> dict:
+        """A copy of one profile's settings (the active one by default)."""
+        with self._lock:
+            return copy.deepcopy(self._profiles.get(profile or self._active, {}))
+
+    # --- Writes (debounced) ---
+
+    def update(self, values: dict, profile: str = None):
+        """Merges values into a profile (the active one by default) and schedules a write."""
+        with self._lock:
+            settings = self._profiles.setdefault(profile or self._active, {})
+            changed = {k: v for k, v in values.items() if settings.get(k) != v}
+            if not changed:
+                return
+            settings.update(copy.deepcopy(changed))
+            self._schedule_write_locked()
+
+    def save_profile(self, name: str, values: dict, activate: bool = True):
+        """Creates or overwrites a named profile."""
+        with self._lock:
+            self._profiles[name] = copy.deepcopy(values)
+            if activate:
+                self._active = name
+            self._schedule_write_locked()
+
+    def switch_profile(self, name: str) -> dict:
+        """Makes a profile the active one and returns its settings."""
+        with self._lock:
+            if name not in self._profiles:
+                raise KeyError(f"No settings profile named '{name}'")
+            if name != self._active:
+                self._active = name
+                self._schedule_write_locked()
+            return self.get(name)
+
+    def delete_profile(self, name: str) -> bool:
+        """Removes a profile. The last remaining profile can't be deleted."""
+        with self._lock:
+            if name not in self._profiles or len(self._profiles) == 1:
+                return False
+            del self._profiles[name]
+            if self._active == name:
+                self._active = next(iter(self._profiles))
+            self._schedule_write_locked()
+            return True
+
+    def _schedule_write_locked(self):
+        self._dirty = True
+        if self.write_delay_s <= 0:
+            self._write_locked()
+            return
+        # Restart the quiet period on every change; only the last change in a burst writes
+        if self._timer:
+            self._timer.cancel()
+        self._timer = threading.Timer(self.write_delay_s, self.flush)
+        self._timer.daemon = True
+        self._timer.start()
+
+    def flush(self):
+        """Writes pending changes now (also called on interpreter exit)."""
+        with self._lock:
+            if self._timer:
+                self._timer.cancel()
+                self._timer = None
+            if self._dirty:
+                self._write_locked()
+
+    def _write_locked(self):
+        data = {"active_profile": self._active, "profiles": self._profiles}
+        directory = os.path.dirname(self.path) or "."
+        try:
+            os.makedirs(directory, exist_ok=True)
+            fd, tmp_path = tempfile.mkstemp(prefix=".settings-", suffix=".tmp", dir=directory)
+            try:
+                with os.fdopen(fd, 'w') as f:
+                    json.dump(data, f, indent=2)
+                os.replace(tmp_path, self.path)
+            except BaseException:
+                os.unlink(tmp_path)
+                raise
+            self._dirty = False
+        except Exception as e:
+            log.error(f"Failed to write settings file {self.path}: {e}")
+
+
+_SETTINGS_STORE = None
+_SETTINGS_STORE_LOCK = threading.Lock()
+
+def get_settings_store() -> SettingsStore:
+    """Returns the settings store shared by every session in this process."""
+    global _SETTINGS_STORE
+    with _SETTINGS_STORE_LOCK:
+        if _SETTINGS_STORE is None:
+            _SETTINGS_STORE = SettingsStore()
+        return _SETTINGS_STORE
@@ -0,0 +1,94 @@
+# app/sweep.py
+import itertools
+import logging
+import time
+import uuid
+
+import numpy as np
+import pandas as pd
+
+from app.runner import run_ollama
+from app.scheduler import request_context, PRIORITY_BATCH
+from app.config import SWEEP_TIMEOUT
+
+log = logging.getLogger(__name__)
+
+SWEEPABLE_OPTIONS = ("num_ctx", "num_batch", "num_thread", "num_predict")
+
+def build_grid(param_values: dict) -> list[dict]:
+    """Every combination of the given option values, e.g. {"num_ctx": [2048, 4096], "num_batch": [256]}."""
+    params = [name for name, values in param_values.items() if values]
+    return [dict(zip(params, combo)) for combo in itertools.product(*(param_values[p] for p in params))]
+
+@request_context(priority=PRIORITY_BATCH)
+def run_sweep(model_name: str, prompt: str, param_values: dict, repeats: int = 3,
+              on_progress=None) -> pd.DataFrame:
+    """
+    Runs the prompt once per repeat for every option combination and returns one row per call.
+
+    Changing num_ctx/num_batch/num_thread makes Ollama reload the model, so each
+    combination starts with an untimed warm-up call. Every timed call gets a fresh
+    nonce so the prompt-prefix cache can't hide the prefill cost. Options left out of
+    the grid run at the server default, not at the model's saved Playground defaults.
+    """
+    grid = build_grid(param_values)
+    total = len(grid) * repeats
+    done = 0
+    rows = []
+    log.info(f"Sweeping {model_name}: {len(grid)} configurations x {repeats} repeats")
+
+    for config_id, config in enumerate(grid):
+        options = {k: v for k, v in config.items() if k != "num_predict"}
+        num_predict = config.get("num_predict", 128)
+        run_ollama(model_name=model_name, prompt="ok", temperature=0.0, num_predict=1,
+                   timeout=SWEEP_TIMEOUT, options=options, use_saved_options=False)
+
+        for repeat in range(repeats):
+            start = time.perf_counter()
+            success, _, metrics, error = run_ollama(
+                model_name=model_name, prompt=f"[{uuid.uuid4().hex[:8]}] {prompt}", temperature=0.0,
+                num_predict=num_predict, timeout=SWEEP_TIMEOUT, options=options, use_saved_options=False
+            )
+            rows.append({
+                "config_id": config_id, **config, "repeat": repeat, "ok": success, "error": error,
+                "decode_tok_s": metrics.get("tokens_per_s", 0),
+                "prefill_tok_s": metrics.get("prefill_tokens_per_s", 0),
+                "latency_s": round(time.perf_counter() - start, 3),
+                "tokens_out": metrics.get("tokens_out", 0),
+            })
+            done += 1
+            if on_progress:
+                on_progress(done, total, f"config {config_id + 1}/{len(grid)}: {config}")
+
+    return pd.DataFrame(rows)
+
+def summarize_sweep(df: pd.DataFrame) -> pd.DataFrame:
+    """Per-configuration throughput means and latency percentiles, fastest decode first."""
+    ok = df[df["ok"]]
+    if ok.empty:
+        return pd.DataFrame()
+    params = [p for p in SWEEPABLE_OPTIONS if p in ok.columns]
+    summary = ok.groupby("config_id").agg(
+        decode_tok_s=("decode_tok_s", "mean"),
+        decode_tok_s_std=("decode_tok_s", "std"),
+        prefill_tok_s=("prefill_tok_s", "mean"),
+        latency_p50_s=("latency_s", lambda s: np.percentile(s, 50)),
+        latency_p90_s=("latency_s", lambda s: np.percentile(s, 90)),
+        latency_p99_s=("latency_s", lambda s: np.percentile(s, 99)),
+        runs=("latency_s", "size"),
+    )
+    configs = ok.groupby("config_id")[params].first()
+    summary = configs.join(summary).round(2)
+    return summary.sort_values(["decode_tok_s", "latency_p90_s"], ascending=[False, True]).reset_index()
+
+def marginal_throughput(df: pd.DataFrame, param: str) -> pd.DataFrame:
+    """Mean decode and prefill tok/s for each value of one option, averaged over the others."""
+    ok = df[df["ok"]]
+    return ok.groupby(param)[["decode_tok_s", "prefill_tok_s"]].mean()
+
+def recommend(summary: pd.DataFrame) -> dict:
+    """The fastest configuration (highest mean decode tok/s, then lowest p90 latency)."""
+    if summary.empty:
+        return {}
+    best = summary.iloc[0]
+    return {p: int(best[p]) for p in SWEEPABLE_OPTIONS if p in summary.columns and pd.notna(best[p])}
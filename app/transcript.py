@@ -0,0 +1,185 @@
+# app/transcript.py
+import json
+import sys
+from dataclasses import dataclass, field, fields
+from typing import Optional
+
+# Slots cut the per-turn memory of long debates and catch attribute typos.
+# dataclass(slots=True) needs Python 3.10; older interpreters get plain dataclasses.
+_SLOTS = {"slots": True} if sys.version_info >= (3, 10) else {}
+
+
+@dataclass(**_SLOTS)
+class TurnOutput:
+    """One debater's parsed answer in a baseline or exchange round."""
+    side_confirm: str = ""
+    reasoning: str = ""
+    assumptions: str = ""
+    reflection: str = ""
+    stance: str = ""
+    change: str = ""
+    side_mismatch: bool = False
+    error: str = ""
+    raw_output: str = ""
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "TurnOutput":
+        return cls(**{f.name: data[f.name] for f in fields(cls) if data.get(f.name) is not None})
+
+
+@dataclass(**_SLOTS)
+class FinalOutput:
+    """One debater's parsed closing statement."""
+    final: str = ""
+    side: str = ""
+    side_mismatch: bool = False
+    error: str = ""
+    raw_output: str = ""
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "FinalOutput":
+        return cls(**{f.name: data[f.name] for f in fields(cls) if data.get(f.name) is not None})
+
+
+@dataclass(**_SLOTS)
+class Round:
+    round: int
+    mike_output: TurnOutput
+    jimmy_output: TurnOutput
+    mike_metrics: dict = field(default_factory=dict)
+    jimmy_metrics: dict = field(default_factory=dict)
+    mike_capsule: dict = field(default_factory=dict)
+    jimmy_capsule: dict = field(default_factory=dict)
+
+
+@dataclass(**_SLOTS)
+class Finals:
+    mike: FinalOutput
+    jimmy: FinalOutput
+    mike_metrics: dict = field(default_factory=dict)
+    jimmy_metrics: dict = field(default_factory=dict)
+
+
+@dataclass(**_SLOTS)
+class Transcript:
+    """
+    A debate as the coordinator, critic, UI and transcript store all share it.
+
+    Change it through add_round/set_finals/set_critic_report/set_config: they
+    invalidate the cached JSON, so to_json() serializes each state of the debate
+    only once however many consumers (store, download button) ask for it.
+    """
+    debate_id: str
+    ts: float
+    topic: str
+    debate_config: dict = field(default_factory=dict)
+    history: list = field(default_factory=list)
+    finals: Optional[Finals] = None
+    critic_report: Optional[dict] = None
+    _json: Optional[str] = field(default=None, init=False, repr=False, compare=False)
+
+    # --- Mutation ---
+
+    def set_config(self, debate_config: dict):
+        self.debate_config = debate_config
+        self._json = None
+
+    def add_round(self, round_data: Round):
+        self.history.append(round_data)
+        self.finals = None
+        self.critic_report = None
+        self._json = None
+
+    def set_finals(self, finals: Optional[Finals]):
+        self.finals = finals
+        self.critic_report = None
+        self._json = None
+
+    def set_critic_report(self, report: Optional[dict]):
+        self.critic_report = report
+        self._json = None
+
+    # --- Views ---
+
+    def side_mismatch_counts(self) -> tuple[int, int]:
+        """(PRO, CON) number of turns, finals included, where the model broke its side."""
+        pro = sum(r.mike_output.side_mismatch for r in self.history)
+        con = sum(r.jimmy_output.side_mismatch for r in self.history)
+        if self.finals:
+            pro += self.finals.mike.side_mismatch
+            con += self.finals.jimmy.side_mismatch
+        return pro, con
+
+    def arguments_only(self) -> dict:
+        """
+        Just the arguments each side made: the projection the hallucination audit
+        reads. Leaves out raw outputs, capsules, metrics and the critic report.
+        """
+        view = {"topic": self.topic, "rounds": [
+            {"round": r.round, "PRO": r.mike_output.reasoning, "CON": r.jimmy_output.reasoning}
+            for r in self.history
+        ]}
+        if self.finals:
+            view["finals"] = {"PRO": self.finals.mike.final, "CON": self.finals.jimmy.final}
+        return view
+
+    def to_dict(self, include_raw: bool = True) -> dict:
+        """
+        The plain-dict layout of the exported JSON: the dict-based transcript's keys,
+        plus debate_id and ts (when the debate started), which the transcript store uses.
+        """
+        def turn(output) -> dict:
+            data = {f.name: getattr(output, f.name) for f in fields(output)}
+            if not include_raw:
+                data.pop("raw_output")
+            return data
+
+        finals = None
+        if self.finals:
+            finals = {"mike": turn(self.finals.mike), "mike_metrics": self.finals.mike_metrics,
+                      "jimmy": turn(self.finals.jimmy), "jimmy_metrics": self.finals.jimmy_metrics}
+        return {
+            "debate_id": self.debate_id,
+            "ts": self.ts,
+            "topic": self.topic,
+            "debate_config": self.debate_config,
+            "history": [{
+                "round": r.round,
+                "mike_capsule": r.mike_capsule, "mike_output": turn(r.mike_output), "mike_metrics": r.mike_metrics,
+                "jimmy_capsule": r.jimmy_capsule, "jimmy_output": turn(r.jimmy_output), "jimmy_metrics": r.jimmy_metrics,
+            } for r in self.history],
+            "finals": finals,
+            "critic_report": self.critic_report,
+        }
+
+    def to_json(self) -> str:
+        """Compact JSON of the full transcript, computed once per change."""
+        if self._json is None:
+            self._json = json.dumps(self.to_dict(), ensure_ascii=False, separators=(",", ":"))
+        return self._json
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "Transcript":
+        """Rebuilds a transcript from its exported JSON (e.g. one loaded from the transcript store)."""
+        history = [Round(
+            round=r.get("round", i),
+            mike_output=TurnOutput.from_dict(r.get("mike_output") or {}),
+            jimmy_output=TurnOutput.from_dict(r.get("jimmy_output") or {}),
+            mike_metrics=r.get("mike_metrics") or {}, jimmy_metrics=r.get("jimmy_metrics") or {},
+            mike_capsule=r.get("mike_capsule") or {}, jimmy_capsule=r.get("jimmy_capsule") or {},
+        ) for i, r in enumerate(data.get("history") or [])]
+
+        finals = None
+        raw_finals = data.get("finals") or {}
+        if raw_finals.get("mike") or raw_finals.get("jimmy"):
+            finals = Finals(
+                mike=FinalOutput.from_dict(raw_finals.get("mike") or {}),
+                jimmy=FinalOutput.from_dict(raw_finals.get("jimmy") or {}),
+                mike_metrics=raw_finals.get("mike_metrics") or {},
+                jimmy_metrics=raw_finals.get("jimmy_metrics") or {},
+            )
+        return cls(
+            debate_id=data.get("debate_id") or "", ts=data.get("ts") or 0.0, topic=data.get("topic", ""),
+            debate_config=data.get("debate_config") or {}, history=history, finals=finals,
+            critic_report=data.get("critic_report"),
+        )
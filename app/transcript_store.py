@@ -0,0 +1,579 @@
+# app/transcript_store.py
+import argparse
+import glob
+import json
+import logging
+import os
+import re
+import sqlite3
+import threading
+import time
+import uuid
+
+from app.config import TRANSCRIPT_DB_PATH, MODEL_CRITIC
+from app.parsing import infer_debate_winner
+from app.transcript import Transcript
+
+log = logging.getLogger(__name__)
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS debates (
+    id                TEXT PRIMARY KEY,
+    ts                REAL NOT NULL,
+    topic             TEXT NOT NULL,
+    model_pro         TEXT NOT NULL,
+    model_con         TEXT NOT NULL,
+    model_critic      TEXT,
+    temp_pro          REAL,
+    temp_con          REAL,
+    persona_pro       TEXT,
+    persona_con       TEXT,
+    pro_tone TEXT, pro_style TEXT, pro_formality TEXT, pro_complexity TEXT,
+    con_tone TEXT, con_style TEXT, con_formality TEXT, con_complexity TEXT,
+    force_adversarial INTEGER,
+    n_rounds          INTEGER,
+    verdict           TEXT,
+    winner            TEXT,              -- 'PRO', 'CON' or '' when the verdict is unclear
+    source            TEXT NOT NULL,     -- 'app' or 'legacy'
+    transcript_json   TEXT NOT NULL      -- The full transcript, for export and re-display
+);
+CREATE INDEX IF NOT EXISTS idx_debates_ts ON debates (ts);
+CREATE INDEX IF NOT EXISTS idx_debates_topic ON debates (topic);
+CREATE INDEX IF NOT EXISTS idx_debates_model_pro ON debates (model_pro, ts);
+CREATE INDEX IF NOT EXISTS idx_debates_model_con ON debates (model_con, ts);
+CREATE INDEX IF NOT EXISTS idx_debates_winner ON debates (winner, ts);
+
+-- One row per side per round; finals are stored with phase 'final'
+CREATE TABLE IF NOT EXISTS rounds (
+    debate_id     TEXT NOT NULL REFERENCES debates(id) ON DELETE CASCADE,
+    round         INTEGER NOT NULL,
+    phase         TEXT NOT NULL,         -- 'baseline', 'exchange' or 'final'
+    side          TEXT NOT NULL,         -- 'PRO' or 'CON'
+    model         TEXT NOT NULL,
+    reasoning     TEXT,
+    reflection    TEXT,
+    assumptions   TEXT,
+    stance        TEXT,
+    change        TEXT,
+    side_confirm  TEXT,
+    side_mismatch INTEGER,
+    protest       INTEGER,
+    error         TEXT,
+    PRIMARY KEY (debate_id, phase, round, side)
+);
+CREATE INDEX IF NOT EXISTS idx_rounds_model_side ON rounds (model, side);
+
+-- One row per model call, with its performance metrics
+CREATE TABLE IF NOT EXISTS calls (
+    id             INTEGER PRIMARY KEY AUTOINCREMENT,
+    debate_id      TEXT NOT NULL REFERENCES debates(id) ON DELETE CASCADE,
+    ts             REAL NOT NULL,
+    round          INTEGER,
+    phase          TEXT NOT NULL,        -- 'baseline', 'exchange', 'final', 'repair', 'critic' or 'audit'
+    side           TEXT,
+    model          TEXT NOT NULL,
+    tokens_in      INTEGER,
+    tokens_out     INTEGER,
+    tokens_per_s   REAL,
+    prefill_tok_s  REAL,
+    time_total_s   REAL,
+    time_load_s    REAL,
+    time_gen_s     REAL,
+    time_prefill_s REAL,
+    error          TEXT,
+    time_queue_s   REAL                  -- Wait for a free server slot (app.scheduler)
+);
+CREATE INDEX IF NOT EXISTS idx_calls_model_ts ON calls (model, ts);
+CREATE INDEX IF NOT EXISTS idx_calls_debate ON calls (debate_id);
+
+CREATE TABLE IF NOT EXISTS critic_reports (
+    debate_id        TEXT PRIMARY KEY REFERENCES debates(id) ON DELETE CASCADE,
+    verdict          TEXT,
+    winner           TEXT,
+    pro_mismatches   INTEGER,
+    con_mismatches   INTEGER,
+    n_fabrications   INTEGER,
+    fabrications     TEXT,               -- JSON list of flagged phrases
+    audit_error      TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_critic_winner ON critic_reports (winner);
+
+-- Change log: one row per save of a debate. A save deletes and re-inserts the debate's
+-- rows, and SQLite may hand out the same rowids again, so incremental readers
+-- (app/analytics.py) follow this sequence instead of table rowids.
+CREATE TABLE IF NOT EXISTS debate_saves (
+    seq       INTEGER PRIMARY KEY AUTOINCREMENT,
+    debate_id TEXT NOT NULL
+);
+
+-- Full-text search: one document per argument, final, verdict or flagged fabrication.
+-- search_fts is an external-content FTS5 index over search_docs, kept in sync by triggers.
+CREATE TABLE IF NOT EXISTS search_docs (
+    id        INTEGER PRIMARY KEY,
+    debate_id TEXT NOT NULL REFERENCES debates(id) ON DELETE CASCADE,
+    ts        REAL NOT NULL,
+    kind      TEXT NOT NULL,             -- 'argument', 'final', 'verdict' or 'fabrication'
+    round     INTEGER,
+    side      TEXT,
+    model     TEXT,
+    text      TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_search_docs_debate ON search_docs (debate_id);
+CREATE VIRTUAL TABLE IF NOT EXISTS search_fts USING fts5(
+    text, content='search_docs', content_rowid='id', prefix='2 3', tokenize='unicode61'
+);
+CREATE TRIGGER IF NOT EXISTS search_docs_ai AFTER INSERT ON search_docs BEGIN
+    INSERT INTO search_fts (rowid, text) VALUES (new.id, new.text);
+END;
+CREATE TRIGGER IF NOT EXISTS search_docs_ad AFTER DELETE ON search_docs BEGIN
+    INSERT INTO search_fts (search_fts, rowid, text) VALUES ('delete', old.id, old.text);
+END;
+"""
+
+# Builds the search documents of stored debates from their rounds and critic reports
+_INDEX_SEARCH_SQL = (
+    """INSERT INTO search_docs (debate_id, ts, kind, round, side, model, text)
+       SELECT r.debate_id, d.ts, CASE r.phase WHEN 'final' THEN 'final' ELSE 'argument' END,
+              r.round, r.side, r.model, r.reasoning
+       FROM rounds r JOIN debates d ON d.id = r.debate_id
+       WHERE {where} AND COALESCE(r.reasoning, '') != ''""",
+    """INSERT INTO search_docs (debate_id, ts, kind, round, side, model, text)
+       SELECT c.debate_id, d.ts, 'verdict', NULL, NULL, d.model_critic, c.verdict
+       FROM critic_reports c JOIN debates d ON d.id = c.debate_id
+       WHERE {where} AND COALESCE(c.verdict, '') != ''""",
+    """INSERT INTO search_docs (debate_id, ts, kind, round, side, model, text)
+       SELECT c.debate_id, d.ts, 'fabrication', NULL, NULL, d.model_critic, j.value
+       FROM critic_reports c JOIN debates d ON d.id = c.debate_id, json_each(c.fabrications) j
+       WHERE {where} AND c.n_fabrications > 0""",
+)
+
+_SIDES = (("mike", "PRO"), ("jimmy", "CON"))
+
+def _is_protest(side_confirm: str, side: str) -> bool:
+    """A protest is a SIDE_CONFIRM that holds text instead of the assigned side."""
+    return bool(side_confirm) and side_confirm.upper() not in (side, "MISSING", "")
+
+def _to_fts_query(text: str) -> str:
+    """
+    Turns a search box entry into a safe FTS5 query: "quoted phrases" stay phrases,
+    other words are matched individually (all must appear), and a trailing * makes
+    a word a prefix match. Punctuation that FTS5 would treat as syntax is dropped.
+    """
+    terms = []
+    for phrase, word in re.findall(r'"([^"]*)"|(\S+)', text):
+        if phrase:
+            words = re.findall(r'\w+', phrase)
+            if words:
+                terms.append('"' + " ".join(words) + '"')
+            continue
+        words = re.findall(r'\w+', word)
+        terms.extend(f'"{w}"' for w in words)
+        if words and word.endswith("*"):
+            terms[-1] += "*"
+    return " ".join(terms)
+
+def _prefix_range(prefix: str) -> tuple:
+    """Bounds for an index-friendly prefix match: prefix <= value < prefix + U+FFFF."""
+    return prefix, prefix + "￿"
+
+
+class TranscriptStore:
+    """
+    Embedded SQLite store for debate transcripts.
+
+    Runs in WAL mode, so readers (the dashboard) never block the writer, and each
+    debate is written as one batched transaction. Connections are per thread.
+    """
+    def __init__(self, db_path: str = TRANSCRIPT_DB_PATH):
+        self.db_path = db_path
+        self._local = threading.local()
+        with self._connect() as conn:
+            conn.executescript(_SCHEMA)
+            if "time_queue_s" not in {row[1] for row in conn.execute("PRAGMA table_info(calls)")}:
+                conn.execute("ALTER TABLE calls ADD COLUMN time_queue_s REAL")
+            # Databases created before the change log get one entry per stored debate
+            if not conn.execute("SELECT 1 FROM debate_saves LIMIT 1").fetchone():
+                conn.execute("INSERT INTO debate_saves (debate_id) SELECT id FROM debates ORDER BY ts")
+            # Databases created before search existed get their index built once
+            if conn.execute("SELECT 1 FROM debates LIMIT 1").fetchone() and \
+                    not conn.execute("SELECT 1 FROM search_docs LIMIT 1").fetchone():
+                log.info("Building the full-text search index for existing debates...")
+                for sql in _INDEX_SEARCH_SQL:
+                    conn.execute(sql.format(where="1"))
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            os.makedirs(os.path.dirname(self.db_path) or ".", exist_ok=True)
+            conn = sqlite3.connect(self.db_path, timeout=30)
+            conn.row_factory = sqlite3.Row
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute("PRAGMA foreign_keys=ON")
+            self._local.conn = conn
+        return conn
+
+    # --- Writes ---
+
+    def save_debate(self, transcript, source: str = "app") -> str:
+        """
+        Writes (or replaces) one debate (a Transcript or its dict form) with its
+        rounds, calls and critic report. Returns the debate id (generated if missing).
+        """
+        return self.save_debates([transcript], source)[0]
+
+    def save_debates(self, transcripts: list, source: str = "app") -> list[str]:
+        """Writes many debates in a single transaction (used for bulk imports)."""
+        debate_rows, round_rows, call_rows, critic_rows, ids = [], [], [], [], []
+        for transcript in transcripts:
+            if isinstance(transcript, Transcript):
+                # Reuse the transcript's cached JSON instead of serializing it again
+                transcript_json, transcript = transcript.to_json(), transcript.to_dict()
+            else:
+                transcript_json = json.dumps(transcript, ensure_ascii=False, separators=(",", ":"))
+            debate_id = transcript.get("debate_id") or str(uuid.uuid4())
+            ids.append(debate_id)
+            d, r, c, k = self._flatten(debate_id, transcript, transcript_json, source)
+            debate_rows.append(d)
+            round_rows.extend(r)
+            call_rows.extend(c)
+            critic_rows.extend(k)
+
+        conn = self._connect()
+        with conn:
+            # Replacing a debate replaces all of its child rows too
+            conn.executemany("DELETE FROM debates WHERE id = ?", [(i,) for i in ids])
+            conn.executemany(f"INSERT INTO debates VALUES ({','.join('?' * 24)})", debate_rows)
+            conn.executemany(f"INSERT INTO rounds VALUES ({','.join('?' * 14)})", round_rows)
+            conn.executemany(
+                "INSERT INTO calls (debate_id, ts, round, phase, side, model, tokens_in, tokens_out, tokens_per_s, "
+                "prefill_tok_s, time_total_s, time_load_s, time_gen_s, time_prefill_s, error, time_queue_s) "
+                f"VALUES ({','.join('?' * 16)})", call_rows)
+            conn.executemany(f"INSERT INTO critic_reports VALUES ({','.join('?' * 8)})", critic_rows)
+            conn.executemany("INSERT INTO debate_saves (debate_id) VALUES (?)", [(i,) for i in ids])
+            for sql in _INDEX_SEARCH_SQL:
+                conn.executemany(sql.format(where="d.id = ?"), [(i,) for i in ids])
+        log.info(f"Stored {len(ids)} debate(s) in {self.db_path}")
+        return ids
+
+    def _flatten(self, debate_id: str, transcript: dict, transcript_json: str, source: str) -> tuple:
+        config = transcript.get("debate_config", {})
+        models = {"PRO": config.get("model_pro", ""), "CON": config.get("model_con", "")}
+        style = {side: config.get(f"style_{side.lower()}", {}) for side in ("PRO", "CON")}
+        ts = transcript.get("ts") or time.time()
+        history = transcript.get("history") or []
+        finals = transcript.get("finals") or {}
+        report = transcript.get("critic_report") or {}
+        verdict = report.get("verdict", "")
+        winner = infer_debate_winner(verdict, models["PRO"], models["CON"]) if verdict else ""
+
+        debate_row = (
+            debate_id, ts, transcript.get("topic", ""), models["PRO"], models["CON"],
+            config.get("model_critic", MODEL_CRITIC), config.get("temp_pro"), config.get("temp_con"),
+            config.get("persona_pro"), config.get("persona_con"),
+            *(style["PRO"].get(k) for k in ("tone", "style", "formality", "complexity")),
+            *(style["CON"].get(k) for k in ("tone", "style", "formality", "complexity")),
+            int(bool(config.get("force_adversarial"))), max(len(history) - 1, 0),
+            verdict, winner, source, transcript_json,
+        )
+
+        round_rows, call_rows = [], []
+        def add_call(round_num, phase, side, model, metrics, error):
+            call_rows.append((
+                debate_id, ts, round_num, phase, side, model,
+                metrics.get("tokens_in"), metrics.get("tokens_out"), metrics.get("tokens_per_s"),
+                metrics.get("prefill_tokens_per_s"), metrics.get("time_total_s"), metrics.get("time_load_s"),
+                metrics.get("time_gen_s"), metrics.get("time_prefill_s"), error, metrics.get("time_queue_s"),
+            ))
+
+        def add_turn(round_num, phase, side, output, metrics):
+            output, metrics = output or {}, metrics or {}
+            side_confirm = output.get("side_confirm", output.get("side", ""))
+            round_rows.append((
+                debate_id, round_num, phase, side, models[side],
+                output.get("reasoning", output.get("final")), output.get("reflection"),
+                output.get("assumptions"), output.get("stance"), output.get("change"),
+                side_confirm, int(bool(output.get("side_mismatch"))),
+                int(_is_protest(side_confirm, side)), output.get("error"),
+            ))
+            if metrics or output.get("error"):
+                add_call(round_num, phase, side, models[side], metrics, output.get("error"))
+            for repair in metrics.get("repairs") or []:
+                add_call(round_num, "repair", side, models[side], repair, repair.get("error"))
+
+        for round_data in history:
+            round_num = round_data.get("round", 0)
+            phase = "baseline" if round_num == 0 else "exchange"
+            for prefix, side in _SIDES:
+                add_turn(round_num, phase, side, round_data.get(f"{prefix}_output"), round_data.get(f"{prefix}_metrics"))
+        for prefix, side in _SIDES:
+            if finals.get(prefix):
+                add_turn(len(history), "final", side, finals.get(prefix), finals.get(f"{prefix}_metrics"))
+
+        critic_rows = []
+        if report:
+            if report.get("verdict_metrics"):
+                add_call(None, "critic", None, debate_row[5], report["verdict_metrics"], None)
+            audit = report.get("hallucination_audit") or {}
+            if report.get("audit_metrics") or audit.get("details"):
+                # "details" holds the run error when the audit call itself failed
+                add_call(None, "audit", None, debate_row[5], report.get("audit_metrics") or {}, audit.get("details"))
+            drift = report.get("drift_audit", {})
+            fabrications = audit.get("potential_fabrications") or []
+            critic_rows.append((
+                debate_id, verdict, winner, drift.get("total_pro_mismatches"), drift.get("total_con_mismatches"),
+                len(fabrications), json.dumps(fabrications), audit.get("error") or report.get("error"),
+            ))
+        return debate_row, round_rows, call_rows, critic_rows
+
+    # --- Queries ---
+
+    def query_debates(self, model: str = None, side: str = None, topic: str = None,
+                      since: float = None, until: float = None, winner: str = None,
+                      limit: int = 100) -> list[dict]:
+        """
+        Finds debates, newest first. All filters are optional and combine with AND.
+
+        model matches a model name prefix ("llama3" matches "llama3:8b"); with side
+        ("PRO" or "CON") it must have argued that side, otherwise either side.
+        topic is a case-insensitive substring; since/until are unix timestamps;
+        winner is "PRO" or "CON".
+        """
+        clauses, params = [], []
+        if model:
+            low, high = _prefix_range(model)
+            if side:
+                column = "model_pro" if side.upper() == "PRO" else "model_con"
+                clauses.append(f"({column} >= ? AND {column} < ?)")
+                params += [low, high]
+            else:
+                clauses.append("((model_pro >= ? AND model_pro < ?) OR (model_con >= ? AND model_con < ?))")
+                params += [low, high, low, high]
+        if topic:
+            clauses.append("topic LIKE ?")
+            params.append(f"%{topic}%")
+        if since:
+            clauses.append("ts >= ?")
+            params.append(since)
+        if until:
+            clauses.append("ts < ?")
+            params.append(until)
+        if winner:
+            clauses.append("winner = ?")
+            params.append(winner.upper())
+
+        where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+        rows = self._connect().execute(
+            "SELECT id, ts, topic, model_pro, model_con, n_rounds, winner, verdict, source "
+            f"FROM debates {where} ORDER BY ts DESC LIMIT ?", params + [limit]
+        ).fetchall()
+        return [dict(row) for row in rows]
+
+    def get_transcript(self, debate_id: str) -> dict:
+        """The full stored transcript of one debate, or None."""
+        row = self._connect().execute(
+            "SELECT transcript_json FROM debates WHERE id = ?", (debate_id,)
+        ).fetchone()
+        return json.loads(row["transcript_json"]) if row else None
+
+    def recent_calls(self, model: str, phase: str = None, limit: int = 200,
+                     include_errors: bool = False) -> list[dict]:
+        """A model's latest successful (or, with include_errors, all) calls: phase, tokens, timings. Newest first."""
+        clauses, params = ["model = ?"], [model]
+        if not include_errors:
+            clauses += ["(error IS NULL OR error = '')", "tokens_out > 0"]
+        if phase:
+            clauses.append("phase = ?")
+            params.append(phase)
+        rows = self._connect().execute(
+            "SELECT phase, tokens_out, tokens_per_s, time_total_s, time_gen_s, time_queue_s, error "
+            f"FROM calls WHERE {' AND '.join(clauses)} ORDER BY ts DESC LIMIT ?", params + [limit]
+        ).fetchall()
+        return [dict(row) for row in rows]
+
+    def read_changed_debates(self, columns_by_table: dict, after_seq: int = 0) -> tuple[int, list, dict]:
+        """
+        Debates saved (new or replaced) since position after_seq of the change log, as
+        (latest seq, their ids, {table: [row tuples with every row those debates have now]}).
+
+        All tables are read in one transaction, so a debate and its child rows always
+        arrive together. Used for incremental loading: pass the seq returned last time
+        and drop the returned ids' old rows before adding the new ones. An id with no
+        rows left was deleted.
+        """
+        unknown = set(columns_by_table) - {"debates", "rounds", "calls", "critic_reports"}
+        if unknown:
+            raise ValueError(f"Unknown table(s): {unknown}")
+        conn = self._connect()
+        conn.execute("BEGIN")
+        try:
+            seq = conn.execute("SELECT COALESCE(MAX(seq), 0) FROM debate_saves").fetchone()[0]
+            if seq == after_seq:
+                return seq, [], {table: [] for table in columns_by_table}
+            ids = [row[0] for row in conn.execute(
+                "SELECT DISTINCT debate_id FROM debate_saves WHERE seq > ?", (after_seq,))]
+            rows = {}
+            for table, columns in columns_by_table.items():
+                key = "id" if table == "debates" else "debate_id"
+                where = "1" if after_seq == 0 else f"{key} IN (SELECT debate_id FROM debate_saves WHERE seq > ?)"
+                rows[table] = [tuple(row) for row in conn.execute(
+                    f"SELECT {', '.join(columns)} FROM {table} WHERE {where} ORDER BY rowid",
+                    () if after_seq == 0 else (after_seq,))]
+            return seq, ids, rows
+        finally:
+            conn.execute("COMMIT")
+
+    def search(self, query: str, model: str = None, side: str = None, since: float = None,
+               until: float = None, kinds: list = None, newest_first: bool = False,
+               limit: int = 50) -> list[dict]:
+        """
+        Full-text search over arguments, finals, critic verdicts and flagged fabrications.
+        See _to_fts_query for the query syntax. model is a name prefix of the model that
+        wrote the text; side is "PRO" or "CON"; kinds limits the document types
+        ("argument", "final", "verdict", "fabrication").
+
+        Results are ranked by relevance (BM25), which scores every match. For words
+        found in most of a large archive, newest_first=True streams the index in
+        reverse order and stops at the limit instead.
+        """
+        fts_query = _to_fts_query(query)
+        if not fts_query:
+            return []
+        clauses, params = ["search_fts MATCH ?"], [fts_query]
+        if model:
+            clauses.append("s.model >= ? AND s.model < ?")
+            params += list(_prefix_range(model))
+        if side:
+            clauses.append("s.side = ?")
+            params.append(side.upper())
+        if since:
+            clauses.append("s.ts >= ?")
+            params.append(since)
+        if until:
+            clauses.append("s.ts < ?")
+            params.append(until)
+        if kinds:
+            clauses.append(f"s.kind IN ({','.join('?' * len(kinds))})")
+            params += list(kinds)
+
+        rows = self._connect().execute(
+            "SELECT s.debate_id, s.ts, s.kind, s.round, s.side, s.model, d.topic, "
+            "snippet(search_fts, 0, '**', '**', ' … ', 20) AS snippet "
+            "FROM search_fts JOIN search_docs s ON s.id = search_fts.rowid JOIN debates d ON d.id = s.debate_id "
+            f"WHERE {' AND '.join(clauses)} ORDER BY {'search_fts.rowid DESC' if newest_first else 'rank'} LIMIT ?",
+            params + [limit]
+        ).fetchall()
+        return [dict(row) for row in rows]
+
+    def list_models(self) -> list[str]:
+        """Every model that has argued in a stored debate."""
+        rows = self._connect().execute(
+            "SELECT model_pro FROM debates UNION SELECT model_con FROM debates ORDER BY 1").fetchall()
+        return [row[0] for row in rows if row[0]]
+
+    def count_debates(self) -> int:
+        return self._connect().execute("SELECT COUNT(*) FROM debates").fetchone()[0]
+
+    # --- Legacy Import ---
+
+    def import_legacy_transcripts(self, directory: str = "logs/transcripts") -> int:
+        """
+        Imports the older per-file JSON transcripts (session_id / turns schema).
+        Already imported sessions are replaced, so this is safe to run again.
+        """
+        transcripts = []
+        for path in sorted(glob.glob(os.path.join(directory, "*.json"))):
+            try:
+                with open(path, "r", encoding="utf-8") as f:
+                    transcripts.append(_convert_legacy_transcript(json.load(f)))
+            except Exception as e:
+                log.warning(f"Skipping legacy transcript {path}: {e}")
+        if transcripts:
+            self.save_debates(transcripts, source="legacy")
+        return len(transcripts)
+
+
+def _convert_legacy_transcript(legacy: dict) -> dict:
+    """Maps the older turn-list transcript onto the current history/finals layout."""
+    positions = legacy.get("positions", {"mike": "PRO", "jimmy": "CON"})
+    prefix_of = {side: prefix for prefix, side in positions.items()}
+    models, rounds, finals = {}, {}, {}
+
+    for turn in legacy.get("turns", []):
+        prefix = turn.get("role", "").lower()
+        data = turn.get("data", {})
+        parsed = data.get("parsed") or {}
+        models[prefix] = data.get("model", "")
+        metrics = {"time_total_s": round(data.get("latency_ms", 0) / 1000, 2)}
+        error = "" if data.get("ok", True) else "Legacy call failed."
+
+        if turn.get("type") == "final":
+            side = data.get("parsed_side", "")
+            finals[prefix] = {"final": data.get("parsed_final") or data.get("output", ""), "side": side,
+                              "side_mismatch": side.upper() != positions.get(prefix, ""), "error": error}
+            finals[f"{prefix}_metrics"] = metrics
+            continue
+
+        round_data = rounds.setdefault(turn.get("round", 0), {"round": turn.get("round", 0)})
+        output = round_data.setdefault(f"{prefix}_output", {})
+        if turn.get("type") == "reflection":
+            output["reflection"] = parsed.get("reflection", parsed.get("assumptions", ""))
+            output["assumptions"] = parsed.get("assumptions", "")
+        else:
+            output.update({
+                "reasoning": parsed.get("reasoning", data.get("output", "")),
+                "side_confirm": parsed.get("side_confirm", data.get("parsed_side", "")),
+                "stance": parsed.get("stance", ""), "change": parsed.get("change", ""), "error": error,
+            })
+            output["side_mismatch"] = output["side_confirm"].upper() != positions.get(prefix, "")
+            round_data[f"{prefix}_metrics"] = metrics
+
+    return {
+        "debate_id": legacy.get("session_id"),
+        "ts": legacy.get("ts"),
+        "topic": legacy.get("topic", ""),
+        "debate_config": {"model_pro": models.get(prefix_of.get("PRO", "mike"), ""),
+                          "model_con": models.get(prefix_of.get("CON", "jimmy"), "")},
+        "history": [rounds[k] for k in sorted(rounds)],
+        "finals": finals,
+        "critic_report": None,
+    }
+
+
+_STORE = None
+_STORE_LOCK = threading.Lock()
+
+def get_transcript_store() -> TranscriptStore:
+    """Returns the single transcript store shared by every page and coordinator."""
+    global _STORE
+    with _STORE_LOCK:
+        if _STORE is None:
+            _STORE = TranscriptStore()
+        return _STORE
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Import and query stored debate transcripts.")
+    sub = parser.add_subparsers(dest="command", required=True)
+    imp = sub.add_parser("import", help="Import the older JSON transcripts")
+    imp.add_argument("directory", nargs="?", default="logs/transcripts")
+    query = sub.add_parser("query", help="List matching debates, newest first")
+    query.add_argument("--model", help="Model name or prefix, e.g. llama3")
+    query.add_argument("--side", choices=["PRO", "CON"], help="Side the model argued")
+    query.add_argument("--topic", help="Substring of the topic")
+    query.add_argument("--winner", choices=["PRO", "CON"])
+    query.add_argument("--limit", type=int, default=20)
+    args = parser.parse_args()
+
+    store = get_transcript_store()
+    if args.command == "import":
+        print(f"Imported {store.import_legacy_transcripts(args.directory)} transcript(s) into {store.db_path}")
+        return
+    for debate in store.query_debates(model=args.model, side=args.side, topic=args.topic,
+                                      winner=args.winner, limit=args.limit):
+        when = time.strftime("%Y-%m-%d %H:%M", time.localtime(debate["ts"]))
+        print(f"{debate['id']}  {when}  {debate['model_pro']} vs {debate['model_con']}  "
+              f"winner={debate['winner'] or '?'}  {debate['topic'][:60]}")
+
+if __name__ == "__main__":
+    main()
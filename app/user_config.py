@@ -1,51 +1,58 @@
 # app/user_config.py
-import json
-import os
 import streamlit as st
+from app.settings_store import get_settings_store
+from app.model_registry import get_registry
 
-# We'll store our user's last-used settings here
-CONFIG_FILE = "config/debate_defaults.json"
+# The Debate App widgets whose values are remembered (per profile)
+SETTINGS_KEYS = [
+    "model_pro", "temp_pro", "persona_pro",
+    "pro_tone", "pro_style", "pro_formality", "pro_complexity",
+    "model_con", "temp_con", "persona_con",
+    "con_tone", "con_style", "con_formality", "con_complexity"
+]
 
-def load_user_defaults():
+def load_user_defaults(profile: str = None) -> dict:
     """
-    Tries to load the user's last-used models from a JSON file.
-    If the file doesn't exist or is corrupt, returns empty defaults.
+    The user's saved settings for a profile (the last one used by default).
+    Served from memory; returns empty defaults if nothing was saved yet.
     """
-    if os.path.exists(CONFIG_FILE):
-        try:
-            with open(CONFIG_FILE, 'r') as f:
-                return json.load(f)
-        except Exception as e:
-            print(f"Error loading config file: {e}")
-            return {} # Return empty dict on error
-    return {} # Return empty dict if file doesn't exist
+    return get_settings_store().get(profile)
 
 def save_user_defaults():
     """
-    This is a callback function. It saves the current selections 
-    from st.session_state to the JSON file.
+    This is a callback function. It saves the current selections from
+    st.session_state into this session's profile. The settings store writes
+    the file shortly after the last change, so slider drags don't hammer the disk.
     """
-    # Ensure the config directory exists
-    os.makedirs(os.path.dirname(CONFIG_FILE), exist_ok=True)
-    
-    # Get all the keys we want to save
-    keys_to_save = [
-        "model_pro", "temp_pro", "persona_pro",
-        "pro_tone", "pro_style", "pro_formality", "pro_complexity",
-        "model_con", "temp_con", "persona_con",
-        "con_tone", "con_style", "con_formality", "con_complexity"
-    ]
-    
-    current_config = load_user_defaults()
+    current = {key: st.session_state[key] for key in SETTINGS_KEYS if key in st.session_state}
+    get_settings_store().update(current, profile=st.session_state.get("profile"))
 
-    # Update the config with all current values from session state
-    for key in keys_to_save:
-        if key in st.session_state:
-            current_config[key] = st.session_state[key]
-    
-    # Write the new config back to the file
-    try:
-        with open(CONFIG_FILE, 'w') as f:
-            json.dump(current_config, f, indent=2)
-    except Exception as e:
-        st.error(f"Failed to save user defaults: {e}")
+def load_profile():
+    """Callback for the profile selector: switches to the chosen profile and fills in its settings."""
+    name = st.session_state.profile
+    settings = get_settings_store().switch_profile(name)
+    installed = set(get_registry().model_names())
+    for key in SETTINGS_KEYS:
+        if key not in settings:
+            continue
+        if key in ("model_pro", "model_con") and settings[key] not in installed:
+            continue  # Keep the current model rather than select one that isn't installed
+        st.session_state[key] = settings[key]
+
+def save_profile_as():
+    """Callback: saves the current settings under a new profile name and makes it active."""
+    name = st.session_state.new_profile_name.strip()
+    if not name:
+        return
+    current = {key: st.session_state[key] for key in SETTINGS_KEYS if key in st.session_state}
+    get_settings_store().save_profile(name, current)
+    st.session_state.profile = name
+    st.session_state.new_profile_name = ""
+    st.toast(f"Saved profile '{name}'", icon="💾")
+
+def delete_current_profile():
+    """Callback: deletes this session's profile and switches to another one."""
+    store = get_settings_store()
+    if store.delete_profile(st.session_state.profile):
+        st.session_state.profile = store.active_profile
+        load_profile()
@@ -0,0 +1,314 @@
+# app/work_queue.py
+import argparse
+import itertools
+import json
+import logging
+import os
+import sqlite3
+import sys
+import threading
+import time
+import uuid
+
+from app.config import (
+    WORK_QUEUE_DB_PATH, WORKER_LEASE_S, WORK_MAX_ATTEMPTS,
+    TEMP_PRO_DEFAULT, TEMP_CON_DEFAULT
+)
+
+log = logging.getLogger(__name__)
+
+_SCHEMA = """
+-- One row per debate to run. A worker owns a running item while it keeps heartbeating.
+CREATE TABLE IF NOT EXISTS work_items (
+    id           TEXT PRIMARY KEY,        -- Also the debate id in the transcript store
+    batch        TEXT NOT NULL,
+    spec         TEXT NOT NULL,           -- JSON: topic, debate_config, rounds, finalize, autopilot
+    state        TEXT NOT NULL,           -- 'queued', 'running', 'done' or 'failed'
+    attempts     INTEGER NOT NULL DEFAULT 0,
+    worker       TEXT,
+    heartbeat_at REAL,
+    created_at   REAL NOT NULL,
+    started_at   REAL,
+    finished_at  REAL,
+    error        TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_work_items_state ON work_items (state, created_at);
+CREATE INDEX IF NOT EXISTS idx_work_items_batch ON work_items (batch, state);
+
+CREATE TABLE IF NOT EXISTS workers (
+    id           TEXT PRIMARY KEY,
+    host         TEXT,
+    pid          INTEGER,
+    ollama       TEXT,                    -- The model server this worker talks to
+    started_at   REAL,
+    heartbeat_at REAL,
+    current_item TEXT,
+    done         INTEGER NOT NULL DEFAULT 0,
+    failed       INTEGER NOT NULL DEFAULT 0
+);
+"""
+
+DEFAULT_STYLE = {"tone": "Assertive", "style": "Logical", "formality": "Professional", "complexity": "Standard"}
+DEFAULT_PERSONA_PRO = "You are an optimistic, data-driven, and visionary technologist."
+DEFAULT_PERSONA_CON = "You are a cautious, pragmatic, and humanist philosopher."
+
+
+def debate_spec(topic: str, model_pro: str, model_con: str, rounds: int = 1, finalize: bool = True,
+                autopilot: bool = False, **config) -> dict:
+    """
+    A queued debate: baselines, `rounds` exchange rounds, then (optionally) the finale
+    and critic. With autopilot, `rounds` is the most that are run: the debate stops early
+    once it settles. Keyword arguments override the debate config (temp_pro, persona_con, ...).
+    """
+    debate_config = {
+        "model_pro": model_pro, "temp_pro": TEMP_PRO_DEFAULT,
+        "persona_pro": DEFAULT_PERSONA_PRO, "style_pro": dict(DEFAULT_STYLE),
+        "model_con": model_con, "temp_con": TEMP_CON_DEFAULT,
+        "persona_con": DEFAULT_PERSONA_CON, "style_con": dict(DEFAULT_STYLE),
+        "force_adversarial": True,
+    }
+    debate_config.update(config)
+    return {"topic": topic, "debate_config": debate_config, "rounds": rounds, "finalize": finalize,
+            "autopilot": autopilot}
+
+def plan_tournament(topics: list[str], models: list[str], rounds: int = 1, **config) -> list[dict]:
+    """Every ordered pair of different models (each plays both sides) on every topic."""
+    return [debate_spec(topic, pro, con, rounds, **config)
+            for topic in topics for pro, con in itertools.permutations(models, 2)]
+
+
+class WorkQueue:
+    """
+    Durable debate queue shared by the dashboard, the submit CLI and worker processes.
+
+    SQLite in WAL mode; claims run in BEGIN IMMEDIATE transactions, so two workers can
+    never take the same item. Workers heartbeat the item they run. An item whose
+    worker has been silent for WORKER_LEASE_S is considered lost and is queued again,
+    up to WORK_MAX_ATTEMPTS attempts in all.
+    """
+    def __init__(self, db_path: str = WORK_QUEUE_DB_PATH, lease_s: float = WORKER_LEASE_S,
+                 max_attempts: int = WORK_MAX_ATTEMPTS):
+        self.db_path = db_path
+        self.lease_s = lease_s
+        self.max_attempts = max_attempts
+        self._local = threading.local()
+        self._connect().executescript(_SCHEMA)
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            os.makedirs(os.path.dirname(self.db_path) or ".", exist_ok=True)
+            # Autocommit mode: transactions are opened explicitly where they matter
+            conn = sqlite3.connect(self.db_path, timeout=30, isolation_level=None)
+            conn.row_factory = sqlite3.Row
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def _transaction(self):
+        conn = self._connect()
+        conn.execute("BEGIN IMMEDIATE")
+        return conn
+
+    # --- Submitting ---
+
+    def enqueue_many(self, specs: list[dict], batch: str = None) -> str:
+        """Queues debate specs under one batch name. Returns the batch name."""
+        batch = batch or time.strftime("batch_%Y%m%d_%H%M%S")
+        now = time.time()
+        rows = [(str(uuid.uuid4()), batch, json.dumps(spec), "queued", now + i * 1e-6) for i, spec in enumerate(specs)]
+        conn = self._transaction()
+        try:
+            conn.executemany(
+                "INSERT INTO work_items (id, batch, spec, state, created_at) VALUES (?, ?, ?, ?, ?)", rows)
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        log.info(f"Queued {len(rows)} debate(s) in batch '{batch}'")
+        return batch
+
+    # --- Workers ---
+
+    def register_worker(self, worker_id: str, ollama: str):
+        self._connect().execute(
+            "INSERT OR REPLACE INTO workers (id, host, pid, ollama, started_at, heartbeat_at) VALUES (?, ?, ?, ?, ?, ?)",
+            (worker_id, os.uname().nodename if hasattr(os, "uname") else "", os.getpid(), ollama,
+             time.time(), time.time()))
+
+    def claim(self, worker_id: str) -> tuple:
+        """
+        Takes the oldest queued item, after re-queueing items whose worker went silent.
+        Returns (item_id, spec) or (None, None) when there's nothing to do.
+        """
+        now = time.time()
+        conn = self._transaction()
+        try:
+            self._requeue_lost(conn, now)
+            row = conn.execute(
+                "SELECT id, spec FROM work_items WHERE state = 'queued' ORDER BY created_at LIMIT 1").fetchone()
+            if row:
+                conn.execute(
+                    "UPDATE work_items SET state = 'running', worker = ?, attempts = attempts + 1, "
+                    "heartbeat_at = ?, started_at = ?, error = NULL WHERE id = ?", (worker_id, now, now, row["id"]))
+            conn.execute("UPDATE workers SET heartbeat_at = ?, current_item = ? WHERE id = ?",
+                         (now, row["id"] if row else None, worker_id))
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        if not row:
+            return None, None
+        return row["id"], json.loads(row["spec"])
+
+    def _requeue_lost(self, conn: sqlite3.Connection, now: float) -> int:
+        stale = now - self.lease_s
+        conn.execute(
+            "UPDATE work_items SET state = 'failed', finished_at = ?, "
+            "error = 'Worker ' || worker || ' stopped responding (last attempt)' "
+            "WHERE state = 'running' AND heartbeat_at < ? AND attempts >= ?", (now, stale, self.max_attempts))
+        lost = conn.execute(
+            "UPDATE work_items SET state = 'queued', error = 'Worker ' || worker || ' stopped responding', "
+            "worker = NULL WHERE state = 'running' AND heartbeat_at < ?", (stale,)).rowcount
+        if lost:
+            log.warning(f"Re-queued {lost} item(s) from unresponsive workers")
+        return lost
+
+    def requeue_lost(self) -> int:
+        conn = self._transaction()
+        try:
+            lost = self._requeue_lost(conn, time.time())
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        return lost
+
+    def heartbeat(self, item_id: str, worker_id: str) -> bool:
+        """Extends the worker's lease. False means the item was taken away (e.g. re-queued)."""
+        now = time.time()
+        conn = self._connect()
+        conn.execute("UPDATE workers SET heartbeat_at = ? WHERE id = ?", (now, worker_id))
+        if item_id is None:
+            return True
+        return conn.execute(
+            "UPDATE work_items SET heartbeat_at = ? WHERE id = ? AND worker = ? AND state = 'running'",
+            (now, item_id, worker_id)).rowcount == 1
+
+    def complete(self, item_id: str, worker_id: str) -> bool:
+        return self._finish(item_id, worker_id, "done", None)
+
+    def fail(self, item_id: str, worker_id: str, error: str) -> bool:
+        """Records a failed attempt: the item is queued again unless it's out of attempts."""
+        return self._finish(item_id, worker_id, None, error)
+
+    def _finish(self, item_id: str, worker_id: str, state: str, error: str) -> bool:
+        now = time.time()
+        conn = self._transaction()
+        try:
+            row = conn.execute("SELECT attempts FROM work_items WHERE id = ? AND worker = ? AND state = 'running'",
+                               (item_id, worker_id)).fetchone()
+            if row:
+                if state is None:
+                    state = "failed" if row["attempts"] >= self.max_attempts else "queued"
+                conn.execute(
+                    "UPDATE work_items SET state = ?, error = ?, finished_at = ?, "
+                    "worker = CASE WHEN ? = 'queued' THEN NULL ELSE worker END WHERE id = ?",
+                    (state, error, now if state != "queued" else None, state, item_id))
+                column = "done" if state == "done" else "failed"
+                conn.execute(f"UPDATE workers SET {column} = {column} + 1, current_item = NULL, "
+                             "heartbeat_at = ? WHERE id = ?", (now, worker_id))
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        return row is not None
+
+    # --- Status ---
+
+    def status(self, batch: str = None) -> dict:
+        """Item counts per state, for one batch or the whole queue."""
+        where, params = ("WHERE batch = ?", (batch,)) if batch else ("", ())
+        rows = self._connect().execute(
+            f"SELECT state, COUNT(*) AS n FROM work_items {where} GROUP BY state", params).fetchall()
+        counts = {"queued": 0, "running": 0, "done": 0, "failed": 0}
+        counts.update({row["state"]: row["n"] for row in rows})
+        return counts
+
+    def items(self, batch: str = None, state: str = None) -> list[dict]:
+        clauses, params = [], []
+        if batch:
+            clauses.append("batch = ?")
+            params.append(batch)
+        if state:
+            clauses.append("state = ?")
+            params.append(state)
+        where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+        return [dict(row) for row in self._connect().execute(
+            f"SELECT id, batch, state, attempts, worker, started_at, finished_at, error FROM work_items "
+            f"{where} ORDER BY created_at", params)]
+
+    def workers(self) -> list[dict]:
+        """Registered workers, with alive=False for those silent longer than the lease."""
+        now = time.time()
+        rows = [dict(row) for row in self._connect().execute("SELECT * FROM workers ORDER BY id")]
+        for row in rows:
+            row["alive"] = (now - (row["heartbeat_at"] or 0)) < self.lease_s
+        return rows
+
+
+def _print_status(queue: WorkQueue, batch: str = None):
+    counts = queue.status(batch)
+    print(f"{batch or 'all batches'}: " + ", ".join(f"{n} {state}" for state, n in counts.items()))
+    for worker in queue.workers():
+        if worker["alive"]:
+            print(f"  {worker['id']:<24} {worker['ollama']:<28} done={worker['done']} failed={worker['failed']} "
+                  f"running={worker['current_item'] or '-'}")
+
+def main():
+    parser = argparse.ArgumentParser(description="Queue debates for worker processes (python -m app.worker).")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    p_submit = sub.add_parser("submit", help="Queue a tournament: every ordered model pair on every topic")
+    p_submit.add_argument("--models", nargs="+", required=True, help="At least two models")
+    p_submit.add_argument("--topics", nargs="*", default=[], help="Debate topics")
+    p_submit.add_argument("--topics-file", help="Text file with one topic per line")
+    p_submit.add_argument("--rounds", type=int, default=1, help="Exchange rounds after the baselines")
+    p_submit.add_argument("--autopilot", action="store_true",
+                          help="Treat --rounds as a maximum and stop each debate once it settles")
+    p_submit.add_argument("--repeat", type=int, default=1, help="Times to run each pairing")
+    p_submit.add_argument("--batch", help="Batch name (default: timestamp)")
+
+    p_status = sub.add_parser("status", help="Item counts and live workers")
+    p_status.add_argument("--batch")
+    p_status.add_argument("--wait", action="store_true", help="Refresh until the batch is finished")
+
+    sub.add_parser("requeue-lost", help="Re-queue items whose worker stopped heartbeating")
+    args = parser.parse_args()
+
+    queue = WorkQueue()
+    if args.command == "submit":
+        topics = list(args.topics)
+        if args.topics_file:
+            with open(args.topics_file, encoding="utf-8") as f:
+                topics += [line.strip() for line in f if line.strip()]
+        if not topics or len(args.models) < 2:
+            parser.error("submit needs at least one topic and two models")
+        specs = plan_tournament(topics, args.models, args.rounds, autopilot=args.autopilot) * args.repeat
+        batch = queue.enqueue_many(specs, args.batch)
+        print(f"Queued {len(specs)} debate(s) as batch '{batch}'. Start workers with: python -m app.worker")
+    elif args.command == "status":
+        while True:
+            _print_status(queue, args.batch)
+            counts = queue.status(args.batch)
+            if not args.wait or not (counts["queued"] or counts["running"]):
+                break
+            time.sleep(5)
+        for item in queue.items(args.batch, state="failed"):
+            print(f"  failed {item['id']}: {item['error']}", file=sys.stderr)
+    elif args.command == "requeue-lost":
+        print(f"Re-queued {queue.requeue_lost()} item(s).")
+
+if __name__ == "__main__":
+    main()
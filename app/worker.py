@@ -0,0 +1,136 @@
+# app/worker.py
+import argparse
+import logging
+import os
+import signal
+import socket
+import threading
+import time
+
+from app.config import OLLAMA_API_BASE, WORKER_HEARTBEAT_S, WORKER_POLL_S
+from app.coordinator import DebateCoordinator
+from app.scheduler import request_context, PRIORITY_BATCH
+from app.transcript import Transcript
+from app.work_queue import WorkQueue
+
+log = logging.getLogger(__name__)
+
+
+class LeaseLost(Exception):
+    """The queue gave this worker's item to someone else; stop working on it."""
+
+
+def run_debate(coordinator: DebateCoordinator, item_id: str, spec: dict, progress=None) -> Transcript:
+    """
+    Runs one queued debate end to end and stores it in the transcript store under the
+    item's id, so a retried item replaces its earlier partial result instead of adding one.
+    """
+    progress = progress or (lambda message: None)
+    transcript = Transcript(debate_id=item_id, ts=time.time(), topic=spec["topic"],
+                            debate_config=spec["debate_config"])
+    coordinator.run_baseline_round(transcript, progress=progress)
+    baselines = transcript.history[0]
+    if baselines.mike_output.error and baselines.jimmy_output.error:
+        # Nothing came back from the model server: fail the attempt so the item is retried
+        raise RuntimeError(f"Model server unavailable: {baselines.mike_output.error}")
+    if spec.get("autopilot"):
+        coordinator.run_autopilot(transcript, spec.get("rounds", 1), finalize=False, progress=progress)
+    else:
+        for _ in range(spec.get("rounds", 1)):
+            coordinator.run_exchange_round(transcript, progress=progress)
+    if spec.get("finalize", True):
+        coordinator.run_finale(transcript, progress=progress)  # Scores and stores the debate
+    else:
+        coordinator.save_transcript(transcript)
+    return transcript
+
+
+class Worker:
+    """
+    Runs queued debates (see app/work_queue.py) until stopped, heartbeating the
+    item it works on. Each worker talks to the Ollama server in OLLAMA_HOST, so
+    several workers on one machine can drive several model servers:
+
+        OLLAMA_HOST=gpu-a:11434 python -m app.worker &
+        OLLAMA_HOST=gpu-b:11434 python -m app.worker &
+    """
+    def __init__(self, queue: WorkQueue, worker_id: str = None, heartbeat_s: float = WORKER_HEARTBEAT_S):
+        self.queue = queue
+        self.worker_id = worker_id or f"{socket.gethostname()}-{os.getpid()}"
+        self.heartbeat_s = heartbeat_s
+        self.coordinator = DebateCoordinator()
+        self.stopping = threading.Event()   # Set to stop after the current debate
+        self._exited = threading.Event()
+        self._item_id = None
+        self._lease_lost = threading.Event()
+
+    def _heartbeat_loop(self):
+        while not self._exited.wait(self.heartbeat_s):
+            try:
+                if not self.queue.heartbeat(self._item_id, self.worker_id):
+                    self._lease_lost.set()
+            except Exception as e:
+                log.error(f"Heartbeat failed: {e}")
+
+    def _progress(self, message: str):
+        # Called between model calls: the cheapest place to notice a lost lease
+        if self._lease_lost.is_set():
+            raise LeaseLost(f"Item {self._item_id} was re-queued while this worker ran it")
+        log.info(f"[{self._item_id}] {message}")
+
+    def run(self, max_items: int = None, exit_when_idle: bool = False, poll_s: float = WORKER_POLL_S) -> int:
+        """Claims and runs items until stopped. Returns the number of items completed."""
+        self.queue.register_worker(self.worker_id, OLLAMA_API_BASE)
+        threading.Thread(target=self._heartbeat_loop, name="worker-heartbeat", daemon=True).start()
+        log.info(f"Worker {self.worker_id} started against {OLLAMA_API_BASE}")
+        completed = 0
+        while not self.stopping.is_set() and (max_items is None or completed < max_items):
+            item_id, spec = self.queue.claim(self.worker_id)
+            if item_id is None:
+                # Items still running elsewhere may come back if their worker dies, so wait for them
+                if exit_when_idle and not self.queue.status()["running"]:
+                    break
+                self.stopping.wait(poll_s)
+                continue
+
+            self._item_id = item_id
+            self._lease_lost.clear()
+            start = time.time()
+            try:
+                with request_context(priority=PRIORITY_BATCH, session=self.worker_id):
+                    run_debate(self.coordinator, item_id, spec, progress=self._progress)
+                if self.queue.complete(item_id, self.worker_id):
+                    completed += 1
+                    log.info(f"[{item_id}] Done in {time.time() - start:.1f}s")
+            except LeaseLost as e:
+                log.warning(str(e))
+            except Exception as e:
+                log.error(f"[{item_id}] Failed: {e}")
+                self.queue.fail(item_id, self.worker_id, str(e) or type(e).__name__)
+            finally:
+                self._item_id = None
+        self._exited.set()
+        log.info(f"Worker {self.worker_id} stopped after {completed} item(s)")
+        return completed
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run queued debates from the work queue.")
+    parser.add_argument("--worker-id", help="Name shown in 'python -m app.work_queue status' (default: host-pid)")
+    parser.add_argument("--max-items", type=int, help="Stop after this many debates")
+    parser.add_argument("--exit-when-idle", action="store_true",
+                        help="Stop once nothing is queued or running anywhere")
+    args = parser.parse_args()
+
+    worker = Worker(WorkQueue(), args.worker_id)
+    # SIGTERM/Ctrl-C finish the current debate, then stop; a second Ctrl-C aborts
+    def stop(signum, frame):
+        log.info("Stopping after the current debate...")
+        worker.stopping.set()
+        signal.signal(signal.SIGINT, signal.default_int_handler)
+    signal.signal(signal.SIGTERM, stop)
+    signal.signal(signal.SIGINT, stop)
+    worker.run(max_items=args.max_items, exit_when_idle=args.exit_when_idle)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,114 @@
+# benchmarks/fixtures.py
+"""
+Synthetic but realistic inputs for the benchmarks, built from real model prose.
+
+Sentences are taken from the debates in logs/transcripts (an older output format)
+and re-wrapped in the tags the current prompts ask for, so parsing is timed on the
+lengths and wording real models produce. Everything is seeded and deterministic;
+without any transcripts a small built-in vocabulary is used instead.
+
+This is the one place the benchmarks' synthetic transcripts are defined; every
+benchmark that needs a debate builds it with Fixtures.transcript_dict().
+"""
+import glob
+import json
+import os
+import random
+import re
+
+TRANSCRIPTS_DIR = "logs/transcripts"
+FALLBACK_WORDS = ("automation productivity wages evidence workers policy growth retraining industry "
+                  "history technology jobs displacement economy innovation study data risk market").split()
+
+
+def load_corpus(directory: str = TRANSCRIPTS_DIR) -> list[str]:
+    """Sentences from every model output in the stored legacy transcripts, tags removed."""
+    sentences = []
+    for path in sorted(glob.glob(os.path.join(directory, "*.json"))):
+        try:
+            with open(path, encoding="utf-8") as f:
+                turns = json.load(f).get("turns", [])
+        except (OSError, ValueError):
+            continue
+        for turn in turns:
+            text = re.sub(r"<[^>]+>", " ", (turn.get("data") or {}).get("output") or "")
+            sentences += [s.strip() for s in re.split(r"(?<=[.!?])\s+", text) if len(s.strip()) > 20]
+    return sentences
+
+
+class Fixtures:
+    """Deterministic model outputs, transcripts and API responses for one seed."""
+    def __init__(self, seed: int = 0, directory: str = TRANSCRIPTS_DIR):
+        self.rng = random.Random(seed)
+        self.corpus = load_corpus(directory)
+
+    def sentences(self, n: int) -> list[str]:
+        if self.corpus:
+            return [self.rng.choice(self.corpus) for _ in range(n)]
+        return [" ".join(self.rng.choices(FALLBACK_WORDS, k=16)).capitalize() + "." for _ in range(n)]
+
+    def lines(self, n: int) -> str:
+        return "\n".join(f"- {s}" for s in self.sentences(n))
+
+    # --- Model outputs ---
+
+    def exchange_output(self, side: str = "PRO") -> str:
+        """A well-formed baseline/exchange answer with a short chatty preamble, as models tend to write."""
+        return (f"Sure! Here is my response as the {side} debater.\n\n"
+                f"<SIDE_CONFIRM>{side}</SIDE_CONFIRM>\n<ASSUMPTIONS>\n{self.lines(3)}\n</ASSUMPTIONS>\n"
+                f"<REFLECTION>\n{self.lines(4)}\n</REFLECTION>\n<STANCE>pragmatic</STANCE>\n"
+                f"<CHANGE>\n- None\n</CHANGE>\n<REASONING>\n{self.lines(5)}\n</REASONING>")
+
+    def final_output(self, side: str = "PRO") -> str:
+        return f"<SIDE>{side}</SIDE>\n<FINAL>\n{self.lines(7)}\n</FINAL>"
+
+    def pathological_outputs(self, side: str = "PRO") -> dict:
+        """Outputs that have broken parsers before: name -> raw text."""
+        prose = " ".join(self.sentences(150))
+        good = self.exchange_output(side)
+        return {
+            "no_tags": prose,                                               # Model ignored the format
+            "unclosed_tags": "<REASONING>\n" * 300 + prose,                 # Opens, never closes
+            "duplicate_tags": good * 20,                                    # Repeated itself
+            "mixed_case_fenced": "```xml\n" + good.replace("REASONING", "Reasoning") + "\n```",
+            "huge": good + "\n" + prose * 8,                                # Rambled past the answer
+        }
+
+    # --- Transcripts ---
+
+    def transcript_dict(self, rounds: int) -> dict:
+        """A debate in the exported JSON layout: baselines plus rounds-1 exchange rounds, finals and report."""
+        metrics = {"time_total_s": 4.2, "time_load_s": 0.1, "time_gen_s": 3.9, "tokens_in": 412,
+                   "tokens_out": 180, "tokens_per_s": 46.1, "time_prefill_s": 0.2, "prefill_tokens_per_s": 2060.0}
+
+        def turn(side):
+            raw = self.exchange_output(side)
+            return {"side_confirm": side, "reasoning": self.lines(5), "assumptions": self.lines(3),
+                    "reflection": self.lines(4), "stance": "pragmatic", "change": "- None",
+                    "side_mismatch": False, "error": "", "raw_output": raw}
+
+        def final(side):
+            return {"final": self.lines(7), "side": side, "side_mismatch": False, "error": "",
+                    "raw_output": self.final_output(side)}
+
+        return {
+            "debate_id": f"bench-{rounds}", "ts": 0.0, "topic": "AI will create more jobs than it destroys",
+            "debate_config": {"model_pro": "llama3:8b", "model_con": "mistral:7b", "force_adversarial": True},
+            "history": [{
+                "round": i,
+                "mike_capsule": {"topic": "t", "my_side": "PRO"}, "mike_output": turn("PRO"), "mike_metrics": dict(metrics),
+                "jimmy_capsule": {"topic": "t", "my_side": "CON"}, "jimmy_output": turn("CON"), "jimmy_metrics": dict(metrics),
+            } for i in range(rounds)],
+            "finals": {"mike": final("PRO"), "mike_metrics": dict(metrics),
+                       "jimmy": final("CON"), "jimmy_metrics": dict(metrics)},
+            "critic_report": {"verdict": " ".join(self.sentences(5)), "drift_audit": {}, "hallucination_audit": {}},
+        }
+
+    # --- Ollama ---
+
+    def ollama_response(self) -> dict:
+        """A /api/generate response body, durations in nanoseconds."""
+        return {"model": "llama3:8b", "response": self.exchange_output(), "done": True,
+                "total_duration": self.rng.randint(2, 9) * 10**9, "load_duration": self.rng.randint(1, 9) * 10**7,
+                "prompt_eval_count": self.rng.randint(200, 900), "prompt_eval_duration": self.rng.randint(1, 5) * 10**8,
+                "eval_count": self.rng.randint(100, 500), "eval_duration": self.rng.randint(2, 8) * 10**9}
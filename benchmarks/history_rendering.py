@@ -0,0 +1,60 @@
+# benchmarks/history_rendering.py
+"""
+Rerun time of the Debate App against debate length, windowed vs. fully rendered history.
+
+Loads pages/1_Debate_App.py with Streamlit's AppTest, puts a synthetic debate of each
+length in the session and times reruns, which is what every widget touch costs.
+"Windowed" uses the default history window; "full" shows every round in full (debug
+panels closed, so this is still cheaper than the old page, whose closed expanders
+built their content anyway). No Ollama server is needed: the model list is pinned.
+
+    python -m benchmarks.history_rendering --rounds 5 10 30 60 --repeat 5
+"""
+import argparse
+import logging
+import statistics
+import time
+
+from streamlit.testing.v1 import AppTest
+
+from app.config import HISTORY_FULL_ROUNDS
+from app.model_registry import ModelRegistry
+from app.transcript import Transcript
+from benchmarks.fixtures import Fixtures
+
+PAGE = "pages/1_Debate_App.py"
+MODELS = ["llama3:8b", "mistral:7b"]
+
+def time_reruns(rounds: int, window: int, repeat: int) -> float:
+    """Median rerun time in seconds."""
+    at = AppTest.from_file(PAGE, default_timeout=120)
+    at.run()
+    at.session_state["transcript"] = Transcript.from_dict(Fixtures().transcript_dict(rounds))
+    at.session_state["history_window"] = window
+    at.run()  # First render of this debate
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        at.run()
+        times.append(time.perf_counter() - start)
+    if at.exception:
+        raise RuntimeError(at.exception[0].value)
+    return statistics.median(times)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--rounds", type=int, nargs="+", default=[5, 10, 30, 60], help="Debate lengths to test")
+    parser.add_argument("--repeat", type=int, default=5, help="Timed reruns per configuration")
+    args = parser.parse_args()
+
+    ModelRegistry.model_names = lambda self: list(MODELS)
+    logging.disable(logging.WARNING)  # AppTest's bare-mode warnings and the offline server's errors
+
+    print(f"{'rounds':>6}  {'windowed (ms)':>14}  {'full (ms)':>10}  {'speed-up':>8}")
+    for rounds in args.rounds:
+        windowed_s = time_reruns(rounds, HISTORY_FULL_ROUNDS, args.repeat)
+        full_s = time_reruns(rounds, 100, args.repeat)
+        print(f"{rounds:>6}  {windowed_s * 1000:>14.1f}  {full_s * 1000:>10.1f}  {full_s / windowed_s:>7.1f}x")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,180 @@
+# benchmarks/hot_paths.py
+"""
+Microbenchmarks for the code every debate turn runs: tag extraction and output parsing
+(realistic and pathological outputs), persona instructions, prompt formatting,
+transcript serialization from 1 to 100 rounds, Ollama metrics parsing, and the cold
+import of the parsing module (which workers and CLIs pay on start-up).
+
+Each case reports the fastest of several timed batches, in microseconds per call. Results
+are saved to benchmarks/results/<commit>.json and compared with the latest saved run
+from another commit (or --baseline); cases slower by more than --threshold are flagged
+and the exit status is 1, so the suite can gate a commit.
+
+    python -m benchmarks.hot_paths
+    python -m benchmarks.hot_paths --filter parse --threshold 0.15
+    python -m benchmarks.hot_paths --baseline benchmarks/results/1a2b3c4.json --no-save
+"""
+import argparse
+import glob
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+import timeit
+
+from app.coordinator import DebateCoordinator
+from app.parsing import robust_extract_tag, parse_neutral_output, parse_final_output
+from app.prompts import PROMPT_BASELINE, PROMPT_EXCHANGE, PROMPT_FINALIZE, PROMPT_REPAIR
+from app.runner import parse_ollama_metrics
+from app.transcript import Transcript
+from app.work_queue import DEFAULT_STYLE, DEFAULT_PERSONA_PRO
+from benchmarks.fixtures import Fixtures
+
+RESULTS_DIR = "benchmarks/results"
+TRANSCRIPT_ROUNDS = (1, 10, 50, 100)
+
+
+def build_cases(fx: Fixtures) -> dict:
+    """name -> zero-argument callable. Inputs are built here, outside the timed calls."""
+    cases = {}
+    realistic, final = fx.exchange_output("PRO"), fx.final_output("CON")
+
+    cases["extract_tag/realistic"] = lambda: robust_extract_tag(realistic, "REASONING")
+    cases["extract_tag/missing"] = lambda: robust_extract_tag(realistic, "FINAL")
+    cases["parse_neutral/realistic"] = lambda: parse_neutral_output(realistic, "PRO")
+    for name, raw in fx.pathological_outputs().items():
+        cases[f"parse_neutral/{name}"] = lambda raw=raw: parse_neutral_output(raw, "PRO")
+    cases["parse_final/realistic"] = lambda: parse_final_output(final, "CON")
+    huge_final = final + "\n" + fx.pathological_outputs("CON")["no_tags"]
+    cases["parse_final/huge"] = lambda: parse_final_output(huge_final, "CON")
+
+    coordinator = DebateCoordinator()
+    cases["persona_instructions"] = lambda: coordinator._build_persona_instructions(
+        DEFAULT_PERSONA_PRO, DEFAULT_STYLE, True, "PRO")
+
+    instructions = coordinator._build_persona_instructions(DEFAULT_PERSONA_PRO, DEFAULT_STYLE, True, "PRO")
+    topic = "AI will create more jobs than it destroys"
+    capsule = {"topic": topic, "my_side": "PRO", "my_last_reflection": fx.lines(4), "opponent_last_reasoning": fx.lines(5)}
+    summary = [line for _ in range(10) for line in (f"PRO: {fx.lines(5)}", f"CON: {fx.lines(5)}")]
+    cases["prompt/baseline"] = lambda: PROMPT_BASELINE.format(topic=topic, side="PRO", persona_instructions=instructions)
+    cases["prompt/exchange"] = lambda: PROMPT_EXCHANGE.format(
+        topic=topic, side="PRO", capsule_json=json.dumps(capsule, indent=2), persona_instructions=instructions)
+    cases["prompt/finalize_10_rounds"] = lambda: PROMPT_FINALIZE.format(
+        topic=topic, side="PRO", summary_json=json.dumps(summary, indent=2), persona_instructions=instructions)
+    cases["prompt/repair"] = lambda: PROMPT_REPAIR.format(tag_name="REASONING", topic=topic, side="PRO", max_lines=5)
+
+    for rounds in TRANSCRIPT_ROUNDS:
+        data = fx.transcript_dict(rounds)
+        as_json = json.dumps(data)
+        transcript = Transcript.from_dict(data)
+
+        def to_json(transcript=transcript):
+            transcript._json = None  # Time the real serialization, not the cache
+            return transcript.to_json()
+        cases[f"transcript/to_json@{rounds}"] = to_json
+        cases[f"transcript/from_json@{rounds}"] = lambda as_json=as_json: Transcript.from_dict(json.loads(as_json))
+        cases[f"transcript/arguments_only@{rounds}"] = lambda t=transcript: json.dumps(t.arguments_only(), indent=2)
+
+    response = fx.ollama_response()
+    cases["parse_ollama_metrics"] = lambda: parse_ollama_metrics(response)
+    return cases
+
+
+def time_case(func, min_batch_s: float, repeat: int) -> float:
+    """Fastest time per call in microseconds, over `repeat` batches of at least min_batch_s each."""
+    timer = timeit.Timer(func)
+    number = 1
+    while timer.timeit(number) < min_batch_s:
+        number *= 2 if number < 8 else 4
+    return min(timer.repeat(repeat=repeat, number=number)) / number * 1e6
+
+def time_cold_import(module: str, repeat: int) -> float:
+    """Fastest cold import of a module in a fresh interpreter, minus interpreter start-up, in microseconds."""
+    def run(code):
+        start = time.perf_counter()
+        subprocess.run([sys.executable, "-c", code], check=True)
+        return time.perf_counter() - start
+    base = min(run("pass") for _ in range(repeat))
+    return max(0.0, min(run(f"import {module}") for _ in range(repeat)) - base) * 1e6
+
+
+def git_commit() -> str:
+    try:
+        commit = subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                                check=True).stdout.strip()
+        dirty = subprocess.run(["git", "status", "--porcelain", "--untracked-files=no"], capture_output=True,
+                               text=True).stdout.strip()
+        return commit + ("-dirty" if dirty else "")
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+def latest_baseline(commit: str) -> str:
+    """The most recent saved run from a different commit, or None."""
+    runs = []
+    for path in glob.glob(os.path.join(RESULTS_DIR, "*.json")):
+        try:
+            with open(path) as f:
+                run = json.load(f)
+        except (OSError, ValueError):
+            continue
+        if run.get("commit") != commit:
+            runs.append((run.get("ts", 0), path))
+    return max(runs)[1] if runs else None
+
+def compare(results: dict, baseline: dict, threshold: float) -> list[tuple]:
+    """(name, baseline µs, current µs, ratio) for every case slower than 1 + threshold times its baseline."""
+    regressions = []
+    for name, current in results.items():
+        before = baseline.get(name)
+        if before and current > before * (1 + threshold):
+            regressions.append((name, before, current, current / before))
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--filter", help="Only run cases whose name contains this text")
+    parser.add_argument("--repeat", type=int, default=5, help="Timed batches per case (the fastest counts)")
+    parser.add_argument("--min-batch-s", type=float, default=0.05, help="Minimum duration of one batch")
+    parser.add_argument("--threshold", type=float, default=0.2, help="Flag cases slower than this fraction")
+    parser.add_argument("--baseline", help="Results file to compare with (default: latest from another commit)")
+    parser.add_argument("--no-save", action="store_true", help="Don't write this run to benchmarks/results/")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    commit = git_commit()
+    timers = {name: (lambda func=func: time_case(func, args.min_batch_s, args.repeat))
+              for name, func in build_cases(Fixtures(args.seed)).items()}
+    timers["import/app.parsing"] = lambda: time_cold_import("app.parsing", args.repeat)
+    results = {}
+    for name, timer in timers.items():
+        if args.filter and args.filter not in name:
+            continue
+        results[name] = timer()
+        print(f"{name:<36} {results[name]:>12.2f} µs", flush=True)
+
+    baseline_path = args.baseline or latest_baseline(commit)
+    regressions = []
+    if baseline_path:
+        with open(baseline_path) as f:
+            baseline = json.load(f)
+        regressions = compare(results, baseline["results"], args.threshold)
+        print(f"\nCompared with {baseline.get('commit')} ({baseline_path}), threshold +{args.threshold:.0%}:")
+        for name, before, current, ratio in regressions:
+            print(f"  REGRESSION {name:<36} {before:>10.2f} -> {current:>10.2f} µs ({ratio:.2f}x)")
+        if not regressions:
+            print("  No regressions.")
+
+    if not args.no_save:
+        os.makedirs(RESULTS_DIR, exist_ok=True)
+        path = os.path.join(RESULTS_DIR, f"{commit}.json")
+        with open(path, "w") as f:
+            json.dump({"commit": commit, "ts": time.time(), "python": platform.python_version(),
+                       "machine": platform.platform(), "results": results}, f, indent=2)
+        print(f"Saved to {path}")
+    sys.exit(1 if regressions else 0)
+
+if __name__ == "__main__":
+    main()
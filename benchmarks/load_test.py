@@ -0,0 +1,288 @@
+# benchmarks/load_test.py
+"""
+End-to-end load test: N simulated users run scripted workflows through the real coordinators.
+
+Each virtual user is a thread that repeatedly picks a workflow from a weighted mix:
+
+* debate: baselines, exchange rounds, then the finals and critic (DebateCoordinator),
+  at debate priority;
+* comparator: two models answer one prompt, then the critic judges (ComparatorCoordinator);
+* playground: one streamed chat reply (ChatStream) at interactive priority.
+
+Every model call goes through run_ollama/ChatStream and the shared admission scheduler,
+exactly as the pages make them, against a stand-in model server: by default a fake Ollama
+started in this process (tools/fake_ollama_server.py), or any server given with --host.
+Concurrency ramps through --users; each level runs for --duration seconds. Per level the
+report gives throughput, the scheduler's queue depth and p50/p95/p99 latency per phase,
+and the end marks where throughput stops growing (the capacity knee). Stores are written
+to a scratch directory, not logs/.
+
+    python -m benchmarks.load_test --users 1 2 4 8 16 --duration 30
+    python -m benchmarks.load_test --latency 2 --tokens-per-s 40 --parallel 2 --mix debate=1,playground=3
+    python -m benchmarks.load_test --host gpu-box:11434 --users 1 2 4 --slo 3 --out capacity.json
+"""
+import argparse
+import json
+import logging
+import math
+import os
+import random
+import tempfile
+import threading
+import time
+
+PHASES = ("debate", "baseline", "exchange", "finale", "comparator", "compare", "critique", "playground", "chat", "ttft")
+TOPICS = ["AI will create more jobs than it destroys", "Remote work is better for productivity",
+          "Nuclear power is the best path to decarbonization", "Social media does more harm than good"]
+PROMPTS = ["Explain the trade-offs of microservices in three paragraphs.",
+           "Summarize the causes of the 2008 financial crisis.", "Write a haiku about distributed systems."]
+KNEE_GAIN = 0.1  # A level that adds less than this fraction of throughput is past the knee
+
+
+def percentile(values: list, pct: float) -> float:
+    ordered = sorted(values)
+    return ordered[max(0, math.ceil(pct / 100 * len(ordered)) - 1)] if ordered else None
+
+def parse_mix(text: str) -> dict:
+    """"debate=3,comparator=1" -> {"debate": 3.0, "comparator": 1.0}"""
+    mix = {}
+    for part in text.split(","):
+        name, _, weight = part.partition("=")
+        if name.strip() not in ("debate", "comparator", "playground"):
+            raise argparse.ArgumentTypeError(f"Unknown workflow '{name.strip()}'")
+        mix[name.strip()] = float(weight or 1)
+    return mix
+
+def start_fake_server(latency_s: float, tokens_per_s: float, parallel: int) -> str:
+    """Starts tools/fake_ollama_server.py on a free port in a background thread; returns host:port."""
+    from http.server import ThreadingHTTPServer
+    from tools.fake_ollama_server import FakeOllama, make_handler
+    httpd = ThreadingHTTPServer(("127.0.0.1", 0), make_handler(FakeOllama(latency_s, tokens_per_s, parallel)))
+    threading.Thread(target=httpd.serve_forever, name="fake-ollama", daemon=True).start()
+    return f"127.0.0.1:{httpd.server_address[1]}"
+
+
+class Workflows:
+    """The scripted user journeys. Each returns (ok, {phase: seconds})."""
+    def __init__(self, models: list[str], rounds: int):
+        from app.coordinator import DebateCoordinator
+        from app.comparator import ComparatorCoordinator
+        self.models = models
+        self.rounds = rounds
+        self.debates = DebateCoordinator()
+        self.comparator = ComparatorCoordinator()
+
+    @staticmethod
+    def _timed(timings: dict, phase: str, func, *args, **kwargs):
+        start = time.perf_counter()
+        result = func(*args, **kwargs)
+        timings[phase] = timings.get(phase, 0.0) + time.perf_counter() - start
+        return result
+
+    def debate(self, user: str, rng: random.Random) -> tuple[bool, dict]:
+        from app.scheduler import request_context, PRIORITY_DEBATE
+        from app.transcript import Transcript
+        from app.work_queue import debate_spec
+        pro, con = rng.sample(self.models, 2) if len(self.models) > 1 else self.models * 2
+        spec = debate_spec(rng.choice(TOPICS), pro, con, self.rounds)
+        transcript = Transcript(debate_id=f"load-{user}-{time.time_ns()}", ts=time.time(), topic=spec["topic"],
+                                debate_config=spec["debate_config"])
+        timings = {}
+        with request_context(priority=PRIORITY_DEBATE, session=user):
+            self._timed(timings, "baseline", self.debates.run_baseline_round, transcript)
+            for _ in range(self.rounds):
+                self._timed(timings, "exchange", self.debates.run_exchange_round, transcript)
+            self._timed(timings, "finale", self.debates.run_finale, transcript)
+        if self.rounds:
+            timings["exchange"] /= self.rounds  # Per round
+        ok = not any(r.mike_output.error or r.jimmy_output.error for r in transcript.history)
+        return ok, timings
+
+    def comparator_run(self, user: str, rng: random.Random) -> tuple[bool, dict]:
+        from app.scheduler import request_context, PRIORITY_DEBATE
+        model_a, model_b = rng.sample(self.models, 2) if len(self.models) > 1 else self.models * 2
+        prompt = rng.choice(PROMPTS)
+        timings = {}
+        with request_context(priority=PRIORITY_DEBATE, session=user):
+            a, b = self._timed(timings, "compare", self.comparator.run_comparison, prompt, model_a, "", model_b, "")
+            if a["error"] or b["error"]:
+                return False, timings
+            critique = self._timed(timings, "critique", self.comparator.run_critique, prompt,
+                                   model_a, a["response"], a["metrics"], model_b, b["response"], b["metrics"])
+        return not critique.get("error"), timings
+
+    def playground(self, user: str, rng: random.Random) -> tuple[bool, dict]:
+        from app.config import CAPS_COMPARISON
+        from app.runner import ChatStream
+        from app.scheduler import request_context, PRIORITY_INTERACTIVE
+        stream = ChatStream(rng.choice(self.models), [{"role": "user", "content": rng.choice(PROMPTS)}],
+                            temperature=0.5, **CAPS_COMPARISON)
+        timings = {}
+        with request_context(priority=PRIORITY_INTERACTIVE, session=user):
+            self._timed(timings, "chat", lambda: sum(1 for _ in stream))
+        if stream.success:
+            # Time to first token as the user sees it, queue wait included
+            timings["ttft"] = stream.metrics.get("ttft_s", 0) + stream.metrics.get("time_queue_s", 0)
+        return stream.success, timings
+
+    def run(self, name: str, user: str, rng: random.Random) -> tuple[bool, dict]:
+        func = {"debate": self.debate, "comparator": self.comparator_run, "playground": self.playground}[name]
+        start = time.perf_counter()
+        try:
+            ok, timings = func(user, rng)
+        except Exception as e:
+            ok, timings = False, {"exception": repr(e)}
+        timings[name] = time.perf_counter() - start  # The whole workflow
+        return ok, timings
+
+
+def run_level(workflows: Workflows, users: int, duration_s: float, mix: dict, seed: int,
+              sample_s: float = 0.5) -> dict:
+    """Runs `users` virtual users for duration_s (in-flight workflows then finish) and summarizes."""
+    from app.scheduler import get_scheduler
+    scheduler = get_scheduler()
+    timeouts_before = scheduler.stats()["queue_timeouts"]
+    samples, depths, lock = [], [], threading.Lock()
+    deadline = time.monotonic() + duration_s
+    done = threading.Event()
+
+    def user_loop(index):
+        rng = random.Random(seed * 1000 + index)
+        names, weights = list(mix), list(mix.values())
+        while time.monotonic() < deadline:
+            name = rng.choices(names, weights)[0]
+            ok, timings = workflows.run(name, f"vu-{users}-{index}", rng)
+            with lock:
+                samples.append((name, ok, timings))
+
+    def sampler():
+        while not done.wait(sample_s):
+            stats = scheduler.stats()
+            depths.append((sum(stats["waiting"].values()), sum(stats["active"].values())))
+
+    threads = [threading.Thread(target=user_loop, args=(i,), name=f"vu-{i}", daemon=True) for i in range(users)]
+    start = time.monotonic()
+    threading.Thread(target=sampler, name="queue-sampler", daemon=True).start()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    elapsed = time.monotonic() - start
+    done.set()
+
+    latencies = {}
+    for _, _, timings in samples:
+        for phase, seconds in timings.items():
+            if phase in PHASES:
+                latencies.setdefault(phase, []).append(seconds)
+    calls = {"debate": 6 + 2 * workflows.rounds, "comparator": 3, "playground": 1}
+    ok_samples = [s for s in samples if s[1]]
+    waiting = [w for w, _ in depths] or [0]
+    return {
+        "users": users, "elapsed_s": round(elapsed, 1),
+        "workflows": len(samples), "errors": len(samples) - len(ok_samples),
+        "errors_sample": [t["exception"] for _, _, t in samples if "exception" in t][:3],
+        "workflows_per_min": round(len(ok_samples) / elapsed * 60, 2),
+        "calls_per_s": round(sum(calls[name] for name, _, _ in ok_samples) / elapsed, 2),
+        "by_workflow": {name: sum(1 for s in samples if s[0] == name) for name in mix},
+        "queue_depth_avg": round(sum(waiting) / len(waiting), 2), "queue_depth_max": max(waiting),
+        "active_avg": round(sum(a for _, a in depths) / len(depths), 2) if depths else 0,
+        "queue_timeouts": scheduler.stats()["queue_timeouts"] - timeouts_before,
+        "latency_s": {phase: {"n": len(values), "p50": round(percentile(values, 50), 3),
+                              "p95": round(percentile(values, 95), 3), "p99": round(percentile(values, 99), 3)}
+                      for phase, values in sorted(latencies.items(), key=lambda kv: PHASES.index(kv[0]))},
+    }
+
+
+def capacity(levels: list[dict], slo_phase: str = None, slo_s: float = None) -> dict:
+    """
+    The knee of the curve: the last level that still added at least KNEE_GAIN of throughput
+    (and, with an SLO, kept that phase's p95 within it). Provision for at most that many users
+    per model server; past it, extra users only lengthen the queue.
+    """
+    knee, best = None, 0.0
+    for level in levels:
+        p95 = level["latency_s"].get(slo_phase, {}).get("p95") if slo_phase else None
+        within_slo = slo_s is None or p95 is None or p95 <= slo_s
+        if level["calls_per_s"] >= best * (1 + KNEE_GAIN) and within_slo and not level["errors"]:
+            knee = level
+        if level["calls_per_s"] > best:
+            best = level["calls_per_s"]
+    return {"knee_users": knee and knee["users"], "knee_calls_per_s": knee and knee["calls_per_s"],
+            "knee_workflows_per_min": knee and knee["workflows_per_min"], "peak_calls_per_s": best,
+            "slo": {"phase": slo_phase, "p95_s": slo_s} if slo_s is not None else None}
+
+
+def print_level(level: dict):
+    print(f"\n{level['users']} user(s): {level['workflows']} workflows ({level['errors']} failed) "
+          f"in {level['elapsed_s']}s | {level['workflows_per_min']} workflows/min, {level['calls_per_s']} calls/s | "
+          f"queue depth avg {level['queue_depth_avg']}, max {level['queue_depth_max']}, "
+          f"in flight avg {level['active_avg']}, queue timeouts {level['queue_timeouts']}", flush=True)
+    for error in level["errors_sample"]:
+        print(f"  error: {error}")
+    for phase, p in level["latency_s"].items():
+        print(f"  {phase:<11} n={p['n']:<4} p50 {p['p50']:>7.2f}s  p95 {p['p95']:>7.2f}s  p99 {p['p99']:>7.2f}s")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--users", type=int, nargs="+", default=[1, 2, 4, 8], help="Concurrency levels to ramp through")
+    parser.add_argument("--duration", type=float, default=30, help="Seconds each level starts new workflows for")
+    parser.add_argument("--mix", type=parse_mix, default="debate=3,comparator=1,playground=2",
+                        help="Workflow weights, e.g. debate=3,comparator=1,playground=2")
+    parser.add_argument("--rounds", type=int, default=1, help="Exchange rounds per debate")
+    parser.add_argument("--models", nargs="+", default=["llama3:8b", "mistral:7b"])
+    parser.add_argument("--host", help="Model server to load (default: an in-process fake Ollama)")
+    parser.add_argument("--latency", type=float, default=0.5, help="Fake server: seconds per generate call")
+    parser.add_argument("--tokens-per-s", type=float, default=60.0, help="Fake server: streamed chat speed")
+    parser.add_argument("--parallel", type=int, default=4, help="Fake server: requests served at once")
+    parser.add_argument("--slo", type=float, help="Latency objective in seconds for --slo-phase (p95)")
+    parser.add_argument("--slo-phase", default="ttft", choices=PHASES)
+    parser.add_argument("--out", help="Write the capacity curve to this JSON file")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    # The app reads the server address and slot count at import time, so set them first
+    if args.host:
+        os.environ["OLLAMA_HOST"] = args.host
+    else:
+        os.environ["OLLAMA_HOST"] = start_fake_server(args.latency, args.tokens_per_s, args.parallel)
+        os.environ.setdefault("OLLAMA_NUM_PARALLEL", str(args.parallel))
+    out = args.out and os.path.abspath(args.out)
+    logging.disable(logging.INFO)  # Hundreds of per-call log lines per second; warnings and errors still show
+    workflows = Workflows(args.models, args.rounds)
+    os.chdir(tempfile.mkdtemp(prefix="battlebots-load-"))  # Transcript/perf stores land here
+
+    from app.scheduler import get_scheduler
+    print(f"Load test against {os.environ['OLLAMA_HOST']} ({get_scheduler().slots_per_model} slot(s) per model), "
+          f"mix {args.mix}, {args.duration:.0f}s per level; scratch stores in {os.getcwd()}", flush=True)
+    levels = []
+    for users in args.users:
+        levels.append(run_level(workflows, users, args.duration, args.mix, args.seed))
+        print_level(levels[-1])
+
+    result = capacity(levels, args.slo_phase if args.slo is not None else None, args.slo)
+    print(f"\n{'users':>5} {'wf/min':>8} {'calls/s':>8} {'queue avg':>9} {'queue max':>9} "
+          f"{'p95 ' + args.slo_phase:>12}")
+    for level in levels:
+        p95 = level["latency_s"].get(args.slo_phase, {}).get("p95")
+        print(f"{level['users']:>5} {level['workflows_per_min']:>8} {level['calls_per_s']:>8} "
+              f"{level['queue_depth_avg']:>9} {level['queue_depth_max']:>9} "
+              f"{(f'{p95:.2f}s' if p95 is not None else '-'):>12}")
+    if result["knee_users"]:
+        print(f"\nCapacity knee: {result['knee_users']} concurrent user(s), {result['knee_calls_per_s']} calls/s "
+              f"(peak {result['peak_calls_per_s']} calls/s). More users mostly add queueing.")
+    else:
+        print("\nNo level met the criteria (errors or SLO misses from the first level).")
+
+    if out:
+        with open(out, "w") as f:
+            json.dump({"ts": time.time(), "host": os.environ["OLLAMA_HOST"], "mix": args.mix,
+                       "duration_s": args.duration, "rounds": args.rounds, "models": args.models,
+                       "fake_server": None if args.host else {"latency_s": args.latency, "parallel": args.parallel,
+                                                              "tokens_per_s": args.tokens_per_s},
+                       "levels": levels, "capacity": result}, f, indent=2)
+        print(f"Saved to {out}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,73 @@
+# benchmarks/transcript_serialization.py
+"""
+Memory per debate and serialization time: dict transcripts vs. app.transcript.Transcript.
+
+The "dict" path replays what the Debate App used to do per finished debate:
+build the dict, json.dumps(indent=2) it, json.loads it back for the critic,
+dump it again for the hallucination prompt and once more for the download button.
+The "typed" path is the current one: one cached to_json() shared by the store and
+the download button, plus the small arguments-only view for the critic.
+
+    python -m benchmarks.transcript_serialization --rounds 10 --repeat 200
+"""
+import argparse
+import copy
+import json
+import time
+import tracemalloc
+
+from app.transcript import Transcript
+from benchmarks.fixtures import Fixtures
+
+def dict_path(transcript: dict) -> int:
+    as_json = json.dumps(transcript, indent=2)               # get_transcript_json() for the critic
+    critic_input = json.loads(as_json)                       # ...immediately parsed back
+    prompt = json.dumps(critic_input, indent=2)              # run_all_critic_audits
+    download = json.dumps(transcript, indent=2)              # the download button, on every rerun
+    return len(prompt) + len(download)
+
+def typed_path(transcript: Transcript) -> int:
+    transcript._json = None                                  # Count the one real serialization per run
+    prompt = json.dumps(transcript.arguments_only(), indent=2)
+    stored = transcript.to_json()                            # transcript store
+    download = transcript.to_json()                          # download button: cached
+    return len(prompt) + len(stored) + len(download)
+
+def measure_memory(build) -> int:
+    tracemalloc.start()
+    obj = build()
+    size, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del obj
+    return size
+
+def time_it(func, arg, repeat: int) -> float:
+    start = time.perf_counter()
+    for _ in range(repeat):
+        func(arg)
+    return (time.perf_counter() - start) / repeat
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--rounds", type=int, default=10, help="Exchange rounds per debate")
+    parser.add_argument("--repeat", type=int, default=200, help="Timed iterations per path")
+    args = parser.parse_args()
+
+    source = Fixtures().transcript_dict(args.rounds)
+    source_json = json.dumps(source)
+    typed = Transcript.from_dict(source)
+
+    # Memory: parse the same JSON into each representation
+    dict_bytes = measure_memory(lambda: json.loads(source_json))
+    typed_bytes = measure_memory(lambda: Transcript.from_dict(json.loads(source_json)))
+    dict_s = time_it(dict_path, copy.deepcopy(source), args.repeat)
+    typed_s = time_it(typed_path, typed, args.repeat)
+
+    print(f"Debate with {args.rounds} rounds")
+    print(f"  memory   dict: {dict_bytes / 1024:8.1f} KiB   typed: {typed_bytes / 1024:8.1f} KiB")
+    print(f"  per-run  dict: {dict_s * 1000:8.2f} ms    typed: {typed_s * 1000:8.2f} ms   ({dict_s / typed_s:.1f}x)")
+    print(f"  critic hallucination prompt: {len(json.dumps(source, indent=2))} -> "
+          f"{len(json.dumps(typed.arguments_only(), indent=2))} chars")
+
+if __name__ == "__main__":
+    main()
@@ -1,5 +1,10 @@
 # dashboard.py
+import time
+from datetime import datetime
 import streamlit as st
+from app.transcript_store import get_transcript_store
+from app.scheduler import get_scheduler
+from app.canary import canary_report, describe_regression, METRIC_LABELS
 
 st.set_page_config(
     page_title="BattleBots Dashboard",
@@ -40,6 +45,88 @@ st.page_link(
 )
 st.markdown("View your locally installed models and pull new models from the Ollama library.")
 
+st.page_link(
+    "pages/5_Quantization_Explorer.py", 
+    label="Quantization Explorer", 
+    icon="⚖️"
+)
+st.markdown("Compare quantizations of the same model on speed, memory and critic-judged quality.")
+
+st.page_link(
+    "pages/6_Debate_Analytics.py", 
+    label="Debate Analytics", 
+    icon="📈"
+)
+st.markdown("Trends across stored debates: tok/s over time, timeouts, side mismatches and win rates.")
+
+queue = get_scheduler().stats()
+with st.expander("🚦 Ollama Request Queue", expanded=bool(queue["waiting"])):
+    running, waiting = sum(queue["active"].values()), sum(queue["waiting"].values())
+    st.markdown(f"**{running}** call(s) running, **{waiting}** waiting "
+                f"({queue['slots_per_model']} slot(s) per model, {queue['max_active']} in total).")
+    if queue["active"] or queue["waiting"]:
+        models = sorted(set(queue["active"]) | set(queue["waiting"]))
+        st.dataframe([{"model": m, "running": queue["active"].get(m, 0), "waiting": queue["waiting"].get(m, 0)}
+                      for m in models], hide_index=True)
+    if queue["avg_wait_s"]:
+        st.caption("Recent queue wait by priority: " + ", ".join(
+            f"{name} {queue['avg_wait_s'][name]}s avg / {queue['max_wait_s'][name]}s max" for name in queue["avg_wait_s"]))
+    if queue["queue_timeouts"]:
+        st.warning(f"{queue['queue_timeouts']} call(s) gave up waiting for a slot.")
+
+canary = canary_report()
+for entry in canary:
+    if entry["regressions"]:
+        st.error(f"📉 **{entry['model']}** got slower: {describe_regression(entry)}")
+if canary:
+    with st.expander("📉 Model Speed Canary", expanded=any(e["regressions"] for e in canary)):
+        st.dataframe([{
+            "model": e["model"],
+            "last run": datetime.fromtimestamp(e["ts"]).strftime("%Y-%m-%d %H:%M"),
+            "server": e["server_version"],
+            **{METRIC_LABELS[m["metric"]]: f"{m['current']} ({m['change']:+.0%}, p={m['p_value']:.3f})"
+               for m in e["metrics"]},
+            "changed": ", ".join(e["changes"]),
+            "status": "regressed" if e["regressions"] else ("baseline" if not e["baseline_runs"] else "ok"),
+        } for e in canary], hide_index=True)
+        st.caption("Each model's latest canary run against its previous runs, on a fixed prompt set. "
+                   "Schedule it with `python -m app.canary run --every 24` (or from cron).")
+
+
+st.header("🔎 Search Debates")
+store = get_transcript_store()
+query = st.text_input("Search arguments, final statements, verdicts and flagged fabrications",
+                      placeholder='e.g. "2025 study" or automat*',
+                      help='Quote a phrase to match it exactly; end a word with * to match its prefix.')
+col1, col2, col3, col4, col5 = st.columns(5)
+search_model = col1.selectbox("Model", ["Any"] + store.list_models())
+search_side = col2.selectbox("Side", ["Any", "PRO", "CON"])
+search_kind = col3.selectbox("In", ["Everything", "Arguments", "Finals", "Verdicts", "Fabrications"])
+search_period = col4.selectbox("Period", ["All time", "Last 7 days", "Last 30 days", "Last 365 days"])
+search_order = col5.selectbox("Sort", ["Relevance", "Newest first"],
+                              help="'Newest first' stays fast for words that appear in almost every debate.")
+
+if query:
+    days = {"Last 7 days": 7, "Last 30 days": 30, "Last 365 days": 365}.get(search_period)
+    kinds = {"Arguments": ["argument"], "Finals": ["final"], "Verdicts": ["verdict"],
+             "Fabrications": ["fabrication"]}.get(search_kind)
+    start = time.perf_counter()
+    results = store.search(
+        query,
+        model=None if search_model == "Any" else search_model,
+        side=None if search_side == "Any" else search_side,
+        since=time.time() - days * 86400 if days else None,
+        kinds=kinds,
+        newest_first=search_order == "Newest first",
+    )
+    st.caption(f"{len(results)} result(s) in {(time.perf_counter() - start) * 1000:.1f} ms")
+    for hit in results:
+        when = datetime.fromtimestamp(hit["ts"]).strftime("%Y-%m-%d %H:%M")
+        where = f"round {hit['round']}" if hit["round"] is not None and hit["kind"] == "argument" else hit["kind"]
+        speaker = f"{hit['side']} ({hit['model']})" if hit["side"] else hit["model"]
+        st.markdown(f"**{hit['topic']}** · {where} · {speaker} · {when}  \n> {hit['snippet']}")
+        st.caption(f"Debate `{hit['debate_id']}`")
+
 
 st.header("About This Project")
 st.markdown("""
@@ -1,15 +1,24 @@
 # pages/1_Debate_App.py
 import streamlit as st
 import pandas as pd
-import json
 import time
-import subprocess
-import re
+import uuid
 from datetime import datetime
 from app.coordinator import DebateCoordinator 
 from app.coordinator import BLANK_METRICS
-from app.config import TEMP_PRO_DEFAULT, TEMP_CON_DEFAULT 
-from app.user_config import load_user_defaults, save_user_defaults
+from app.config import (
+    TEMP_PRO_DEFAULT, TEMP_CON_DEFAULT, MODEL_CRITIC, HISTORY_FULL_ROUNDS, HISTORY_SUMMARY_PAGE_SIZE,
+    AUTOPILOT_MAX_ROUNDS, PLANNER_DEFAULT_BUDGET_S, MEMORY_CHECK_TTL_S
+)
+from app.user_config import (
+    load_user_defaults, save_user_defaults, load_profile, save_profile_as, delete_current_profile
+)
+from app.settings_store import get_settings_store
+from app.model_registry import get_registry
+from app.memory_fit import check_models_fit
+from app.transcript import Transcript
+from app.jobs import get_job_manager
+from app.scheduler import request_context, PRIORITY_DEBATE
 
 # --- Page Config ---
 st.set_page_config(page_title="Battle of the Bots", layout="wide")
@@ -17,26 +26,12 @@ st.title("🤖 Battle of the Bots")
 st.caption("Offline debate analysis with Ollama")
 
 # --- HELPER FUNCTIONS ---
-@st.cache_data(ttl=60)
 def get_local_models():
-    """
-    Runs 'ollama list' and returns a simple list of all model names.
-    """
-    model_names = []
-    try:
-        result = subprocess.run(
-            ["ollama", "list"], 
-            capture_output=True, text=True, check=True, encoding='utf-8'
-        )
-        lines = result.stdout.strip().split('\n')
-        
-        if len(lines) > 1:
-            for line in lines[1:]:
-                parts = re.split(r'\s+', line.strip())
-                if len(parts) >= 1:
-                    model_names.append(parts[0])
-    except Exception as e:
-        st.error(f"Error reading local models: {e}")
+    """Returns the names of all installed models from the shared model registry."""
+    registry = get_registry()
+    model_names = registry.model_names()
+    if registry.error:
+        st.error(f"Error reading local models: {registry.error}")
     return model_names
 
 def render_metrics_dashboard(metrics: dict):
@@ -64,44 +59,81 @@ def render_metrics_dashboard(metrics: dict):
     col5.metric("Gen. Time (s)", metrics.get("time_gen_s", 0))
     col6.metric("Load Time (s)", metrics.get("time_load_s", 0))
 
-def get_transcript_json() -> str:
-    transcript = {
-        "topic": st.session_state.topic,
-        "debate_config": {
-            "model_pro": st.session_state.model_pro,
-            "temp_pro": st.session_state.temp_pro,
-            "persona_pro": st.session_state.persona_pro,
-            "style_pro": {
-                "tone": st.session_state.pro_tone,
-                "style": st.session_state.pro_style,
-                "formality": st.session_state.pro_formality,
-                "complexity": st.session_state.pro_complexity
-            },
-            "model_con": st.session_state.model_con,
-            "temp_con": st.session_state.temp_con,
-            "persona_con": st.session_state.persona_con,
-            "style_con": {
-                "tone": st.session_state.con_tone,
-                "style": st.session_state.con_style,
-                "formality": st.session_state.con_formality,
-                "complexity": st.session_state.con_complexity
-            },
-            "force_adversarial": st.session_state.force_adversarial,
-        },
-        "history": st.session_state.debate_history,
-        "finals": st.session_state.final_outputs,
-        "critic_report": st.session_state.critic_report
+def render_turn(transcript: Transcript, round_data, side: str):
+    """One debater's message in a round, with its debug info built only when switched on."""
+    if side == "PRO":
+        output, metrics, capsule = round_data.mike_output, round_data.mike_metrics, round_data.mike_capsule
+    else:
+        output, metrics, capsule = round_data.jimmy_output, round_data.jimmy_metrics, round_data.jimmy_capsule
+    with st.chat_message(f"{side} ({transcript.debate_config.get(f'model_{side.lower()}')})"):
+        if output.error: st.error(output.error)
+        elif output.side_mismatch:
+            protest_text = output.side_confirm
+            if protest_text and protest_text.upper() not in [side, "MISSING", ""]:
+                st.warning(f"⚠️ **Model Protest Detected!** (Side: {side})", icon="🗣️")
+                st.markdown(f"> **Model's 'Side':** *{protest_text}*")
+            else:
+                st.warning("⚠️ Side Mismatch! (Tag was missing or wrong)")
+
+        st.markdown(output.reasoning or "*No reasoning provided.*")
+
+        # A toggle instead of an expander: a closed expander still builds its content on every rerun
+        if st.toggle(f"Show {side}'s Debug Info", key=f"debug-{transcript.debate_id}-{round_data.round}-{side}"):
+            render_metrics_dashboard(metrics or BLANK_METRICS)
+            st.markdown("---")
+            st.markdown("##### Capsule (Input)")
+            st.json(capsule)
+            st.markdown("##### Raw Output")
+            st.code(output.raw_output, language="xml")
+
+def render_round(transcript: Transcript, round_data):
+    round_num = round_data.round
+    st.subheader(f"Round {round_num}: {'Baselines' if round_num == 0 else 'Exchange'}")
+    render_turn(transcript, round_data, "PRO")
+    render_turn(transcript, round_data, "CON")
+
+def summarize_turn(output, side: str, max_chars: int = 160) -> str:
+    """A one-line markdown summary of a turn for the collapsed part of the history."""
+    flag = " ⚠️" if output.error or output.side_mismatch else ""
+    text = " ".join((output.error or output.reasoning or "No reasoning provided.").split())
+    if len(text) > max_chars:
+        text = text[:max_chars].rsplit(" ", 1)[0] + "…"
+    return f"**{side}**{flag}: {text}"
+
+def get_style(side: str) -> dict:
+    prefix = side.lower()
+    return {
+        "tone": st.session_state[f"{prefix}_tone"], "style": st.session_state[f"{prefix}_style"],
+        "formality": st.session_state[f"{prefix}_formality"], "complexity": st.session_state[f"{prefix}_complexity"]
+    }
+
+def get_debate_config() -> dict:
+    return {
+        "model_pro": st.session_state.model_pro,
+        "temp_pro": st.session_state.temp_pro,
+        "persona_pro": st.session_state.persona_pro,
+        "style_pro": get_style("PRO"),
+        "model_con": st.session_state.model_con,
+        "temp_con": st.session_state.temp_con,
+        "persona_con": st.session_state.persona_con,
+        "style_con": get_style("CON"),
+        "force_adversarial": st.session_state.force_adversarial,
     }
-    return json.dumps(transcript, indent=2)
 # --- END HELPER FUNCTIONS ---
 
 
 # --- Initialize Coordinator ---
+@st.cache_data(ttl=MEMORY_CHECK_TTL_S, show_spinner=False)
+def get_models_fit(model_names: tuple) -> dict:
+    """check_models_fit reads /api/ps, nvidia-smi and /api/show, so it isn't run on every slider touch."""
+    return check_models_fit(list(model_names))
+
 @st.cache_resource
 def get_coordinator():
     return DebateCoordinator()
 
 coordinator = get_coordinator()
+job_manager = get_job_manager()
 
 # --- State Initialization ---
 def init_session_state():
@@ -110,7 +142,9 @@ def init_session_state():
         st.error("No local Ollama models found. Please pull a model in the 'Model Explorer'.")
         st.stop()
         
-    user_defaults = load_user_defaults()
+    # Each session edits its own profile; a new session starts on the last one switched to
+    profile = st.session_state.get("profile") or get_settings_store().active_profile
+    user_defaults = load_user_defaults(profile)
     
     # Check if the saved PRO model still exists
     default_pro = user_defaults.get("model_pro", "llama3:8b")
@@ -124,10 +158,16 @@ def init_session_state():
     
     defaults = {
         'topic': "AI will create more jobs than it destroys",
-        'debate_history': [], 
-        'final_outputs': None,
-        'critic_report': None,
-        'running': False,
+        'profile': profile,
+        'new_profile_name': "",
+        'session_id': uuid.uuid4().hex,
+        'transcript': None,   # The debate shown in the main panel
+        'debates': {},        # debate_id -> Transcript, every debate started in this session
+        'seen_finished_jobs': set(),
+        'history_window': HISTORY_FULL_ROUNDS,
+        'autopilot_rounds': AUTOPILOT_MAX_ROUNDS,
+        'budget_min': PLANNER_DEFAULT_BUDGET_S / 60,
+        'budget_rounds': 3,
         'warmup_complete': False,
         'force_adversarial': True,
         
@@ -154,135 +194,73 @@ def init_session_state():
 
 init_session_state()
 
-# --- Callbacks ---
+# --- Callbacks (each queues a background job; the page polls it below) ---
+def submit_debate_job(kind: str, label: str, func, transcript: Transcript, **kwargs):
+    with request_context(priority=PRIORITY_DEBATE, session=st.session_state.session_id):
+        job_manager.submit(kind, f"{label}: {transcript.topic[:60]}", func, transcript,
+                           owner=st.session_state.session_id, ref=transcript.debate_id, **kwargs)
+
+def debate_is_busy(transcript: Transcript) -> bool:
+    """
+    Toasts and returns True while a job still works on this debate. Checked before
+    set_config(), so a double click doesn't change or extend a transcript mid-job.
+    """
+    job = job_manager.active_job_for(transcript.debate_id)
+    if job:
+        st.toast(f"⏳ This debate is still busy with '{job.label}'. Wait for it to finish.", icon="⚠️")
+    return job is not None
+
 def cb_run_baselines():
     if not st.session_state.topic:
         st.toast("🚨 Please enter a topic first!", icon="error")
         return
-    st.session_state.running = True
-    st.session_state.debate_history = []
-    st.session_state.final_outputs = None
-    st.session_state.critic_report = None
-    
-    with st.status("Running...", expanded=True) as status:
-        if not st.session_state.warmup_complete:
-            status.update(label="Warming up models (one-time)...")
-            warmup_results = coordinator.warm_up_models(
-                st.session_state.model_pro, st.session_state.model_con
-            )
-            st.session_state.warmup_complete = True
-            st.toast("Models are warmed up!", icon="🔥")
-            for key, res in warmup_results.items():
-                if "FAIL" in res:
-                    status.update(label="Warmup Failed!", state="error")
-                    st.error(f"Failed to warm up {key}: {res}")
-                    st.session_state.running = False
-                    return
-
-        status.update(label="Generating baselines...")
-        
-        style_pro = {
-            "tone": st.session_state.pro_tone, "style": st.session_state.pro_style,
-            "formality": st.session_state.pro_formality, "complexity": st.session_state.pro_complexity
-        }
-        style_con = {
-            "tone": st.session_state.con_tone, "style": st.session_state.con_style,
-            "formality": st.session_state.con_formality, "complexity": st.session_state.con_complexity
-        }
-        
-        mike_base, metrics_mike, jimmy_base, metrics_jimmy = coordinator.generate_baselines(
-            st.session_state.topic,
-            st.session_state.force_adversarial,
-            st.session_state.model_pro, st.session_state.temp_pro, st.session_state.persona_pro, style_pro,
-            st.session_state.model_con, st.session_state.temp_con, st.session_state.persona_con, style_con
-        )
-        st.session_state.debate_history = [{
-            "round": 0,
-            "mike_capsule": {"topic": st.session_state.topic, "my_side": "PRO"},
-            "mike_output": mike_base, "mike_metrics": metrics_mike, 
-            "jimmy_capsule": {"topic": st.session_state.topic, "my_side": "CON"},
-            "jimmy_output": jimmy_base, "jimmy_metrics": metrics_jimmy
-        }]
-        status.update(label="Baselines generated!", state="complete")
-    
-    st.session_state.running = False
+    # Each click starts a new debate, so several can be queued while earlier ones run
+    transcript = Transcript(debate_id=str(uuid.uuid4()), ts=time.time(), topic=st.session_state.topic,
+                            debate_config=get_debate_config())
+    st.session_state.debates[transcript.debate_id] = transcript
+    st.session_state.transcript = transcript
+    warm_up = not st.session_state.warmup_complete
+    st.session_state.warmup_complete = True
+    submit_debate_job("baselines", "Baselines", coordinator.run_baseline_round, transcript, warm_up=warm_up)
+
+def cb_run_timed():
+    if not st.session_state.topic:
+        st.toast("🚨 Please enter a topic first!", icon="error")
+        return
+    transcript = Transcript(debate_id=str(uuid.uuid4()), ts=time.time(), topic=st.session_state.topic,
+                            debate_config=get_debate_config())
+    st.session_state.debates[transcript.debate_id] = transcript
+    st.session_state.transcript = transcript
+    warm_up = not st.session_state.warmup_complete
+    st.session_state.warmup_complete = True
+    submit_debate_job("baselines", "Timed Debate", coordinator.run_timed, transcript,
+                      budget_s=st.session_state.budget_min * 60, rounds=st.session_state.budget_rounds,
+                      warm_up=warm_up)
 
 def cb_run_exchange():
-    st.session_state.running = True
-    last_round = st.session_state.debate_history[-1]
-    
-    with st.status(f"Running exchange round {len(st.session_state.debate_history)}...", expanded=True) as status:
-        
-        style_pro = {
-            "tone": st.session_state.pro_tone, "style": st.session_state.pro_style,
-            "formality": st.session_state.pro_formality, "complexity": st.session_state.pro_complexity
-        }
-        style_con = {
-            "tone": st.session_state.con_tone, "style": st.session_state.con_style,
-            "formality": st.session_state.con_formality, "complexity": st.session_state.con_complexity
-        }
-        
-        capsule_mike, mike_output, metrics_mike, capsule_jimmy, jimmy_output, metrics_jimmy = coordinator.exchange_step(
-            st.session_state.topic, 
-            last_round["mike_output"], 
-            last_round["jimmy_output"],
-            st.session_state.force_adversarial,
-            st.session_state.model_pro, st.session_state.temp_pro, st.session_state.persona_pro, style_pro,
-            st.session_state.model_con, st.session_state.temp_con, st.session_state.persona_con, style_con
-        )
-        st.session_state.debate_history.append({
-            "round": len(st.session_state.debate_history),
-            "mike_capsule": capsule_mike,
-            "mike_output": mike_output, "mike_metrics": metrics_mike,
-            "jimmy_capsule": capsule_jimmy,
-            "jimmy_output": jimmy_output, "jimmy_metrics": metrics_jimmy
-        })
-        status.update(label=f"Round {len(st.session_state.debate_history)-1} complete!", state="complete")
-        
-    st.session_state.running = False
+    transcript = st.session_state.transcript
+    if debate_is_busy(transcript):
+        return
+    transcript.set_config(get_debate_config())
+    submit_debate_job("exchange", f"Round {len(transcript.history)}", coordinator.run_exchange_round, transcript)
 
 def cb_run_finalize():
-    st.session_state.running = True
-    st.session_state.final_outputs = None
-    st.session_state.critic_report = None
-    
-    with st.status("Finalizing debate...", expanded=True) as status:
-        status.update(label="Generating final statements...")
-        
-        style_pro = {
-            "tone": st.session_state.pro_tone, "style": st.session_state.pro_style,
-            "formality": st.session_state.pro_formality, "complexity": st.session_state.pro_complexity
-        }
-        style_con = {
-            "tone": st.session_state.con_tone, "style": st.session_state.con_style,
-            "formality": st.session_state.con_formality, "complexity": st.session_state.con_complexity
-        }
-        
-        mike_final, metrics_mike, jimmy_final, metrics_jimmy = coordinator.finalize_debate(
-            st.session_state.topic, 
-            st.session_state.debate_history,
-            st.session_state.persona_pro,
-            st.session_state.model_pro,
-            st.session_state.temp_pro,
-            style_pro,
-            st.session_state.persona_con,
-            st.session_state.model_con,
-            st.session_state.temp_con,
-            style_con
-        )
-        st.session_state.final_outputs = {
-            "mike": mike_final, "mike_metrics": metrics_mike,
-            "jimmy": jimmy_final, "jimmy_metrics": metrics_jimmy
-        }
-    
-        status.update(label="Running critic audits...")
-        transcript = json.loads(get_transcript_json()) 
-        report = coordinator.run_critic(transcript) 
-        st.session_state.critic_report = report
-        
-        status.update(label="Debate finalized and scored!", state="complete")
-        
-    st.session_state.running = False
+    transcript = st.session_state.transcript
+    if debate_is_busy(transcript):
+        return
+    transcript.set_config(get_debate_config())
+    submit_debate_job("finalize", "Finalize & Score", coordinator.run_finale, transcript)
+
+def cb_run_autopilot():
+    transcript = st.session_state.transcript
+    if debate_is_busy(transcript):
+        return
+    transcript.set_config(get_debate_config())
+    submit_debate_job("autopilot", "Autopilot", coordinator.run_autopilot, transcript,
+                      max_rounds=st.session_state.autopilot_rounds)
+
+def cb_open_debate(debate_id: str):
+    st.session_state.transcript = st.session_state.debates.get(debate_id)
 
 
 # --- UI Layout (Sidebar UPDATED) ---
@@ -299,10 +277,24 @@ with st.sidebar:
     st.divider()
     
     st.header("2. Debate Controls")
-    st.button("Generate Baselines", on_click=cb_run_baselines, disabled=st.session_state.running, use_container_width=True)
-    if st.session_state.debate_history:
-        st.button("Continue Exchange", on_click=cb_run_exchange, disabled=st.session_state.running, use_container_width=True)
-        st.button("Finalize & Score", on_click=cb_run_finalize, disabled=st.session_state.running, use_container_width=True)
+    st.button("Generate Baselines", on_click=cb_run_baselines, use_container_width=True,
+              help="Starts a new debate. Debates queue up if others are still running.")
+    with st.expander("⏱️ Timed Debate"):
+        col1, col2 = st.columns(2)
+        col1.number_input("Budget (min)", min_value=0.5, max_value=60.0, step=0.5, key="budget_min")
+        col2.number_input("Rounds", min_value=0, max_value=20, key="budget_rounds")
+        st.button("Run Timed Debate", on_click=cb_run_timed, use_container_width=True,
+                  help="Starts a new debate that runs to the critic's verdict within the budget. Replies are "
+                       "shortened, and rounds skipped, when the models are too slow to fit.")
+    current = st.session_state.transcript
+    if current and current.history:
+        busy = job_manager.active_job_for(current.debate_id) is not None
+        st.button("Continue Exchange", on_click=cb_run_exchange, disabled=busy, use_container_width=True)
+        st.button("Finalize & Score", on_click=cb_run_finalize, disabled=busy, use_container_width=True)
+        st.number_input("Autopilot rounds (max)", min_value=1, max_value=50, key="autopilot_rounds")
+        st.button("🛫 Autopilot to Finish", on_click=cb_run_autopilot, disabled=busy, use_container_width=True,
+                  help="Runs exchange rounds until both sides stop changing their arguments "
+                       "(or the maximum is reached), then finalizes and scores.")
     
     st.divider()
     
@@ -313,6 +305,18 @@ with st.sidebar:
         st.error("No local Ollama models found. Pull models in the 'Model Explorer'.")
         st.stop()
 
+    with st.expander("Profiles"):
+        profile_names = get_settings_store().profile_names()
+        if st.session_state.profile not in profile_names:  # Deleted by another session
+            st.session_state.profile = get_settings_store().active_profile
+        st.selectbox("Active Profile", profile_names, key="profile", on_change=load_profile,
+                     help="Named sets of models, personas and sliders. Changes are saved to the active profile.")
+        st.text_input("Save current settings as", key="new_profile_name", placeholder="e.g. Courtroom drama")
+        col1, col2 = st.columns(2)
+        col1.button("Save Profile", on_click=save_profile_as, use_container_width=True)
+        col2.button("Delete Profile", on_click=delete_current_profile, disabled=len(profile_names) == 1,
+                    use_container_width=True)
+
     with st.expander("PRO Debater Persona & Style", expanded=True):
         
         # --- THIS IS THE FIX ---
@@ -373,32 +377,77 @@ with st.sidebar:
                          key="con_complexity", help="Controls the depth of the argument.",
                          on_change=save_user_defaults)
 
+    # --- Memory check: PRO, CON and the critic should all stay resident ---
+    debate_models = [st.session_state.model_pro, st.session_state.model_con, MODEL_CRITIC]
+    fit = get_models_fit(tuple(m for m in debate_models if m in AVAILABLE_MODELS))
+    if fit["status"] == "evicts":
+        st.warning(f"⚠️ **Memory:** {fit['message']}")
+    elif fit["status"] == "too_large":
+        st.error(f"❌ **Memory:** {fit['message']} The models will be swapped in and out on every turn.")
+
+# --- Job Queue (refreshes itself while this session has jobs running) ---
+JOB_ICONS = {"queued": "⏳", "running": "🔄", "done": "✅", "error": "❌", "cancelled": "🚫"}
+
+@st.fragment(run_every=1 if job_manager.active_jobs(st.session_state.session_id) else None)
+def render_job_queue():
+    jobs = job_manager.jobs(st.session_state.session_id)
+    if not jobs:
+        return
+    with st.expander("Job Queue", expanded=any(job.is_active for job in jobs)):
+        for job in jobs:
+            col1, col2 = st.columns([5, 1])
+            col1.markdown(f"{JOB_ICONS.get(job.state, '')} **{job.label}** — {job.status} "
+                          f"({job.elapsed_s:.0f}s)")
+            if job.error:
+                col1.error(job.error)
+            if job.state == "queued":
+                col2.button("Cancel", key=f"cancel-{job.id}", on_click=job_manager.cancel, args=(job.id,))
+            elif job.ref in st.session_state.debates and job.ref != getattr(st.session_state.transcript, "debate_id", None):
+                col2.button("Open", key=f"open-{job.id}", on_click=cb_open_debate, args=(job.ref,))
+        if not any(job.is_active for job in jobs):
+            st.button("Clear Finished", on_click=job_manager.clear_finished, args=(st.session_state.session_id,))
+
+    # A finished job changes a debate, so refresh the whole page once to show it
+    finished = {job.id for job in jobs if not job.is_active}
+    new = finished - st.session_state.seen_finished_jobs
+    if new:
+        st.session_state.seen_finished_jobs |= finished
+        for job in jobs:
+            if job.id in new and job.kind == "baselines" and job.state == "error":
+                st.session_state.warmup_complete = False  # Warm up again on the next try
+        st.rerun()
+
+render_job_queue()
+
 # --- Main Panel: Debate Display ---
-if st.session_state.final_outputs:
+transcript = st.session_state.transcript
+
+if transcript and transcript.finals:
+    finals = transcript.finals
     st.header("🏆 Final Arguments & Report")
     
     col1, col2 = st.columns(2)
     with col1:
-        st.subheader(f"PRO ({st.session_state.model_pro})")
-        st.info(st.session_state.final_outputs["mike"].get("final", "*Missing*"))
-        if st.session_state.final_outputs["mike"].get("side_mismatch"): st.warning("⚠️ Side Mismatch!")
-        if st.session_state.final_outputs["mike"].get("error"): st.error(st.session_state.final_outputs["mike"]["error"])
+        st.subheader(f"PRO ({transcript.debate_config.get('model_pro')})")
+        st.info(finals.mike.final or "*Missing*")
+        if finals.mike.side_mismatch: st.warning("⚠️ Side Mismatch!")
+        if finals.mike.error: st.error(finals.mike.error)
         with st.expander("Show Final Metrics"):
-            render_metrics_dashboard(st.session_state.final_outputs.get("mike_metrics", BLANK_METRICS))
+            render_metrics_dashboard(finals.mike_metrics or BLANK_METRICS)
 
     with col2:
-        st.subheader(f"CON ({st.session_state.model_con})")
-        st.info(st.session_state.final_outputs["jimmy"].get("final", "*Missing*"))
-        if st.session_state.final_outputs["jimmy"].get("side_mismatch"): st.warning("⚠️ Side Mismatch!")
-        if st.session_state.final_outputs["jimmy"].get("error"): st.error(st.session_state.final_outputs["jimmy"]["error"])
+        st.subheader(f"CON ({transcript.debate_config.get('model_con')})")
+        st.info(finals.jimmy.final or "*Missing*")
+        if finals.jimmy.side_mismatch: st.warning("⚠️ Side Mismatch!")
+        if finals.jimmy.error: st.error(finals.jimmy.error)
         with st.expander("Show Final Metrics"):
-            render_metrics_dashboard(st.session_state.final_outputs.get("jimmy_metrics", BLANK_METRICS))
+            render_metrics_dashboard(finals.jimmy_metrics or BLANK_METRICS)
             
     st.divider()
 
     st.header("👨‍⚖️ Critic's Report")
-    if st.session_state.critic_report:
-        report = st.session_state.critic_report
+    if transcript.critic_report:
+        report = transcript.critic_report
         st.subheader("Verdict")
         st.info(report.get("verdict", "Critic failed to return a verdict."))
         
@@ -422,61 +471,68 @@ if st.session_state.final_outputs:
     else:
         st.error("Critic report was not generated.")
     
+    time_plan = transcript.debate_config.get("time_plan")
+    if time_plan:
+        st.subheader("⏱️ Time Budget")
+        col1, col2, col3 = st.columns(3)
+        col1.metric("Budget", f"{time_plan['budget_s']:.0f}s")
+        col2.metric("Actual", f"{time_plan['actual_s']:.0f}s",
+                    delta=f"{time_plan['actual_s'] - time_plan['budget_s']:+.0f}s", delta_color="inverse")
+        col3.metric("Rounds Run", f"{time_plan['rounds_run']} / {time_plan['rounds_requested']}")
+        st.dataframe(pd.DataFrame([{
+            "Phase": p["label"], "Planned (s)": p["planned_s"], "Actual (s)": p["actual_s"],
+            "Reply cap": ", ".join(f"{role} {cap['num_predict']}" for role, cap in p["caps"].items()),
+        } for p in time_plan["phases"]]), hide_index=True, use_container_width=True)
+        st.caption("Model speeds used: " + "; ".join(
+            f"{m} {s['tokens_per_s']} tok/s ({s['source']})" for m, s in time_plan["speeds"].items()))
+
     st.divider()
     st.header("Export")
-    st.download_button("Download Full Transcript (JSON)", get_transcript_json(), f"battle_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json", "application/json")
+    st.download_button("Download Full Transcript (JSON)", transcript.to_json(), f"battle_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json", "application/json")
 
 st.divider()
 
-if st.session_state.debate_history:
+if transcript and transcript.history:
     st.header("Debate History")
-    
-    for round_data in st.session_state.debate_history:
-        round_num = round_data["round"]
-        st.subheader(f"Round {round_num}: {'Baselines' if round_num == 0 else 'Exchange'}")
-
-        with st.chat_message(f"PRO ({st.session_state.model_pro})"):
-            mike_output = round_data["mike_output"]
-            if mike_output.get("error"): st.error(mike_output.get("error"))
-            elif mike_output.get("side_mismatch"):
-                protest_text = mike_output.get("side_confirm", "")
-                if protest_text and protest_text.upper() not in ["PRO", "MISSING", ""]:
-                    st.warning(f"⚠️ **Model Protest Detected!** (Side: PRO)", icon="🗣️")
-                    st.markdown(f"> **Model's 'Side':** *{protest_text}*")
-                else:
-                    st.warning("⚠️ Side Mismatch! (Tag was missing or wrong)")
-            
-            st.markdown(mike_output.get("reasoning", "*No reasoning provided.*"))
-            
-            with st.expander("Show PRO's Debug Info"):
-                render_metrics_dashboard(round_data.get("mike_metrics", BLANK_METRICS))
-                st.markdown("---")
-                st.markdown("##### Capsule (Input)")
-                st.json(round_data["mike_capsule"])
-                st.markdown("##### Raw Output")
-                st.code(mike_output.get("raw_output", ""), language="xml")
-
-        with st.chat_message(f"CON ({st.session_state.model_con})"):
-            jimmy_output = round_data["jimmy_output"]
-            if jimmy_output.get("error"): st.error(jimmy_output.get("error"))
-            elif jimmy_output.get("side_mismatch"):
-                protest_text = jimmy_output.get("side_confirm", "")
-                if protest_text and protest_text.upper() not in ["CON", "MISSING", ""]:
-                    st.warning(f"⚠️ **Model Protest Detected!** (Side: CON)", icon="🗣️")
-                    st.markdown(f"> **Model's 'Side':** *{protest_text}*")
-                else:
-                    st.warning("⚠️ Side Mismatch! (Tag was missing or wrong)")
-            
-            st.markdown(jimmy_output.get("reasoning", "*No reasoning provided.*"))
-            
-            with st.expander("Show CON's Debug Info"):
-                render_metrics_dashboard(round_data.get("jimmy_metrics", BLANK_METRICS))
-                st.markdown("---")
-                st.markdown("##### Capsule (Input)")
-                st.json(round_data["jimmy_capsule"])
-                st.markdown("##### Raw Output")
-                st.code(jimmy_output.get("raw_output", ""), language="xml")
-        
+    autopilot = transcript.debate_config.get("autopilot")
+    if autopilot:
+        reason = "both sides settled" if autopilot["stopped"] == "converged" else "reached the maximum"
+        st.caption(f"🛫 Autopilot ran {autopilot['rounds_run']} of up to {autopilot['max_rounds']} round(s) "
+                   f"and {reason}, saving {autopilot['rounds_saved']} round(s). Argument similarity per round: "
+                   + ", ".join(f"R{r['round']} PRO {r['pro_similarity']:.2f} / CON {r['con_similarity']:.2f}"
+                               for r in autopilot["rounds"]))
+    col1, col2 = st.columns([3, 1])
+    col2.number_input("Rounds shown in full", min_value=1, max_value=100, key="history_window",
+                      help="Older rounds are summarized, so long debates stay fast to interact with.")
+
+    rounds = transcript.history
+    older, latest = rounds[:-st.session_state.history_window], rounds[-st.session_state.history_window:]
+    if older:
+        # Only one page of one-line summaries is drawn, however long the debate gets
+        with st.container(border=True):
+            st.markdown(f"**{len(older)} earlier round(s)**")
+            page_starts = list(range(0, len(older), HISTORY_SUMMARY_PAGE_SIZE))
+            col1, col2 = st.columns(2)
+            page_start = col1.selectbox(
+                "Summaries", page_starts, index=len(page_starts) - 1,
+                format_func=lambda i: f"Rounds {older[i].round}-{older[min(i + HISTORY_SUMMARY_PAGE_SIZE, len(older)) - 1].round}",
+                key=f"history_page-{transcript.debate_id}")
+            opened = col2.selectbox("Show a round in full", [None] + [r.round for r in older],
+                                    format_func=lambda n: "—" if n is None else f"Round {n}",
+                                    key=f"history_open-{transcript.debate_id}")
+            st.markdown("\n\n".join(
+                f"**Round {r.round}** · {summarize_turn(r.mike_output, 'PRO')} · {summarize_turn(r.jimmy_output, 'CON')}"
+                for r in older[page_start:page_start + HISTORY_SUMMARY_PAGE_SIZE]
+            ))
+            if opened is not None:
+                st.divider()
+                render_round(transcript, next(r for r in older if r.round == opened))
+        st.divider()
+
+    for round_data in latest:
+        render_round(transcript, round_data)
         st.divider()
+elif transcript:
+    st.info("Baselines for this debate are queued or running; progress is shown in the Job Queue above.")
 else:
     st.info("Enter a topic and click 'Generate Baselines' to start.")
@@ -2,9 +2,10 @@
 import streamlit as st
 import pandas as pd
 import json
-import subprocess
-import re
 from app.comparator import ComparatorCoordinator
+from app.batch import BatchEvaluator, parse_prompt_suite
+from app.model_registry import get_registry
+from app.scheduler import get_scheduler
 from app.config import MODEL_A_DEFAULT, MODEL_B_DEFAULT
 
 # --- HELPER FUNCTIONS ---
@@ -39,39 +40,23 @@ def render_metrics_dashboard(metrics: dict):
     col6.metric("Load Time (s)", metrics.get("time_load_s", 0))
 
 # --- NEW DYNAMIC "SMART" FILTER ---
-@st.cache_data(ttl=600)  # Cache the list for 10 minutes
 def get_base_models_by_prefix():
     """
-    Runs 'ollama list' and filters for models matching a known prefix.
+    Reads the shared model registry and filters for models matching a known prefix.
     This filters out custom-named models.
     """
     # These are the "base" models we want to compare
     BASE_MODEL_PREFIXES = ["llama3", "mistral", "phi3"]
     
-    models = []
-    try:
-        result = subprocess.run(
-            ["ollama", "list"], 
-            capture_output=True, text=True, check=True, encoding='utf-8'
-        )
-        lines = result.stdout.strip().split('\n')
-        
-        if len(lines) <= 1:
-            return ["Error: 'ollama list' is empty"]
-
-        # Parse the table, skipping the header
-        for line in lines[1:]:
-            parts = re.split(r'\s+', line.strip())
-            if len(parts) >= 1:
-                name = parts[0]
-                # Check if the model name starts with any of our allowed prefixes
-                if any(name.startswith(prefix) for prefix in BASE_MODEL_PREFIXES):
-                    models.append(name)
-                        
-    except FileNotFoundError:
-        return ["Error: 'ollama' command not found."]
-    except Exception as e:
-        return [f"Error parsing models: {e}"]
+    registry = get_registry()
+    all_models = registry.model_names()
+    if registry.error:
+        return [f"Error: {registry.error}"]
+    if not all_models:
+        return ["Error: no local models installed"]
+
+    # Check if the model name starts with any of our allowed prefixes
+    models = [name for name in all_models if any(name.startswith(prefix) for prefix in BASE_MODEL_PREFIXES)]
     
     if not models:
         return ["No base models found (llama3, mistral, phi3)"]
@@ -100,6 +85,7 @@ if 'metrics_b' not in st.session_state: st.session_state.metrics_b = BLANK_METRI
 if 'critique_report' not in st.session_state: st.session_state.critique_report = {}
 if 'critique_raw' not in st.session_state: st.session_state.critique_raw = ""
 if 'metrics_critique' not in st.session_state: st.session_state.metrics_critique = BLANK_METRICS
+if 'position_check' not in st.session_state: st.session_state.position_check = None
 
 # --- THE LIST IS NOW DYNAMIC AND FILTERED ---
 AVAILABLE_MODELS = get_base_models_by_prefix()
@@ -140,6 +126,14 @@ with st.sidebar:
                                           placeholder="e.g., You are a sarcastic pirate.")
         st.divider()
         st.header("3. Run")
+        swap_positions = st.checkbox("Position-swapped critique (A/B + B/A)", value=False,
+                                     help="Runs the critic on both orderings in parallel and flags "
+                                          "verdicts that flip with the order (position bias). "
+                                          "Runs in parallel only with OLLAMA_NUM_PARALLEL=2 or more.")
+        if swap_positions and get_scheduler().slots_per_model < 2:
+            st.warning("The critic model gets one call at a time (OLLAMA_NUM_PARALLEL=1), so the "
+                       "A/B and B/A critiques run one after the other and take twice as long. "
+                       "Start Ollama and this app with OLLAMA_NUM_PARALLEL=2 or more to run them together.")
         
         if st.button("Generate & Compare", type="primary"):
             st.session_state.response_a = ""
@@ -149,6 +143,7 @@ with st.sidebar:
             st.session_state.critique_report = {}
             st.session_state.critique_raw = ""
             st.session_state.metrics_critique = BLANK_METRICS
+            st.session_state.position_check = None
             
             with st.status("Running comparison...", expanded=True) as status:
                 status.update(label="Generating responses for Model A and B...")
@@ -164,12 +159,14 @@ with st.sidebar:
                 critique_data = coordinator.run_critique(
                     user_prompt, 
                     model_a_name, st.session_state.response_a, st.session_state.metrics_a,
-                    model_b_name, st.session_state.response_b, st.session_state.metrics_b
+                    model_b_name, st.session_state.response_b, st.session_state.metrics_b,
+                    swap_positions=swap_positions
                 )
                 
                 st.session_state.critique_report = critique_data.get("critique_report", {"verdict": "Critic failed."})
                 st.session_state.critique_raw = critique_data.get("raw_critique", "")
                 st.session_state.metrics_critique = critique_data.get("metrics", BLANK_METRICS)
+                st.session_state.position_check = critique_data.get("position_check")
                 status.update(label="Comparison complete!", state="complete")
 
 # --- Main Display Area ---
@@ -191,6 +188,22 @@ if st.session_state.critique_report:
         st.subheader("Advice")
         st.markdown(report.get("advice"))
 
+    position_check = st.session_state.position_check
+    if position_check:
+        st.subheader("Position-Bias Check")
+        col1, col2 = st.columns(2)
+        col1.metric("Winner (A/B order)", position_check.get("winner_ab") or "Unclear")
+        col2.metric("Winner (B/A order, remapped)", position_check.get("winner_ba") or "Unclear")
+        if position_check.get("consistent") is True:
+            st.success("The critic picked the same winner in both orders.")
+        elif position_check.get("consistent") is False:
+            st.warning("⚠️ **Inconsistent judgment!** The verdict flipped when the responses were swapped.")
+        else:
+            st.info("Could not read a winner from one of the verdicts.")
+        with st.expander("Show Swapped (B/A) Verdict"):
+            st.info(position_check.get("swapped_report", {}).get("verdict", ""))
+            render_metrics_dashboard(position_check.get("swapped_metrics", BLANK_METRICS))
+
     with st.expander("Show Critic's Performance & Raw Output"):
         render_metrics_dashboard(st.session_state.metrics_critique)
         st.markdown("---")
@@ -210,3 +223,40 @@ with col2:
     st.markdown(st.session_state.response_b)
     with st.expander("Show Metrics for Model B"):
         render_metrics_dashboard(st.session_state.metrics_b)
+
+# --- Batch Evaluation (Prompt Suite) ---
+st.divider()
+st.header("📦 Batch Evaluation")
+st.caption("Run a whole prompt suite (JSONL or CSV with a 'prompt' column, optional 'id', 'mode' and 'persona') "
+           "against several models. Finished calls are cached, so a re-run resumes where it stopped. "
+           "For unattended runs use: `python -m app.batch <suite> --models <a> <b>`")
+
+suite_file = st.file_uploader("Prompt Suite", type=["jsonl", "csv"])
+batch_models = st.multiselect("Models to Evaluate", AVAILABLE_MODELS,
+                              default=[m for m in (model_a_name, model_b_name) if m in AVAILABLE_MODELS])
+batch_col1, batch_col2 = st.columns(2)
+batch_run_name = batch_col1.text_input("Run Name (optional)", placeholder="e.g., nightly_llama3_vs_mistral")
+batch_critique = batch_col2.checkbox("Critique every model pair", value=True)
+
+if st.button("Run Batch", disabled=not (suite_file and batch_models)):
+    suite = parse_prompt_suite(suite_file.getvalue().decode("utf-8"), suite_file.name.rsplit(".", 1)[-1])
+    progress_bar = st.progress(0.0, text="Starting batch...")
+
+    def update_progress(done, total, label):
+        progress_bar.progress(done / total, text=f"[{done}/{total}] {label}")
+
+    evaluator = BatchEvaluator(critique=batch_critique, swap_positions=swap_positions)
+    generations_df, critiques_df = evaluator.run(suite, batch_models, batch_run_name or None, update_progress)
+    st.session_state.batch_generations = generations_df
+    st.session_state.batch_critiques = critiques_df
+    progress_bar.progress(1.0, text="Batch complete!")
+
+if "batch_generations" in st.session_state:
+    generations_df = st.session_state.batch_generations
+    st.subheader("Throughput by Model and Mode")
+    st.dataframe(generations_df.groupby(["model", "mode"])[["tokens_per_s", "tokens_out", "time_total_s"]].mean())
+    st.subheader("Generations")
+    st.dataframe(generations_df.drop(columns=["response"]), use_container_width=True)
+    if not st.session_state.batch_critiques.empty:
+        st.subheader("Critiques")
+        st.dataframe(st.session_state.batch_critiques, use_container_width=True)
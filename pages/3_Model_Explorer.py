@@ -1,9 +1,13 @@
 # pages/3_Model_Explorer.py
 import streamlit as st
-import subprocess
-import re
 import pandas as pd
 import time
+from app.model_registry import get_registry
+from app.pull_manager import get_pull_manager
+from app.memory_fit import estimate_library_model, check_fit, memory_snapshot
+from app.config import DEFAULT_NUM_CTX, MEMORY_CHECK_TTL_S
+from app.benchmark import benchmark_model
+from app.perf_db import latest_benchmark_summary
 
 st.set_page_config(page_title="Model Explorer", layout="wide")
 st.title("🔍 Model Explorer")
@@ -12,6 +16,7 @@ st.title("🔍 Model Explorer")
 CURATED_MODEL_LIST = [
     {
         "name": "llama3.1:8b",
+        "params_b": 8.0,
         "tags": ["General Purpose", "New"],
         "description": "Meta's newest, state-of-the-art 8B model. Excellent for general chat, reasoning, and code.",
         "ollama_link": "https://ollama.com/library/llama3.1",
@@ -19,6 +24,7 @@ CURATED_MODEL_LIST = [
     },
     {
         "name": "mistral:7b",
+        "params_b": 7.2,
         "tags": ["General Purpose", "Fast"],
         "description": "The classic 7B model. Famous for its high performance at a small size. A great all-rounder.",
         "ollama_link": "https://ollama.com/library/mistral",
@@ -26,6 +32,7 @@ CURATED_MODEL_LIST = [
     },
     {
         "name": "codellama:7b",
+        "params_b": 6.7,
         "tags": ["Coding"],
         "description": "A Llama model fine-tuned specifically for code generation, completion, and debugging.",
         "ollama_link": "https://ollama.com/library/codellama",
@@ -33,6 +40,7 @@ CURATED_MODEL_LIST = [
     },
     {
         "name": "deepseek-coder:6.7b",
+        "params_b": 6.7,
         "tags": ["Coding", "Fast"],
         "description": "A very strong model built specifically for code generation. Many devs prefer it over Codellama.",
         "ollama_link": "https://ollama.com/library/deepseek-coder",
@@ -40,6 +48,7 @@ CURATED_MODEL_LIST = [
     },
     {
         "name": "phi3:mini",
+        "params_b": 3.8,
         "tags": ["Small", "Fast"],
         "description": "Microsoft's 3.8B model. Very capable for its size, designed to run on-device.",
         "ollama_link": "https://ollama.com/library/phi3",
@@ -47,6 +56,7 @@ CURATED_MODEL_LIST = [
     },
     {
         "name": "gemma2:2b",
+        "params_b": 2.6,
         "tags": ["Small", "Fast", "New"],
         "description": "Google's new 2B model. Highly efficient and a great choice for lightweight tasks.",
         "ollama_link": "https://ollama.com/library/gemma2",
@@ -54,6 +64,7 @@ CURATED_MODEL_LIST = [
     },
     {
         "name": "llava:7b",
+        "params_b": 7.2,
         "tags": ["Multimodal", "Vision"],
         "description": "A multimodal model that can understand **images and text**. Give it a URL or upload an image and ask questions.",
         "ollama_link": "https://ollama.com/library/llava",
@@ -62,115 +73,110 @@ CURATED_MODEL_LIST = [
 ]
 
 # --- Helper function to get *local* models ---
-@st.cache_data(ttl=60) # Cache for 60 seconds
 def get_local_models():
     """
-    Runs 'ollama list' and returns a simple list of model names.
+    Returns a simple list of model names from the shared model registry.
     """
-    model_names = []
-    try:
-        result = subprocess.run(
-            ["ollama", "list"], 
-            capture_output=True, text=True, check=True, encoding='utf-8'
-        )
-        lines = result.stdout.strip().split('\n')
-        
-        if len(lines) > 1:
-            for line in lines[1:]:
-                parts = re.split(r'\s+', line.strip())
-                if len(parts) >= 1:
-                    model_names.append(parts[0])
-    except Exception as e:
-        # Don't show error here, show it in the main table function
-        pass
-    return model_names
+    # Don't show errors here, they are shown in the main table function
+    return get_registry().model_names()
 
 # --- Helper function to get local models as a DataFrame ---
-@st.cache_data(ttl=60)
 def get_local_models_df():
     """
-    Runs 'ollama list' and parses the output into a DataFrame.
+    Builds a DataFrame of the installed models from the shared model registry.
     """
-    models = []
-    try:
-        result = subprocess.run(
-            ["ollama", "list"], 
-            capture_output=True, text=True, check=True, encoding='utf-8'
-        )
-        lines = result.stdout.strip().split('\n')
-        
-        if len(lines) <= 1:
-            return pd.DataFrame(columns=["Name", "Size", "Modified"])
+    registry = get_registry()
+    models = registry.list_models()
+    if registry.error:
+        st.error(f"Error reading local models: {registry.error}")
+    if not models:
+        return pd.DataFrame(columns=["Name", "Size", "Modified", "Params", "Quant", "ID"])
 
-        for line in lines[1:]:
-            parts = re.split(r'\s+', line.strip())
-            if len(parts) >= 4:
-                name, model_id, size, unit = parts[0], parts[1], parts[2], parts[3]
-                modified = " ".join(parts[4:])
-                models.append({
-                    "Name": name, "Size": f"{size} {unit}", "Modified": modified, "ID": model_id
-                })
-        return pd.DataFrame(models)
-                        
-    except Exception as e:
-        st.error(f"Error running 'ollama list': {e}")
-        return pd.DataFrame(columns=["Name", "Size", "Modified"])
+    return pd.DataFrame([{
+        "Name": m["name"], "Size": m["size"], "Modified": m["modified_at"][:16].replace("T", " "),
+        "Params": m["parameter_size"], "Quant": m["quantization"], "ID": m["digest"][:12]
+    } for m in models])
 
 def pull_model(model_name):
-    """Pulls a model and streams the output to the UI."""
-    with st.status(f"Pulling {model_name}...", expanded=True) as status:
-        output_container = st.empty()
-        full_output = ""
-        try:
-            cmd = ["ollama", "pull", model_name]
-            process = subprocess.Popen(
-                cmd, stdout=subprocess.PIPE, stderr=subprocess.STDOUT, 
-                text=True, encoding='utf-8'
-            )
-            for line in iter(process.stdout.readline, ''):
-                full_output += line
-                output_container.code(full_output, language='bash')
-            process.stdout.close()
-            process.wait()
-            
-            if process.returncode == 0:
-                status.update(label=f"Successfully pulled {model_name}!", state="complete")
-                st.toast("Model pull complete!", icon="✅")
-                st.cache_data.clear() # Clear all caches
-                st.cache_resource.clear()
-                time.sleep(1)
-                st.rerun() # Rerun to update the "Installed" status
-            else:
-                status.update(label=f"Failed to pull {model_name}.", state="error")
-                st.error("Pull failed. See output above.")
-        except Exception as e:
-            status.update(label="Pull failed.", state="error")
-            st.error(f"An error occurred: {e}")
+    """Queues a pull in the background pull manager; progress shows in the Downloads section."""
+    job = get_pull_manager().submit(model_name)
+    st.toast(f"Queued pull for {job.model_name}", icon="⬇️")
+    st.rerun() # Rerun so the Downloads section starts refreshing
+
+def _format_eta(seconds) -> str:
+    if seconds is None:
+        return "--"
+    minutes, seconds = divmod(int(seconds), 60)
+    hours, minutes = divmod(minutes, 60)
+    return f"{hours}h{minutes:02d}m" if hours else f"{minutes}m{seconds:02d}s"
+
+def render_pull_job(job):
+    """Renders one pull as a single compact progress bar."""
+    snap = job.snapshot()
+    label = f"**{snap['model']}** · {snap['status']}"
+    if snap["total_bytes"]:
+        label += (f" · {snap['completed_bytes'] / 1e9:.2f}/{snap['total_bytes'] / 1e9:.2f} GB"
+                  f" · {snap['bytes_per_s'] / 1e6:.1f} MB/s · ETA {_format_eta(snap['eta_s'])}")
+    cols = st.columns([6, 1])
+    cols[0].progress(min(snap["fraction"], 1.0), text=label)
+    if job.is_active:
+        if cols[1].button("Cancel", key=f"cancel_{snap['model']}", use_container_width=True):
+            get_pull_manager().cancel(snap["model"])
+    elif snap["state"] == "error":
+        cols[1].markdown("❌")
+        st.caption(snap["error"])
+    else:
+        cols[1].markdown("✅" if snap["state"] == "success" else "⏹️")
+
+@st.cache_data(ttl=MEMORY_CHECK_TTL_S, show_spinner=False)
+def get_memory_snapshot() -> dict:
+    """memory_snapshot reads nvidia-smi, /proc and /api/ps, so it isn't run on every rerun or fragment tick."""
+    return memory_snapshot()
+
+def render_fit_badge(model_name: str, snapshot: dict, parameter_count: float = 0) -> dict:
+    """Shows the predicted memory need of a not-yet-pulled model and whether it fits here."""
+    estimate = estimate_library_model(model_name, st.session_state.fit_num_ctx, parameter_count)
+    if not estimate:
+        st.caption("Memory need unknown (no size in the tag).")
+        return None
+    fit = check_fit(estimate["total_bytes"], snapshot=snapshot)
+    if fit["status"] == "fits":
+        st.caption(f"✅ Fits: {fit['message']}")
+    elif fit["status"] == "evicts":
+        st.caption(f"⚠️ {fit['message']}")
+    elif fit["status"] == "too_large":
+        st.caption(f"❌ Too large: {fit['message']}")
+    else:
+        st.caption(f"Needs ~{estimate['total_bytes'] / 1e9:.1f} GB. {fit['message']}")
+    return fit
+
+def run_benchmarks(model_names: list):
+    """Benchmarks each model in turn with a progress bar, then refreshes the table."""
+    progress_bar = st.progress(0.0, text="Starting benchmark...")
+    for i, model_name in enumerate(model_names):
+        def update_progress(step, steps, label, i=i):
+            progress_bar.progress((i + step / steps) / len(model_names),
+                                  text=f"[{i + 1}/{len(model_names)}] {label}")
+        rows = benchmark_model(model_name, on_progress=update_progress)
+        failed = [row for row in rows if not row["ok"]]
+        if failed:
+            st.error(f"Benchmark of {model_name} had {len(failed)} failed runs: {failed[0]['error']}")
+    progress_bar.progress(1.0, text="Benchmark complete!")
+    st.toast("Benchmark complete!", icon="⏱️")
 
 # --- NEW: Helper function to delete a local model ---
 def delete_model(model_name):
-    """Deletes a model and streams the output to the UI."""
+    """Deletes a model through the registry, which also invalidates the model list."""
     with st.status(f"Deleting {model_name}...", expanded=True) as status:
-        try:
-            cmd = ["ollama", "rm", model_name]
-            result = subprocess.run(
-                cmd, 
-                capture_output=True, text=True, check=True, encoding='utf-8'
-            )
-            
+        success, error = get_registry().delete_model(model_name)
+        if success:
             status.update(label=f"Successfully deleted {model_name}!", state="complete")
             st.toast("Model deleted!", icon="🗑️")
-            st.cache_data.clear() # Clear all caches
-            st.cache_resource.clear()
             time.sleep(1)
             st.rerun() # Rerun to update all model lists
-            
-        except subprocess.CalledProcessError as e:
+        else:
             status.update(label=f"Failed to delete {model_name}.", state="error")
-            st.error(f"Deletion failed: {e.stderr}")
-        except Exception as e:
-            status.update(label="Deletion failed.", state="error")
-            st.error(f"An error occurred: {e}")
+            st.error(f"Deletion failed: {error}")
 # --- END NEW FUNCTION ---
 
 # --- Main Page ---
@@ -182,16 +188,57 @@ st.markdown("""
 """)
 st.divider()
 
+if 'fit_num_ctx' not in st.session_state:
+    st.session_state.fit_num_ctx = DEFAULT_NUM_CTX
+st.number_input("Context length (num_ctx) used for memory estimates", min_value=512, max_value=131072,
+                step=512, key="fit_num_ctx",
+                help="Bigger contexts need a bigger KV cache. Estimates assume the default Q4_K_M "
+                     "quantization unless the tag names another one.")
+fit_snapshot = get_memory_snapshot()
+st.divider()
+
 st.header("Pull Any Model")
 st.markdown("Enter any model name from the **official [Ollama Library](https://ollama.com/library)** to pull it. This will not work for Hugging Face models that are not in the library.")
 model_to_pull = st.text_input("Model Name to Pull", placeholder="e.g., llama3.1:70b or gemma2:2b")
-if st.button(f"Pull '{model_to_pull}'"):
+pull_anyway = True
+if model_to_pull:
+    fit = render_fit_badge(model_to_pull, fit_snapshot)
+    if fit and fit["status"] == "too_large":
+        pull_anyway = st.checkbox("I know it won't fit in memory, pull anyway")
+if st.button(f"Pull '{model_to_pull}'", disabled=not pull_anyway):
     if not model_to_pull:
         st.warning("Please enter a model name to pull.")
     else:
         pull_model(model_to_pull)
 st.divider()
 
+# --- Downloads (refreshes itself while pulls are running) ---
+pull_manager = get_pull_manager()
+if 'seen_finished_pulls' not in st.session_state:
+    st.session_state.seen_finished_pulls = {
+        (job.model_name, job.created_at) for job in pull_manager.jobs() if not job.is_active
+    }
+
+@st.fragment(run_every=1 if pull_manager.active_jobs() else None)
+def render_downloads():
+    jobs = pull_manager.jobs()
+    if not jobs:
+        return
+    st.header("Downloads")
+    for job in jobs:
+        render_pull_job(job)
+    if not any(job.is_active for job in jobs):
+        st.button("Clear Finished", on_click=pull_manager.clear_finished)
+
+    # A finished pull changes the installed list, so refresh the whole page once
+    finished = {(job.model_name, job.created_at) for job in jobs if not job.is_active}
+    if finished - st.session_state.seen_finished_pulls:
+        st.session_state.seen_finished_pulls |= finished
+        st.rerun()
+    st.divider()
+
+render_downloads()
+
 st.header("Explore Curated Models")
 all_tags = sorted(list(set(tag for model in CURATED_MODEL_LIST for tag in model["tags"])))
 selected_tags = st.multiselect("Filter by specialty:", all_tags)
@@ -219,14 +266,22 @@ for model in CURATED_MODEL_LIST:
         if is_installed:
             st.button("✅ **Installed**", key=button_key, disabled=True, use_container_width=True)
         else:
-            if st.button(f"Pull", key=button_key, use_container_width=True):
+            fit = render_fit_badge(model["name"], fit_snapshot, model["params_b"] * 1e9)
+            too_large = bool(fit) and fit["status"] == "too_large"
+            if st.button(f"Pull", key=button_key, use_container_width=True, disabled=too_large,
+                         help="Too large for this machine. Use 'Pull Any Model' to force it." if too_large else None):
                 pull_model(model["name"])
     
     st.markdown("---")
 
 # --- Section 3: My Locally Installed Models (UPDATED) ---
 st.header("My Locally Installed Models")
-st.markdown("This list updates automatically when you pull or delete a model.")
+col_caption, col_refresh = st.columns([5, 1])
+col_caption.markdown("This list updates when you pull or delete a model here, and every minute "
+                     "for models pulled with the `ollama` CLI.")
+if col_refresh.button("🔄 Refresh models", use_container_width=True):
+    get_registry().invalidate()
+    get_memory_snapshot.clear()
 
 model_df = get_local_models_df()
 if model_df.empty:
@@ -234,25 +289,50 @@ if model_df.empty:
 else:
     # Create a dynamic list instead of a static dataframe
     
-    # 1. Create Headers
-    header_cols = st.columns([3, 2, 3, 1])
+    # 1. Create Headers (same spec as the rows; "Actions" spans the two button columns)
+    column_spec = [3, 2, 2, 2, 3, 1, 1]
+    header_cols = st.columns(column_spec)
     header_cols[0].markdown("**Name**")
     header_cols[1].markdown("**Size**")
-    header_cols[2].markdown("**Modified**")
-    header_cols[3].markdown("**Action**")
+    header_cols[2].markdown("**Params**")
+    header_cols[3].markdown("**Quant**")
+    header_cols[4].markdown("**Modified**")
+    header_cols[5].markdown("**Actions**")
     st.divider()
 
     # 2. Loop through the DataFrame and create a row for each model
     for index, row in model_df.iterrows():
         model_name = row["Name"]
-        cols = st.columns([3, 2, 3, 1])
+        cols = st.columns(column_spec)
         
         cols[0].markdown(model_name)
         cols[1].markdown(row["Size"])
-        cols[2].markdown(row["Modified"])
+        cols[2].markdown(row["Params"] or "-")
+        cols[3].markdown(row["Quant"] or "-")
+        cols[4].markdown(row["Modified"])
         
+        if cols[5].button("Benchmark", key=f"bench_{model_name}", use_container_width=True):
+            run_benchmarks([model_name])
+
         # Add the delete button
-        if cols[3].button("Delete", key=f"del_{model_name}", use_container_width=True):
+        if cols[6].button("Delete", key=f"del_{model_name}", use_container_width=True):
             delete_model(model_name)
 
+    st.divider()
+    if st.button("Benchmark All Models"):
+        run_benchmarks(model_df["Name"].tolist())
+
+    # --- Performance on this machine (sortable: click a column header) ---
+    st.subheader("Measured Performance")
+    st.caption("Latest benchmark per model: cold load time, then warm prefill and decode speed "
+               "at each prompt length (in tokens).")
+    perf_df = latest_benchmark_summary()
+    if perf_df.empty or len(perf_df.columns) <= 1:
+        st.info("No benchmarks yet. Click 'Benchmark' on a model above.")
+    else:
+        perf_df = model_df[["Name", "Size", "Params", "Quant"]].merge(
+            perf_df, left_on="Name", right_on="model", how="left"
+        ).drop(columns=["model"])
+        st.dataframe(perf_df, use_container_width=True, hide_index=True)
+
 # --- END OF UPDATE ---
@@ -1,10 +1,13 @@
 # pages/4_Model_Playground.py
+import uuid
 import streamlit as st
-import subprocess
-import re
 import pandas as pd
-from app.runner import run_ollama
+from app.runner import run_ollama, ChatStream
+from app.model_registry import get_registry
+from app.model_options import get_model_options, save_model_options
+from app.sweep import build_grid, run_sweep, summarize_sweep, marginal_throughput, recommend
 from app.config import CAPS_COMPARISON # We can re-use the 1000-token cap
+from app.scheduler import request_context, PRIORITY_INTERACTIVE
 
 # --- HELPER FUNCTIONS COPIED FROM OTHER APPS ---
 # This makes the app self-contained and robust.
@@ -39,26 +42,12 @@ def render_metrics_dashboard(metrics: dict):
     col5.metric("Gen. Time (s)", metrics.get("time_gen_s", 0))
     col6.metric("Load Time (s)", metrics.get("time_load_s", 0))
 
-@st.cache_data(ttl=60) # Cache for 60 seconds
 def get_local_models():
-    """
-    Runs 'ollama list' and returns a simple list of all model names.
-    """
-    model_names = []
-    try:
-        result = subprocess.run(
-            ["ollama", "list"], 
-            capture_output=True, text=True, check=True, encoding='utf-8'
-        )
-        lines = result.stdout.strip().split('\n')
-        
-        if len(lines) > 1:
-            for line in lines[1:]:
-                parts = re.split(r'\s+', line.strip())
-                if len(parts) >= 1:
-                    model_names.append(parts[0])
-    except Exception as e:
-        st.error(f"Error reading local models: {e}")
+    """Returns the names of all installed models from the shared model registry."""
+    registry = get_registry()
+    model_names = registry.model_names()
+    if registry.error:
+        st.error(f"Error reading local models: {registry.error}")
     return model_names
 # --- END OF HELPER FUNCTIONS ---
 
@@ -66,13 +55,21 @@ def get_local_models():
 # --- Page Config ---
 st.set_page_config(page_title="Model Playground", layout="wide")
 st.title("🧪 Model Playground")
-st.caption("A simple app to test a single model and see its performance.")
+st.caption("A simple app to test a single model, or chat with it, and see its performance.")
 
 # --- Initialize State ---
+if 'session_id' not in st.session_state:
+    st.session_state.session_id = uuid.uuid4().hex
 if 'playground_response' not in st.session_state:
     st.session_state.playground_response = ""
 if 'playground_metrics' not in st.session_state:
     st.session_state.playground_metrics = BLANK_METRICS
+if 'chat_messages' not in st.session_state:
+    st.session_state.chat_messages = []
+if 'chat_turn_metrics' not in st.session_state:
+    st.session_state.chat_turn_metrics = []
+if 'chat_model' not in st.session_state:
+    st.session_state.chat_model = None
 
 # --- Sidebar Controls ---
 with st.sidebar:
@@ -90,6 +87,128 @@ with st.sidebar:
     persona = st.text_area("System Prompt / Persona (Optional)", height=150,
                            placeholder="e.g., You are a witty assistant who answers in rhymes.")
 
+    mode = st.radio("Mode", ["Single Prompt", "Chat", "Parameter Sweep"], horizontal=True,
+                    help="Chat keeps the conversation going and streams each reply as it is generated. "
+                         "Parameter Sweep times the model across a grid of Ollama options.")
+    if mode == "Chat" and st.button("Clear Chat", use_container_width=True):
+        st.session_state.chat_messages = []
+        st.session_state.chat_turn_metrics = []
+
+# --- Parameter Sweep Mode ---
+def _parse_int_list(text: str) -> list:
+    return [int(v) for v in text.replace(" ", "").split(",") if v]
+
+if mode == "Parameter Sweep":
+    st.header("Inference-Parameter Sweep")
+    saved = get_model_options(model_name)
+    st.caption(f"Current saved defaults for **{model_name}**: {saved or 'none (server defaults)'}. "
+               "Leave a field empty to use the server default for that option.")
+    sweep_prompt = st.text_area("Benchmark Prompt", height=100,
+                                value="Explain how a bicycle stays upright in one paragraph.")
+    grid_cols = st.columns(4)
+    grid_text = {
+        "num_ctx": grid_cols[0].text_input("num_ctx values", "2048, 4096"),
+        "num_batch": grid_cols[1].text_input("num_batch values", "256, 512"),
+        "num_thread": grid_cols[2].text_input("num_thread values", ""),
+        "num_predict": grid_cols[3].text_input("num_predict values", "128"),
+    }
+    repeats = st.slider("Repeats per configuration", 1, 10, 3)
+    try:
+        param_values = {name: _parse_int_list(text) for name, text in grid_text.items()}
+    except ValueError:
+        st.error("Option values must be comma-separated integers.")
+        st.stop()
+    n_configs = len(build_grid(param_values))
+    st.markdown(f"**{n_configs} configurations x {repeats} repeats = {n_configs * repeats} timed runs**")
+
+    if st.button("Run Sweep", type="primary"):
+        progress_bar = st.progress(0.0, text="Starting sweep...")
+        def update_progress(done, total, label):
+            progress_bar.progress(done / total, text=f"[{done}/{total}] {label}")
+        st.session_state.sweep_results = run_sweep(model_name, sweep_prompt, param_values, repeats, update_progress)
+        st.session_state.sweep_model = model_name
+        progress_bar.progress(1.0, text="Sweep complete!")
+
+    if st.session_state.get("sweep_results") is not None and st.session_state.sweep_model == model_name:
+        results = st.session_state.sweep_results
+        summary = summarize_sweep(results)
+        if summary.empty:
+            st.error(f"Every run failed: {results['error'].iloc[0]}")
+            st.stop()
+
+        best = recommend(summary)
+        st.success(f"**Fastest configuration:** {best} "
+                   f"({summary.iloc[0]['decode_tok_s']} decode tok/s, p90 latency {summary.iloc[0]['latency_p90_s']}s)")
+        if st.button(f"Save as default for {model_name}"):
+            save_model_options(model_name, best)
+            st.toast(f"Saved defaults for {model_name}", icon="💾")
+
+        swept = [p for p in param_values if len(param_values[p]) > 1]
+        if swept:
+            chart_cols = st.columns(len(swept))
+            for col, param in zip(chart_cols, swept):
+                col.markdown(f"##### Throughput vs {param}")
+                col.line_chart(marginal_throughput(results, param))
+        st.subheader("All Configurations")
+        st.dataframe(summary, use_container_width=True, hide_index=True)
+    st.stop()
+
+# --- Chat Mode ---
+if mode == "Chat":
+    # The model stays loaded between turns (keep_alive), so Ollama reuses its KV cache
+    # for the shared conversation prefix and only prefills each new message.
+    if st.session_state.chat_model != model_name:
+        st.session_state.chat_messages = []
+        st.session_state.chat_turn_metrics = []
+        st.session_state.chat_model = model_name
+
+    for message in st.session_state.chat_messages:
+        with st.chat_message(message["role"]):
+            st.markdown(message["content"])
+
+    if chat_prompt := st.chat_input(f"Message {model_name}..."):
+        st.session_state.chat_messages.append({"role": "user", "content": chat_prompt})
+        with st.chat_message("user"):
+            st.markdown(chat_prompt)
+
+        messages = st.session_state.chat_messages
+        if persona:
+            messages = [{"role": "system", "content": persona}] + messages
+
+        # Interactive turns jump the queue ahead of debates and batch runs on a shared server
+        with st.chat_message("assistant"), \
+                request_context(priority=PRIORITY_INTERACTIVE, session=st.session_state.session_id):
+            stream = ChatStream(model_name, messages, temperature=0.5, **CAPS_COMPARISON)
+            st.write_stream(stream)
+            if not stream.success:
+                st.error(stream.error)
+
+        if stream.output:
+            st.session_state.chat_messages.append({"role": "assistant", "content": stream.output})
+        else:
+            # No reply: drop the message so the next request doesn't send two user turns in a row
+            st.session_state.chat_messages.pop()
+        if stream.success:
+            st.session_state.chat_turn_metrics.append({
+                "turn": len(st.session_state.chat_turn_metrics) + 1,
+                "ttft_s": stream.metrics.get("ttft_s", 0),
+                "prefill_tok_s": stream.metrics.get("prefill_tokens_per_s", 0),
+                "decode_tok_s": stream.metrics.get("tokens_per_s", 0),
+                "tokens_prefilled": stream.metrics.get("tokens_in", 0),
+                "tokens_out": stream.metrics.get("tokens_out", 0),
+            })
+
+    if st.session_state.chat_turn_metrics:
+        with st.expander("Per-Turn Performance", expanded=False):
+            turn_df = pd.DataFrame(st.session_state.chat_turn_metrics).set_index("turn")
+            col1, col2 = st.columns(2)
+            col1.markdown("##### Throughput (tok/s)")
+            col1.line_chart(turn_df[["prefill_tok_s", "decode_tok_s"]])
+            col2.markdown("##### Time to First Token (s)")
+            col2.line_chart(turn_df[["ttft_s"]])
+            st.dataframe(turn_df, use_container_width=True)
+    st.stop()
+
 # --- Main Page ---
 user_prompt = st.text_area("Your Prompt", height=200, 
                            placeholder="Enter your prompt here...")
@@ -105,7 +224,8 @@ if st.button("Generate Response", type="primary"):
         if persona:
             full_prompt = f"{persona}\n\n---\n\n{user_prompt}"
             
-        with st.status(f"Generating response with {model_name}...", expanded=True) as status:
+        with st.status(f"Generating response with {model_name}...", expanded=True) as status, \
+                request_context(priority=PRIORITY_INTERACTIVE, session=st.session_state.session_id):
             success, raw, metrics, err = run_ollama(
                 model_name=model_name,
                 prompt=full_prompt,
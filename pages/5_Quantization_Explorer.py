@@ -0,0 +1,94 @@
+# pages/5_Quantization_Explorer.py
+import glob
+import streamlit as st
+import pandas as pd
+from app.model_registry import get_registry
+from app.quant_explorer import group_variants, evaluate_variants, summarize_variants, recommend_variant
+from app.batch import load_prompt_suite
+from app.prompts import PROMPT_BASELINE
+
+# --- Page Config ---
+st.set_page_config(page_title="Quantization Explorer", layout="wide")
+st.title("⚖️ Quantization Explorer")
+st.caption("Same model, different quantizations: speed vs. memory vs. critic-judged quality.")
+
+# --- Initialize State ---
+if 'quant_results' not in st.session_state:
+    st.session_state.quant_results = None
+
+# --- Sidebar Controls ---
+with st.sidebar:
+    st.header("1. Model Family")
+    registry = get_registry()
+    groups = group_variants(registry.list_models())
+    if registry.error:
+        st.error(f"Error reading local models: {registry.error}")
+        st.stop()
+    if not groups:
+        st.warning("No model with two or more quantizations is installed. "
+                   "Pull e.g. `llama3:8b` and `llama3:8b-instruct-q8_0` in the 'Model Explorer'.")
+        st.stop()
+
+    group_key = st.selectbox("Model Family", list(groups))
+    variant_names = [m["name"] for m in groups[group_key]]
+    selected_variants = st.multiselect("Variants to Compare", variant_names, default=variant_names)
+
+    st.header("2. Prompts")
+    suite_paths = sorted(glob.glob("config/prompt_suites/*.jsonl") + glob.glob("config/prompt_suites/*.csv"))
+    suite_path = st.selectbox("Prompt Suite", suite_paths) if suite_paths else None
+    max_prompts = st.slider("Prompts to Use", 1, 20, 5)
+    debate_topic = st.text_input("Debate Topic (optional)", placeholder="e.g., AI will create more jobs than it destroys",
+                                 help="Adds a debate opening statement to the prompts.")
+    judge = st.checkbox("Critic-judged quality", value=True,
+                        help="The critic scores every response 1-10. Turn off for a speed-only run.")
+
+    st.header("3. Run")
+    run_clicked = st.button("Evaluate Variants", type="primary", disabled=len(selected_variants) < 2)
+
+# --- Run ---
+if run_clicked:
+    suite = load_prompt_suite(suite_path)[:max_prompts] if suite_path else []
+    if debate_topic:
+        suite.append({
+            "id": "debate-baseline", "mode": "debate", "persona": "",
+            "prompt": PROMPT_BASELINE.format(topic=debate_topic, side="PRO",
+                                             persona_instructions="You are a neutral debater."),
+        })
+    if not suite:
+        st.error("No prompts to run. Add a prompt suite to config/prompt_suites/ or enter a debate topic.")
+        st.stop()
+
+    progress_bar = st.progress(0.0, text="Starting evaluation...")
+    def update_progress(done, total, label):
+        progress_bar.progress(done / total, text=f"[{done}/{total}] {label}")
+    st.session_state.quant_results = evaluate_variants(selected_variants, suite, judge, update_progress)
+    progress_bar.progress(1.0, text="Evaluation complete!")
+
+# --- Display Area ---
+results = st.session_state.quant_results
+if results is None:
+    st.info("Pick a model family and click 'Evaluate Variants'.")
+    st.stop()
+
+summary = summarize_variants(results)
+if summary.empty:
+    st.error(f"Every run failed: {results['error'].iloc[0]}")
+    st.stop()
+
+best = recommend_variant(summary)
+quality_text = f", quality {best['quality']}/10" if pd.notna(best.get("quality")) else ""
+st.success(f"**Recommended:** `{best['variant']}` ({best['quant']}): "
+           f"{best['decode_tok_s']} decode tok/s, {best['memory_gb'] or best['disk_gb']} GB{quality_text}")
+
+st.header("Speed vs. Quality Frontier")
+if summary["quality"].notna().any():
+    st.scatter_chart(summary, x="decode_tok_s", y="quality", color="variant", size="disk_gb")
+    st.caption("Variants on the frontier are not beaten on both speed and quality by any other variant.")
+else:
+    st.bar_chart(summary.set_index("variant")[["decode_tok_s", "prefill_tok_s"]])
+
+st.header("Variant Summary")
+st.dataframe(summary, use_container_width=True, hide_index=True)
+
+with st.expander("Per-Prompt Results"):
+    st.dataframe(results, use_container_width=True, hide_index=True)
@@ -0,0 +1,91 @@
+# pages/6_Debate_Analytics.py
+import time
+import streamlit as st
+from app.analytics import (
+    SLIDERS, get_debate_archive, throughput_over_time, call_health,
+    side_rates_by_slider, win_rates, filter_debates
+)
+from app.transcript_store import get_transcript_store
+
+# --- Page Config ---
+st.set_page_config(page_title="Debate Analytics", layout="wide")
+st.title("📈 Debate Analytics")
+st.caption("Trends across every stored debate: speed, reliability, side discipline and wins.")
+
+# --- Load (incremental: only debates stored since the last rerun are read) ---
+archive = get_debate_archive()
+archive.refresh()
+
+if archive.debates.empty:
+    st.info("No debates stored yet. Finished debates from 'Battle of the Bots' appear here automatically.")
+    if st.button("Import Older JSON Transcripts (logs/transcripts/)"):
+        with st.spinner("Importing..."):
+            count = get_transcript_store().import_legacy_transcripts()
+        st.toast(f"Imported {count} transcript(s).")
+        st.rerun()
+    st.stop()
+
+# --- Sidebar Filters ---
+PERIODS = {"All time": None, "Last 7 days": 7, "Last 30 days": 30, "Last 90 days": 90}
+BUCKETS = {"Day": "D", "Week": "W", "Month": "M"}
+
+with st.sidebar:
+    st.header("Filters")
+    period = st.selectbox("Period", list(PERIODS))
+    all_models = sorted(set(archive.debates["model_pro"]) | set(archive.debates["model_con"]))
+    models = st.multiselect("Models", all_models, placeholder="All models")
+    bucket = st.radio("Time Bucket", list(BUCKETS), horizontal=True)
+    if st.button("Import Older JSON Transcripts"):
+        with st.spinner("Importing..."):
+            count = get_transcript_store().import_legacy_transcripts()
+        st.toast(f"Imported {count} transcript(s).")
+        st.rerun()
+
+days = PERIODS[period]
+since = time.time() - days * 86400 if days else None
+filter_key = (archive.version, since // 3600 if since else None, tuple(models))
+debates, rounds = archive.cached(("filter", filter_key), filter_debates, archive, since, models)
+
+daily = archive.daily
+if since:
+    daily = daily[daily.index.get_level_values("day") >= time.strftime("%Y-%m-%d", time.localtime(since))]
+
+# --- Headline Numbers ---
+col1, col2, col3, col4 = st.columns(4)
+col1.metric("Debates", len(debates))
+col2.metric("Model Calls", int(daily["calls"].sum()))
+col3.metric("Judged", int((debates["winner"] != "").sum()))
+col4.metric("Timeouts", int(daily["timeouts"].sum()))
+
+# --- Throughput ---
+st.header("Throughput Over Time")
+throughput = archive.cached(("throughput", filter_key, bucket), throughput_over_time, daily, BUCKETS[bucket], models)
+if throughput.empty:
+    st.info("No call metrics in this period.")
+else:
+    st.line_chart(throughput)
+    st.caption("Generated tokens per second of generation time, per model.")
+
+# --- Reliability ---
+st.header("Call Reliability")
+st.dataframe(archive.cached(("health", filter_key), call_health, daily, models), use_container_width=True)
+
+# --- Side Discipline ---
+st.header("Side Mismatches & Protests by Persona Slider")
+slider = st.selectbox("Slider", SLIDERS, format_func=str.title)
+rates = archive.cached(("slider", filter_key, slider), side_rates_by_slider, debates, rounds, slider)
+if rates.empty:
+    st.info("No turns in this period.")
+else:
+    chart_col, table_col = st.columns([2, 1])
+    chart_col.bar_chart(rates, x=slider, y=["mismatch_rate", "protest_rate"], stack=False)
+    table_col.dataframe(rates, use_container_width=True, hide_index=True)
+
+# --- Wins ---
+st.header("Win Rate by Model")
+wins = archive.cached(("wins", filter_key), win_rates, debates)
+if wins.empty:
+    st.info("No judged debates between different models in this period.")
+else:
+    st.dataframe(wins, use_container_width=True)
+    st.caption("Winners are read from the critic's verdict. Self-play debates are excluded.")
@@ -0,0 +1,150 @@
+# tools/fake_ollama_server.py
+"""
+A stand-in Ollama server for trying the apps, workers and load tests without GPUs.
+
+Answers the endpoints the app uses (/api/tags, ps, show, version, generate, chat,
+pull, delete) with canned, well-formed debate/critic output after a configurable
+delay. Run several on different ports to simulate several model servers:
+
+    python tools/fake_ollama_server.py --port 11501 --latency 0.5 &
+    OLLAMA_HOST=127.0.0.1:11501 python -m app.worker
+"""
+import argparse
+import json
+import random
+import threading
+import time
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+MODELS = ["llama3:8b", "mistral:7b", "critic:7b", "llama3:8b-instruct-q8_0"]
+
+DEBATE_OUTPUT = """<SIDE_CONFIRM>{side}</SIDE_CONFIRM>
+<ASSUMPTIONS>- The topic is taken at face value.</ASSUMPTIONS>
+<REFLECTION>- My opponent raised a fair point.</REFLECTION>
+<STANCE>pragmatic</STANCE>
+<CHANGE>- None</CHANGE>
+<REASONING>- Argument {n} for {side}: {words}</REASONING>
+<SIDE>{side}</SIDE>
+<FINAL>- Closing statement for {side}.</FINAL>
+<VERDICT>Both sides argued well. Winner: {side}</VERDICT>
+<SCORES>A: 8
+B: 6</SCORES>
+<SCORE>7</SCORE>"""
+
+WORDS = "evidence cost jobs growth risk study data policy trust market automation wages".split()
+
+
+class FakeOllama:
+    def __init__(self, latency_s: float, tokens_per_s: float, parallel: int):
+        self.latency_s = latency_s
+        self.tokens_per_s = tokens_per_s
+        self.models = list(MODELS)
+        self.loaded = set()
+        # Like OLLAMA_NUM_PARALLEL: requests beyond this wait for a slot
+        self.slots = threading.Semaphore(parallel)
+
+    def generate(self, body: dict) -> dict:
+        with self.slots:
+            time.sleep(self.latency_s * random.uniform(0.8, 1.2))
+        self.loaded.add(body.get("model", ""))
+        prompt = body.get("prompt", "")
+        side = "CON" if "side: CON" in prompt or "CON side" in prompt else "PRO"
+        output = DEBATE_OUTPUT.format(side=side, n=random.randint(0, 99), words=" ".join(random.sample(WORDS, 6)))
+        if "JSON format" in prompt:
+            output = '{"potential_fabrications": ["a 2025 study"]}'
+        return {"response": output, **self.timings(len(prompt) // 4, 60)}
+
+    def timings(self, tokens_in: int, tokens_out: int) -> dict:
+        gen_s = tokens_out / self.tokens_per_s
+        return {"done": True, "total_duration": int((self.latency_s + 0.1) * 1e9), "load_duration": int(1e7),
+                "eval_duration": int(gen_s * 1e9), "prompt_eval_duration": int(5e7),
+                "prompt_eval_count": tokens_in, "eval_count": tokens_out}
+
+
+def make_handler(server: FakeOllama):
+    class Handler(BaseHTTPRequestHandler):
+        def log_message(self, *args):
+            pass
+
+        def _json(self, obj):
+            data = json.dumps(obj).encode()
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+        def _line(self, obj):
+            self.wfile.write((json.dumps(obj) + "\n").encode())
+            self.wfile.flush()
+
+        def do_GET(self):
+            if self.path == "/api/tags":
+                self._json({"models": [{
+                    "name": m, "digest": f"sha256:{abs(hash(m)) % 10**12:012d}", "size": 4_700_000_000,
+                    "modified_at": "2025-01-01T10:00:00Z",
+                    "details": {"family": m.split(":")[0], "parameter_size": "8.0B",
+                                "quantization_level": "Q8_0" if "q8" in m else "Q4_0"}} for m in server.models]})
+            elif self.path == "/api/ps":
+                self._json({"models": [{"name": m, "size": 5_000_000_000, "size_vram": 0} for m in server.loaded]})
+            elif self.path == "/api/version":
+                self._json({"version": "0.0.0-fake"})
+            else:
+                self.send_response(404)
+                self.end_headers()
+
+        def do_DELETE(self):
+            self._json({})
+
+        def do_POST(self):
+            body = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))) or b"{}")
+            if self.path == "/api/show":
+                self._json({"details": {"parameter_size": "8.0B", "quantization_level": "Q4_0"},
+                            "model_info": {"general.parameter_count": 8030261248, "llama.context_length": 8192,
+                                           "llama.block_count": 32, "llama.embedding_length": 4096,
+                                           "llama.attention.head_count": 32, "llama.attention.head_count_kv": 8}})
+            elif self.path == "/api/generate":
+                if body.get("keep_alive") == 0:
+                    server.loaded.discard(body.get("model"))
+                    self._json({"done": True})
+                else:
+                    self._json(server.generate(body))
+            elif self.path == "/api/chat":
+                self.send_response(200)
+                self.send_header("Content-Type", "application/x-ndjson")
+                self.end_headers()
+                with server.slots:
+                    time.sleep(server.latency_s * 0.2)
+                    words = random.sample(WORDS, 8)
+                    for word in words:
+                        self._line({"message": {"role": "assistant", "content": word + " "}, "done": False})
+                        time.sleep(1 / server.tokens_per_s)
+                self._line({"message": {"role": "assistant", "content": ""}, **server.timings(20, len(words))})
+            elif self.path == "/api/pull":
+                self.send_response(200)
+                self.end_headers()
+                for i in range(5):
+                    self._line({"status": "pulling", "digest": "sha256:fake", "total": 1000, "completed": i * 250})
+                    time.sleep(0.05)
+                self._line({"status": "success"})
+                server.models.append(body.get("model", "unknown"))
+            else:
+                self.send_response(404)
+                self.end_headers()
+    return Handler
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Stand-in Ollama server with canned answers.")
+    parser.add_argument("--port", type=int, default=11434)
+    parser.add_argument("--latency", type=float, default=0.05, help="Seconds per generate call")
+    parser.add_argument("--tokens-per-s", type=float, default=60.0, help="Reported decode speed")
+    parser.add_argument("--parallel", type=int, default=4, help="Requests served at once")
+    args = parser.parse_args()
+
+    server = FakeOllama(args.latency, args.tokens_per_s, args.parallel)
+    print(f"Fake Ollama on http://127.0.0.1:{args.port} (latency {args.latency}s)", flush=True)
+    ThreadingHTTPServer(("127.0.0.1", args.port), make_handler(server)).serve_forever()
+
+if __name__ == "__main__":
+    main()